@@ -1,14 +1,24 @@
 import streamlit as st
 import os
-from supabase import create_client, Client
 from dotenv import load_dotenv
-from typing import Union
+from typing import Union, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from supabase import Client
 
 load_dotenv()
 
-# Initialize Supabase client
+# Set once a client exists in this process. Sessions live in that client, so before it is created
+# there is nothing to restore and anonymous pages can render without importing the Supabase SDK.
+_client_created = False
+
+def supabase_client_created() -> bool:
+    return _client_created
+
+# Initialize Supabase client (the SDK is imported on first use; it dominates cold start otherwise)
 @st.cache_resource
-def get_supabase_client() -> Client:
+def get_supabase_client() -> "Client":
+    global _client_created
     supabase_url = os.environ.get("SUPABASE_URL", "https://xolzhwksoafumenbhugs.supabase.co")
     supabase_key = os.environ.get("SUPABASE_KEY")
     if not supabase_url or not supabase_key:
@@ -16,7 +26,10 @@ def get_supabase_client() -> Client:
         return None
     
     try:
-        return create_client(supabase_url, supabase_key)
+        from supabase import create_client
+        client = create_client(supabase_url, supabase_key)
+        _client_created = True
+        return client
     except Exception as e:
         st.error(f"Error initializing Supabase client: {e}")
         return None
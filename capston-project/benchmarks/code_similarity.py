@@ -0,0 +1,109 @@
+"""Throughput benchmark for the winnowing similarity index over synthetic submissions.
+
+Run from the project root:
+    python benchmarks/code_similarity.py [--submissions 3000] [--copies 0.05]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from services.code_similarity_service import SimilarityIndex
+
+TEMPLATE = "def solve_problem(input_data):\n    # Your code here\n    pass\n"
+
+NAMES = ["data", "items", "total", "result", "acc", "values", "idx", "tmp", "count", "out", "buf", "res"]
+CALLS = ["len", "sum", "max", "min", "abs", "sorted", "list", "set", "str", "int"]
+OPS = ["+", "-", "*", "//", "%"]
+COMPARISONS = ["<", ">", "<=", ">=", "==", "!="]
+
+def make_expression(rng: random.Random, depth: int = 0) -> str:
+    choice = rng.random()
+    if depth > 1 or choice < 0.3:
+        return rng.choice(NAMES) if rng.random() < 0.6 else str(rng.randint(0, 99))
+    if choice < 0.6:
+        return f"{make_expression(rng, depth + 1)} {rng.choice(OPS)} {make_expression(rng, depth + 1)}"
+    if choice < 0.8:
+        return f"{rng.choice(CALLS)}({make_expression(rng, depth + 1)})"
+    return f"{rng.choice(NAMES)}[{make_expression(rng, depth + 1)}]"
+
+def make_block(rng: random.Random, indent: int, depth: int = 0) -> list:
+    pad = "    " * indent
+    lines = []
+    for _ in range(rng.randint(1, 3)):
+        kind = rng.random()
+        if depth < 2 and kind < 0.2:
+            lines.append(f"{pad}for {rng.choice(NAMES)} in range({make_expression(rng)}):")
+            lines += make_block(rng, indent + 1, depth + 1)
+        elif depth < 2 and kind < 0.35:
+            lines.append(f"{pad}if {make_expression(rng)} {rng.choice(COMPARISONS)} {make_expression(rng)}:")
+            lines += make_block(rng, indent + 1, depth + 1)
+        elif kind < 0.5:
+            lines.append(f"{pad}{rng.choice(NAMES)}.append({make_expression(rng)})")
+        else:
+            lines.append(f"{pad}{rng.choice(NAMES)} {rng.choice(['=', '+=', '-='])} {make_expression(rng)}")
+    return lines
+
+def make_submission(rng: random.Random) -> str:
+    lines = ["def solve_problem(input_data):"]
+    while len(lines) < rng.randint(15, 40):
+        lines += make_block(rng, 1)
+    lines.append("    return result")
+    return "\n".join(lines) + "\n"
+
+def disguise(code: str, rng: random.Random) -> str:
+    """A copy with renamed variables, changed numbers and added comments."""
+    for name in NAMES:
+        code = code.replace(name, name + "_x")
+    lines = [line + "  # my solution" if rng.random() < 0.3 else line for line in code.splitlines()]
+    return "\n".join(lines) + "\n"
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--submissions", type=int, default=3000)
+    parser.add_argument("--copies", type=float, default=0.05, help="fraction of submissions that are disguised copies")
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    originals = [make_submission(rng) for _ in range(args.submissions)]
+    copied = set(rng.sample(range(1, args.submissions), int(args.submissions * args.copies)))
+    expected = set()
+    for i in copied:
+        source = rng.randrange(0, i)
+        originals[i] = disguise(originals[source], rng)
+        expected.add((min(str(source), str(i)), max(str(source), str(i))))
+    rows = [{"id": str(i), "code": code} for i, code in enumerate(originals)]
+
+    index = SimilarityIndex(ignored_code=TEMPLATE)
+    start = time.perf_counter()
+    index.update(rows)
+    build = time.perf_counter() - start
+
+    start = time.perf_counter()
+    pairs = index.similar_pairs(min_score=0.8)
+    query = time.perf_counter() - start
+
+    start = time.perf_counter()
+    unchanged = index.update(rows)
+    refresh = time.perf_counter() - start
+
+    new_row = {"id": "new", "code": disguise(originals[0], rng)}
+    start = time.perf_counter()
+    index.update(rows + [new_row])
+    matches = index.query(new_row["code"], min_score=0.8, exclude_id="new")
+    incremental = time.perf_counter() - start
+
+    found = {(p["a"], p["b"]) for p in pairs}
+    recall = len(found & expected) / len(expected) if expected else 1.0
+    print(f"Submissions:            {args.submissions}")
+    print(f"Index build:            {build:.2f}s ({build / args.submissions * 1000:.2f} ms per submission)")
+    print(f"Similar pairs query:    {query:.2f}s, {len(pairs)} pairs >= 0.8")
+    print(f"Planted copies found:   {len(found & expected)}/{len(expected)} (recall {recall:.0%}), {len(found - expected)} other pairs")
+    print(f"Unchanged refresh:      {refresh * 1000:.1f} ms ({unchanged} re-indexed)")
+    print(f"Add + query one new:    {incremental * 1000:.1f} ms, best match {matches[0] if matches else None}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""Cold-start benchmark: import time and time-to-first-paint of the home and login pages.
+
+Run from the project root (needs the app's requirements installed):
+    python benchmarks/cold_start.py [--runs 5] [--pages home login] [--top 12]
+
+Every run is a fresh interpreter started with `python -X importtime`. The child first imports Streamlit's
+test harness, then renders main.py once with `streamlit.testing.v1.AppTest` for the requested page; the
+time of that first run (script imports + render) is the time-to-first-paint. A marker on stderr separates
+the harness imports from the app's own, so the import breakdown only covers what main.py pulled in.
+After the paint the child imports the remaining page modules from main.PAGES to show the cost that the
+lazy registry defers, and lists which heavy SDKs were loaded before the first paint (ideally none).
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, PROJECT_ROOT)
+
+APP_MARKER = "@@cold-start: app"
+DEFERRED_MARKER = "@@cold-start: deferred"
+# Modules that should not be needed to paint an anonymous page
+HEAVY_MODULES = ("supabase", "langchain_groq", "langchain_core", "PyPDF2", "db_utils")
+
+CHILD = r"""
+import importlib, json, os, sys, time
+from streamlit.testing.v1 import AppTest
+
+page = sys.argv[1]
+os.write(2, b"%(app)s\n")
+start = time.perf_counter()
+at = AppTest.from_file(os.path.join(os.getcwd(), "main.py"), default_timeout=120)
+at.session_state.page = page
+at.run()
+first_paint = time.perf_counter() - start
+loaded = [name for name in %(heavy)r if name in sys.modules]
+
+os.write(2, b"%(deferred)s\n")
+import main
+start = time.perf_counter()
+for module_name, _ in main.PAGES.values():
+    importlib.import_module(module_name)
+deferred = time.perf_counter() - start
+print(json.dumps({"first_paint_s": first_paint, "deferred_s": deferred, "heavy_loaded": loaded,
+                  "exceptions": [str(e.value) for e in at.exception]}))
+""" % {"app": APP_MARKER, "deferred": DEFERRED_MARKER, "heavy": HEAVY_MODULES}
+
+def parse_importtime(stderr: str) -> Dict[str, List[Tuple[str, int, int, int]]]:
+    """Splits `-X importtime` lines into sections by marker: [(module, self us, cumulative us, depth)]."""
+    sections: Dict[str, list] = {"harness": [], "app": [], "deferred": []}
+    current = "harness"
+    for line in stderr.splitlines():
+        if line == APP_MARKER:
+            current = "app"
+            continue
+        if line == DEFERRED_MARKER:
+            current = "deferred"
+            continue
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        depth = (len(name) - len(name.lstrip(" ")) - 1) // 2
+        sections[current].append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return sections
+
+def run_once(page: str) -> Tuple[dict, Dict[str, list]]:
+    env = dict(os.environ, PAGE_PROFILING="0", PYTHONDONTWRITEBYTECODE="1")
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", CHILD, page], cwd=PROJECT_ROOT, env=env,
+                          capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"{page}: child exited with {proc.returncode}\n{proc.stderr[-2000:]}")
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    return result, parse_importtime(proc.stderr)
+
+def summarize(page: str, runs: int, top: int):
+    results, app_imports, deferred_imports = [], [], []
+    for _ in range(runs):
+        result, sections = run_once(page)
+        results.append(result)
+        app_imports.append(sections["app"])
+        deferred_imports.append(sections["deferred"])
+
+    def total_ms(entries) -> float:
+        return sum(self_us for _, self_us, _, _ in entries) / 1000
+
+    print(f"\n== page: {page} ({runs} cold runs, medians)")
+    print(f"time to first paint:      {statistics.median(r['first_paint_s'] for r in results) * 1000:9.1f} ms")
+    print(f"  of which app imports:   {statistics.median(total_ms(a) for a in app_imports):9.1f} ms "
+          f"({statistics.median(len(a) for a in app_imports):.0f} modules)")
+    print(f"deferred page imports:    {statistics.median(total_ms(d) for d in deferred_imports):9.1f} ms "
+          f"({statistics.median(len(d) for d in deferred_imports):.0f} modules, paid on first visit to those pages)")
+    heavy = sorted({name for r in results for name in r["heavy_loaded"]})
+    print(f"heavy modules before paint: {', '.join(heavy) if heavy else 'none'}")
+    errors = {e for r in results for e in r["exceptions"]}
+    for error in sorted(errors):
+        print(f"  render raised: {error}")
+
+    # Slowest top-level imports of the last run, by cumulative time
+    top_level = sorted((e for e in app_imports[-1] if e[3] == 0), key=lambda e: -e[2])[:top]
+    if top_level:
+        print("slowest top-level imports before paint:")
+        for name, _, cumulative_us, _ in top_level:
+            print(f"  {cumulative_us / 1000:8.1f} ms  {name}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--pages", nargs="+", default=["home", "login"])
+    parser.add_argument("--top", type=int, default=12)
+    args = parser.parse_args()
+    for page in args.pages:
+        summarize(page, args.runs, args.top)
+
+if __name__ == "__main__":
+    main()
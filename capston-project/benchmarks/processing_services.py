@@ -0,0 +1,246 @@
+"""Microbenchmarks for the quiz and assignment processing services, with stored baselines and regression thresholds.
+
+Run from the project root (fully offline: synthetic inputs, no LLM or database):
+    python benchmarks/processing_services.py                 # compare against the stored baselines
+    python benchmarks/processing_services.py --update        # re-record the baselines
+    python benchmarks/processing_services.py --filter parse_llm_questions --threshold 1.3
+
+Every function is timed at sizes 10 to 10,000: questions for the quiz functions, lines of model output per
+response for the response parsers (10,000 lines is a response of about 1 MB). The suite makes several
+rounds over all cases, with the garbage collector off while timing; each case reports the median of its
+per-round best times, so a burst of load on the machine neither fails one case nor records a lucky baseline. Baselines are stored with the time of a fixed pure-Python calibration loop,
+and are rescaled by the current calibration time, so a baseline recorded on another machine stays usable.
+A case fails when it is more than --threshold times slower than its rescaled baseline; the exit status is 1
+if any case failed. On a shared or throttled host, raise --threshold or --rounds rather than the baselines.
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from typing import Callable, Dict, List, Tuple
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from models.question import Question
+from services.quiz_processing_service import (
+    parse_llm_questions, calculate_quiz_score, create_quiz_summary_for_llm, parse_quiz_analysis
+)
+from services.assignment_processing_service import parse_assignment_details, parse_code_evaluation
+
+BASELINES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "processing_baselines.json")
+SIZES = (10, 100, 1_000, 10_000)
+DEFAULT_THRESHOLD = 1.5
+# Differences below this are timer noise, never a regression
+NOISE_FLOOR_SECONDS = 5e-6
+MIN_REPEAT_SECONDS = 0.02
+
+# --- SYNTHETIC INPUTS ---
+
+def make_quiz_response(num_questions: int) -> str:
+    """A quiz in the format generate_quiz_creation_prompt asks for, cycling through the four question types."""
+    blocks = []
+    for i in range(num_questions):
+        kind = ("MCQ", "FILL", "TF", "OPEN")[i % 4]
+        lines = [f"{kind} {i + 1}: Which statement about concept {i} in distributed systems is accurate under partition?"]
+        if kind == "MCQ":
+            correct = i % 4
+            lines += [f"{chr(65 + j)}) {'**' if j == correct else ''}Option {j} describing consistency trade-off {i}{'**' if j == correct else ''}"
+                      for j in range(4)]
+        elif kind == "FILL":
+            lines.append(f"Answer: quorum{i % 7}")
+        elif kind == "TF":
+            lines += ["A) **True**", "B) False"] if i % 2 else ["A) True", "B) **False**"]
+        lines.append(f"Source: [S{i % 12 + 1}]")
+        blocks.append("\n".join(lines))
+    return "Here is your quiz:\n\n" + "\n\n".join(blocks) + "\n"
+
+def make_quiz(num_questions: int) -> Tuple[List[Question], Dict[int, object]]:
+    """Questions plus a student's answers: about 70% correct, fill-in answers as text, some left blank."""
+    questions = parse_llm_questions(make_quiz_response(num_questions))
+    questions = [Question(i, q.question, q.answers, q.correct_answer, q.question_type, str(i), q.source) for i, q in enumerate(questions)]
+    answers: Dict[int, object] = {}
+    for i, q in enumerate(questions):
+        right = (i * 7919) % 10 < 7
+        if q.question_type in ("mcq", "true_false"):
+            answers[i] = q.correct_answer if right else (q.correct_answer + 1) % len(q.answers)
+        elif q.question_type == "fill_blank":
+            answers[i] = q.answers[0].upper() if right else "eventual"
+        elif i % 3:
+            answers[i] = f"An open answer about concept {i} that the teacher grades by hand."
+    return questions, answers
+
+def _prose(num_lines: int, topic: str) -> str:
+    return "\n".join(f"- Line {i} on {topic}: the student handled case {i % 17} but missed the boundary at {i % 5}." for i in range(num_lines))
+
+def make_analysis_response(num_lines: int) -> str:
+    share = max(1, num_lines // 4)
+    return ("Sure, here is the analysis.\n"
+            f"<understanding>\n{_prose(share, 'overall understanding')}\n</understanding>\n"
+            f"<knowledge_gaps>\n{_prose(share, 'knowledge gaps')}\n</knowledge_gaps>\n"
+            f"<recommendations>\n{_prose(share, 'recommendations')}\n</recommendations>\n"
+            f"<strengths>\n{_prose(share, 'strengths')}\n</strengths>\n")
+
+def _code(num_lines: int) -> str:
+    return "\n".join(f"    total_{i % 50} = helper(items[{i}], depth={i % 9})  # step {i}" for i in range(num_lines))
+
+def make_assignment_response(num_lines: int) -> str:
+    share = max(1, num_lines // 6)
+    return (f"<title>Interval scheduling with {num_lines} constraints</title>\n"
+            f"<background>\n{_prose(share, 'background')}\n</background>\n"
+            f"<requirements>\n{_prose(share, 'requirements')}\n</requirements>\n"
+            f"<hints>\n{_prose(max(1, share // 4), 'hints')}\n</hints>\n"
+            f"<code_template>\n```python\ndef solve_problem(items):\n{_code(share)}\n    return total_0\n```\n</code_template>\n"
+            f"<expected_output>\n```\n{_prose(max(1, share // 4), 'output')}\n```\n</expected_output>\n"
+            f"<evaluation_criteria>\n{_prose(max(1, share // 4), 'criteria')}\n</evaluation_criteria>\n"
+            f"<reference_solution>\n```python\ndef solve_problem(items):\n{_code(share)}\n    return total_0\n```\n</reference_solution>\n"
+            "<tests>\n```python\ndef test_basic_case():\n    assert solve_problem([1, 2]) == 3\n```\n</tests>\n"
+            "<graded_hints>\n<hint level=\"2\">Sort by end time.</hint>\n<hint level=\"1\">Think greedy.</hint>\n</graded_hints>\n"
+            "<input_generator>\n```python\ndef make_input(n):\n    return list(range(n))\n```\n</input_generator>\n")
+
+def make_code_evaluation_response(num_lines: int) -> str:
+    share = max(1, num_lines // 2)
+    return (f"<verdict>No</verdict>\n<analysis>\n{_prose(share, 'analysis')}\n</analysis>\n"
+            f"<improvements>\n{_prose(share, 'improvements')}\n</improvements>\n")
+
+# --- CASES ---
+
+def build_cases(sizes) -> List[Tuple[str, Callable[[], object]]]:
+    """(case name, zero-argument callable) for every function and size. Inputs are built (and the outputs
+       sanity-checked) here, outside the timed calls."""
+    cases = []
+    for n in sizes:
+        response = make_quiz_response(n)
+        assert len(parse_llm_questions(response)) == n
+        questions, answers = make_quiz(n)
+        assert calculate_quiz_score(questions, answers)[1] > 0
+        analysis = make_analysis_response(n)
+        assert parse_quiz_analysis(analysis)["strengths"].startswith("- Line")
+        assignment = make_assignment_response(n)
+        assert parse_assignment_details(assignment)["reference_solution_content"].startswith("def solve_problem")
+        evaluation = make_code_evaluation_response(n)
+        assert parse_code_evaluation(evaluation)["verdict"] == "No"
+        cases += [
+            (f"parse_llm_questions[{n}]", lambda r=response: parse_llm_questions(r)),
+            (f"calculate_quiz_score[{n}]", lambda q=questions, a=answers: calculate_quiz_score(q, a)),
+            (f"create_quiz_summary_for_llm[{n}]", lambda q=questions, a=answers: create_quiz_summary_for_llm(q, a)),
+            (f"create_quiz_summary_for_llm_unbudgeted[{n}]", lambda q=questions, a=answers: create_quiz_summary_for_llm(q, a, max_tokens=None)),
+            (f"parse_quiz_analysis[{n}]", lambda r=analysis: parse_quiz_analysis(r)),
+            (f"parse_assignment_details[{n}]", lambda r=assignment: parse_assignment_details(r)),
+            (f"parse_code_evaluation[{n}]", lambda r=evaluation: parse_code_evaluation(r)),
+        ]
+    return cases
+
+def time_call(fn: Callable[[], object], repeats: int) -> float:
+    """Best per-call seconds over `repeats` repeats; each repeat loops until it lasts MIN_REPEAT_SECONDS."""
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        number = 1
+        while True:
+            start = time.perf_counter()
+            for _ in range(number):
+                fn()
+            elapsed = time.perf_counter() - start
+            if elapsed >= MIN_REPEAT_SECONDS:
+                break
+            number *= 2 if elapsed == 0 else max(2, int(MIN_REPEAT_SECONDS / elapsed * 1.2))
+        best = elapsed / number
+        for _ in range(repeats - 1):
+            start = time.perf_counter()
+            for _ in range(number):
+                fn()
+            best = min(best, (time.perf_counter() - start) / number)
+        return best
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+def calibration_seconds(repeats: int) -> float:
+    """A fixed pure-Python workload (string building, dict and regex-free parsing) used to rescale baselines."""
+    def workload():
+        counts: Dict[str, int] = {}
+        for i in range(20_000):
+            word = f"w{i % 97}"
+            counts[word] = counts.get(word, 0) + len(word.strip().lower())
+        return "".join(sorted(counts))
+    return time_call(workload, repeats)
+
+def load_baselines() -> Dict:
+    try:
+        with open(BASELINES_PATH, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+def format_seconds(seconds: float) -> str:
+    if seconds >= 1:
+        return f"{seconds:8.2f} s "
+    if seconds >= 1e-3:
+        return f"{seconds * 1e3:8.2f} ms"
+    return f"{seconds * 1e6:8.1f} us"
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--update", action="store_true", help="record the measured times as the new baselines")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="allowed slowdown factor (default 1.5)")
+    parser.add_argument("--rounds", type=int, default=5, help="passes over all cases; each case reports its median")
+    parser.add_argument("--repeats", type=int, default=3, help="timed repeats per case in each round")
+    parser.add_argument("--filter", default="", help="only run cases whose name contains this text")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(SIZES))
+    args = parser.parse_args()
+
+    baselines = load_baselines()
+    cases = [(name, fn) for name, fn in build_cases(args.sizes) if args.filter in name]
+    calibrations: List[float] = []
+    samples: Dict[str, List[float]] = {name: [] for name, _ in cases}
+    for _ in range(args.rounds):
+        for name, fn in cases:
+            # Sampled next to every case, so it sees the same machine state the cases do
+            calibrations.append(calibration_seconds(1))
+            samples[name].append(time_call(fn, args.repeats))
+    calibration = statistics.median(calibrations)
+    results = {name: statistics.median(times) for name, times in samples.items()}
+
+    scale = calibration / baselines["calibration_seconds"] if baselines.get("calibration_seconds") else 1.0
+    print(f"calibration {format_seconds(calibration).strip()} (baseline machine x{scale:.2f})")
+    print(f"{'case':<48}{'time':>12}{'baseline':>12}{'ratio':>8}  status")
+    regressions = []
+    for name, seconds in results.items():
+        baseline = baselines.get("cases", {}).get(name)
+        if baseline is None:
+            print(f"{name:<48}{format_seconds(seconds):>12}{'-':>12}{'-':>8}  new")
+            continue
+        expected = baseline * scale
+        ratio = seconds / expected if expected else float("inf")
+        failed = ratio > args.threshold and seconds - expected > NOISE_FLOOR_SECONDS
+        if failed:
+            regressions.append(name)
+        print(f"{name:<48}{format_seconds(seconds):>12}{format_seconds(expected):>12}{ratio:>7.2f}x  {'REGRESSION' if failed else 'ok'}")
+
+    if args.update:
+        stored = dict(baselines.get("cases", {})) if args.filter or list(args.sizes) != list(SIZES) else {}
+        # Partial runs only replace the cases they measured, rescaled to the stored calibration
+        keep_scale = scale if stored and baselines.get("calibration_seconds") else 1.0
+        stored.update({name: seconds / keep_scale for name, seconds in results.items()})
+        with open(BASELINES_PATH, "w", encoding="utf-8") as f:
+            json.dump({
+                "calibration_seconds": baselines.get("calibration_seconds") if keep_scale != 1.0 else calibration,
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "cases": dict(sorted(stored.items())),
+            }, f, indent=2)
+            f.write("\n")
+        print(f"\nBaselines written to {BASELINES_PATH}")
+        return
+
+    if regressions:
+        print(f"\n{len(regressions)} case(s) slower than {args.threshold}x their baseline: {', '.join(regressions)}")
+        sys.exit(1)
+    print(f"\nNo regressions (threshold {args.threshold}x).")
+
+if __name__ == "__main__":
+    main()
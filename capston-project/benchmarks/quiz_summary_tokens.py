@@ -0,0 +1,55 @@
+"""Prompt-size benchmark for generate_quiz_analysis_prompt: legacy full summary vs the token-budgeted builder.
+
+Run from the project root:
+    python benchmarks/quiz_summary_tokens.py [--accuracy 0.7]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from models.question import Question
+from services.quiz_processing_service import create_quiz_summary_for_llm, generate_quiz_analysis_prompt, estimate_tokens
+
+def legacy_summary(questions, user_answers) -> str:
+    """The previous implementation: every option of every question, built with +=."""
+    quiz_summary = "QUIZ QUESTIONS, ANSWERS, AND USER PERFORMANCE:\n\n"
+    for i, q in enumerate(questions):
+        idx = user_answers.get(i, -1)
+        user_answer_text = q.answers[idx] if 0 <= idx < len(q.answers) else "Not answered"
+        user_choice_label = chr(65 + idx) if 0 <= idx < len(q.answers) else "N/A"
+        quiz_summary += f"Question {i+1}: {q.question}\n"
+        for j, ans_text in enumerate(q.answers):
+            quiz_summary += f"  {chr(65+j)}) {ans_text}\n"
+        quiz_summary += f"  User's answer: {user_choice_label}) {user_answer_text}\n"
+        quiz_summary += f"  Correct answer: {chr(65 + q.correct_answer)}) {q.answers[q.correct_answer]}\n\n"
+    return quiz_summary
+
+def make_quiz(num_questions: int, accuracy: float):
+    questions = [
+        Question(i, f"Question {i}: which of the following best describes concept {i} in cellular biology?",
+                 [f"A plausible but distinct explanation number {j} of concept {i}" for j in range(4)], i % 4, "mcq", str(i))
+        for i in range(num_questions)
+    ]
+    answers = {i: (q.correct_answer if (i * 7919 % 100) < accuracy * 100 else (q.correct_answer + 1) % 4) for i, q in enumerate(questions)}
+    return questions, answers
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--accuracy", type=float, default=0.7)
+    args = parser.parse_args()
+    print(f"{'questions':>9} {'legacy tok':>11} {'budgeted tok':>13} {'saved':>7} {'legacy ms':>10} {'budgeted ms':>12}")
+    for n in (10, 25, 50, 100, 200):
+        questions, answers = make_quiz(n, args.accuracy)
+        t0 = time.perf_counter()
+        legacy = generate_quiz_analysis_prompt(legacy_summary(questions, answers), 0, n, 0.0)
+        t1 = time.perf_counter()
+        budgeted = generate_quiz_analysis_prompt(create_quiz_summary_for_llm(questions, answers), 0, n, 0.0)
+        t2 = time.perf_counter()
+        lt, bt = estimate_tokens(legacy), estimate_tokens(budgeted)
+        print(f"{n:>9} {lt:>11} {bt:>13} {100 * (1 - bt / lt):>6.1f}% {1000 * (t1 - t0):>10.2f} {1000 * (t2 - t1):>12.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Memory benchmark: bytes held per Streamlit session for quiz questions, before and after the compact Question model.
+
+Run from the project root:
+    python benchmarks/session_memory.py [--sessions 300] [--questions 50]
+
+"Before" mirrors the old layout: a plain (non-slotted) dataclass with list answers, copied into
+`current_quiz_questions_for_results` and rebuilt again by every `get_quiz_details_by_id` call.
+"After" uses the slotted, frozen Question and the shared per-quiz tuple; sessions only keep the quiz id.
+"""
+import argparse
+import gc
+import os
+import sys
+import tracemalloc
+from dataclasses import dataclass
+from typing import List
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from models.question import Question, register_question_set, get_question_set
+
+@dataclass
+class LegacyQuestion:
+    id: int
+    question: str
+    answers: List[str]
+    correct_answer: int
+    question_type: str = "mcq"
+    db_id: int = 0
+
+def make_raw_questions(num_questions: int) -> List[dict]:
+    """Synthetic JSONB payload, as returned by Supabase for quizzes.questions."""
+    raw = []
+    for i in range(num_questions):
+        raw.append({
+            "question": f"Question {i}: which statement about topic {i % 7} is correct?",
+            "answers": [f"Option {chr(65 + j)} for question {i}" for j in range(4)],
+            "correct_answer": i % 4,
+            "question_type": ["mcq", "true_false", "fill_blank", "open_ended"][i % 4],
+        })
+    return raw
+
+def legacy_session(raw: List[dict]) -> dict:
+    # Each JSON decode yields fresh strings, so every rebuilt copy owns its own text
+    def rebuild():
+        return [LegacyQuestion(i, "".join(q["question"]), ["".join(a) for a in q["answers"]], q["correct_answer"],
+                               "".join(q["question_type"]), str(i)) for i, q in enumerate(raw)]
+    return {
+        "quiz_details_questions": rebuild(),
+        "current_quiz_questions_for_results": rebuild(),
+        "user_answers_for_results": {str(i): i % 4 for i in range(len(raw))},
+    }
+
+def compact_session(quiz_id: str, raw: List[dict]) -> dict:
+    questions = get_question_set(quiz_id, "bench")
+    if questions is None:
+        questions = register_question_set(quiz_id, [
+            Question(i, q["question"], q["answers"], q["correct_answer"], q["question_type"], str(i))
+            for i, q in enumerate(raw)
+        ], "bench")
+    return {
+        "quiz_details_questions": questions,
+        "results_quiz_id": quiz_id,
+        "user_answers_for_results": {str(i): i % 4 for i in range(len(raw))},
+    }
+
+def measure(build_sessions) -> int:
+    gc.collect()
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    sessions = build_sessions()
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del sessions
+    return after - before
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=300)
+    parser.add_argument("--questions", type=int, default=50)
+    args = parser.parse_args()
+
+    raw = make_raw_questions(args.questions)
+    legacy_bytes = measure(lambda: [legacy_session(raw) for _ in range(args.sessions)])
+    compact_bytes = measure(lambda: [compact_session("quiz-1", raw) for _ in range(args.sessions)])
+
+    print(f"{args.sessions} sessions x {args.questions} questions")
+    print(f"  before: {legacy_bytes / args.sessions:>10.0f} bytes/session")
+    print(f"  after:  {compact_bytes / args.sessions:>10.0f} bytes/session")
+    print(f"  saved:  {100 * (1 - compact_bytes / legacy_bytes):>9.1f} %")
+
+if __name__ == "__main__":
+    main()
@@ -1,21 +1,34 @@
 import streamlit as st
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from auth import get_supabase_client, get_user_id
 # from quiz_utils import Question # Old import
-from models.question import Question # New import
+from models.question import Question, get_question_set, register_question_set # New import
+from services.question_bank_service import question_to_bank_row, extract_topic_tokens
+from services.shared_cache_service import cache_get, cache_set
 # from assignment_utils import ... # If specific assignment dataclass needed
+import os
 import uuid # For generating IDs if not handled by Supabase default
+import hashlib
+import json
+
+# Quiz rows are shared between app processes through the shared cache; quizzes are not edited after creation,
+# the TTL only bounds how long a change made directly in the database can go unnoticed
+QUIZ_DETAILS_CACHE_TTL = int(os.environ.get("QUIZ_DETAILS_CACHE_TTL", "600"))
 
 # --- QUIZ DATABASE FUNCTIONS ---
 
-def save_quiz_to_db(title: str, description: str, questions: List[Question], topics: str = "", difficulty: str = "") -> Optional[str]:
-    """Saves a new quiz and its questions to the database.
-       Returns the quiz_id if successful, else None."""
+def save_quiz_to_db(title: str, description: str, questions: List[Question], topics: str = "", difficulty: str = "",
+                    material_id: Optional[str] = None, teacher_id: Optional[str] = None,
+                    share_questions: bool = False) -> Tuple[Optional[str], str]:
+    """Saves a new quiz and its questions to the database, and its questions to the teacher's question bank
+       (offered to other teachers too when share_questions is set).
+       teacher_id must be given when saving from a background task, where the signed-in user is unknown.
+       Makes no st.* calls (it runs on task-runner threads); returns (quiz_id, "") if successful,
+       else (None, error message) for the caller to display."""
     client = get_supabase_client()
-    user_id = get_user_id()
+    user_id = teacher_id or get_user_id()
     if not client or not user_id:
-        st.error("User not logged in or Supabase client error.")
-        return None
+        return None, "User not logged in or Supabase client error."
     try:
         quiz_data = {
             "title": title,
@@ -23,26 +36,65 @@ def save_quiz_to_db(title: str, description: str, questions: List[Question], top
             "topics": topics,
             "difficulty": difficulty,
             "teacher_id": user_id,
+            **({"material_id": material_id} if material_id else {}),
             "questions": [
                 {
                     "question": q_obj.question,
-                    "answers": q_obj.answers,
+                    "answers": list(q_obj.answers),
                     "correct_answer": q_obj.correct_answer,
-                    "question_type": getattr(q_obj, "question_type", "mcq")
+                    "question_type": getattr(q_obj, "question_type", "mcq"),
+                    **({"source": q_obj.source} if getattr(q_obj, "source", "") else {})
                 } for q_obj in questions
             ]
         }
         quiz_response = client.table("quizzes").insert(quiz_data).execute()
         if quiz_response.data and len(quiz_response.data) > 0:
             quiz_db_id = quiz_response.data[0]["id"]
-            st.success(f"Quiz '{title}' saved successfully!")
-            return quiz_db_id
+            save_questions_to_bank(questions, topics, difficulty, user_id, shared=share_questions)
+            return quiz_db_id, ""
         else:
-            st.error(f"Failed to save quiz '{title}'. Error: {quiz_response.error}")
-            return None
+            return None, f"Failed to save quiz '{title}'. Error: {quiz_response.error}"
     except Exception as e:
-        st.error(f"An error occurred while saving the quiz: {str(e)}")
-        return None
+        return None, f"An error occurred while saving the quiz: {str(e)}"
+
+def save_questions_to_bank(questions: List[Question], topics: str, difficulty: str, teacher_id: str, shared: bool = False) -> int:
+    """Deduplicates questions into the teacher's question bank by normalized-text and difficulty hash.
+       Returns the number of rows sent to the bank (the teacher's existing hashes are left untouched)."""
+    client = get_supabase_client()
+    if not client or not questions or not teacher_id:
+        return 0
+    try:
+        rows = {}
+        for q_obj in questions:
+            row = question_to_bank_row(q_obj, topics, difficulty, teacher_id, shared=shared)
+            rows.setdefault(row["text_hash"], row)
+        client.table("question_bank").upsert(list(rows.values()), on_conflict="teacher_id,text_hash", ignore_duplicates=True).execute()
+        return len(rows)
+    except Exception as e:
+        # The bank is an optimization; never fail quiz creation because of it
+        print(f"Error saving questions to bank: {e}")
+        return 0
+
+def get_bank_questions(topics: str, difficulty: str, question_types: List[str], teacher_id: str,
+                       include_shared: bool = False, limit: int = 200) -> List[Dict[str, Any]]:
+    """Fetches bank questions sharing at least one topic token with `topics` at the given difficulty:
+       the teacher's own, plus the ones other teachers shared when include_shared is set."""
+    client = get_supabase_client()
+    topic_tokens = extract_topic_tokens(topics)
+    if not client or not topic_tokens or not question_types or not teacher_id:
+        return []
+    try:
+        query = client.table("question_bank").select("text_hash, question, answers, correct_answer, question_type, difficulty, topic_tokens")
+        query = query.or_(f"teacher_id.eq.{teacher_id},shared.is.true") if include_shared else query.eq("teacher_id", teacher_id)
+        response = query \
+            .eq("difficulty", difficulty) \
+            .in_("question_type", question_types) \
+            .overlaps("topic_tokens", topic_tokens) \
+            .limit(limit).execute()
+        return response.data if response.data else []
+    except Exception as e:
+        st.error(f"Error fetching questions from the question bank: {e}")
+        return []
 
 def get_quizzes_for_student() -> List[Dict[str, Any]]:
     """Fetches all available quizzes for a student."""
@@ -64,20 +116,30 @@ def get_quiz_details_by_id(quiz_id: str) -> Optional[Dict[str, Any]]:
     if not client:
         return None
     try:
-        quiz_response = client.table("quizzes").select("*").eq("id", quiz_id).single().execute()
-        if quiz_response.data:
+        quiz_data = cache_get("quiz", str(quiz_id))
+        if quiz_data is None:
+            quiz_response = client.table("quizzes").select("*").eq("id", quiz_id).single().execute()
             quiz_data = quiz_response.data
-            # Parse questions from JSONB field
-            questions = []
-            for i, q in enumerate(quiz_data.get("questions", [])):
-                questions.append(Question(
-                    id=i,
-                    question=q["question"],
-                    answers=q["answers"],
-                    correct_answer=q["correct_answer"],
-                    question_type=q.get("question_type", "mcq"),
-                    db_id=str(i)
-                ))
+            if quiz_data:
+                cache_set("quiz", str(quiz_id), quiz_data, QUIZ_DETAILS_CACHE_TTL)
+        if quiz_data:
+            raw_questions = quiz_data.get("questions", []) or []
+            # Sessions share one immutable tuple per quiz; only rebuild it when the stored questions changed
+            fingerprint = hashlib.sha256(json.dumps(raw_questions, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+            questions = get_question_set(quiz_id, fingerprint)
+            if questions is None:
+                # Parse questions from JSONB field
+                questions = register_question_set(quiz_id, [
+                    Question(
+                        id=i,
+                        question=q["question"],
+                        answers=q["answers"],
+                        correct_answer=q["correct_answer"],
+                        question_type=q.get("question_type", "mcq"),
+                        db_id=str(i),
+                        source=q.get("source", "")
+                    ) for i, q in enumerate(raw_questions)
+                ], fingerprint)
             quiz_data['questions'] = questions
             return quiz_data
         return None
@@ -109,6 +171,17 @@ def save_quiz_submission(quiz_id: str, student_id: str, answers: Dict[str, Any],
         st.error(f"Error saving quiz submission: {e}")
         return False
 
+def save_quiz_submission_feedback(quiz_id: str, student_id: str, feedback: str) -> bool:
+    """Stores the AI analysis with an already saved submission (called from background tasks, so no st.* calls)."""
+    client = get_supabase_client()
+    if not client: return False
+    try:
+        client.table("quiz_results").update({"feedback": feedback}).eq("quiz_id", quiz_id).eq("student_id", student_id).execute()
+        return True
+    except Exception as e:
+        print(f"Error saving quiz feedback: {e}")
+        return False
+
 def get_student_quiz_submissions(student_id: str, quiz_id: Optional[str] = None) -> List[Dict[str, Any]]:
     client = get_supabase_client()
     if not client: return []
@@ -140,6 +213,63 @@ def get_quiz_submissions_for_teacher(teacher_id: str, quiz_id: Optional[str] = N
         st.error(f"Error fetching quiz submissions for teacher: {e}")
         return []
 
+def get_quiz_submission_answers(quiz_id: str) -> List[Dict[str, Any]]:
+    """Fetches only the answers of every submission for a quiz (used for class-level analysis)."""
+    client = get_supabase_client()
+    if not client: return []
+    try:
+        response = client.table("quiz_results").select("answers").eq("quiz_id", quiz_id).execute()
+        answers = []
+        for row in response.data or []:
+            row_answers = row.get("answers") or {}
+            if isinstance(row_answers, str):
+                try:
+                    row_answers = json.loads(row_answers)
+                except Exception:
+                    row_answers = {}
+            answers.append(row_answers)
+        return answers
+    except Exception as e:
+        st.error(f"Error fetching quiz submission answers: {e}")
+        return []
+
+def save_quiz_manual_grades(quiz_id: str, student_id: str, manual_grades: Dict[str, float]) -> bool:
+    """Stores the teacher's grades for a student's open-ended and fill-in-the-blank answers."""
+    client = get_supabase_client()
+    if not client: return False
+    try:
+        client.table("quiz_results").update({"manual_grades": manual_grades}).eq("quiz_id", quiz_id).eq("student_id", student_id).execute()
+        return True
+    except Exception as e:
+        st.error(f"Error saving manual grades: {e}")
+        return False
+
+def get_quiz_misconceptions(quiz_id: str) -> Dict[str, Dict[str, str]]:
+    """Fetches cached misconception fragments for a quiz as {mistake_key: {"explanation", "review"}}."""
+    client = get_supabase_client()
+    if not client: return {}
+    try:
+        response = client.table("quiz_misconceptions").select("mistake_key, explanation, review").eq("quiz_id", quiz_id).execute()
+        return {row["mistake_key"]: {"explanation": row.get("explanation", ""), "review": row.get("review", "")} for row in response.data or []}
+    except Exception as e:
+        print(f"Error fetching quiz misconceptions: {e}")
+        return {}
+
+def save_quiz_misconceptions(quiz_id: str, fragments: Dict[str, Dict[str, str]]) -> bool:
+    """Stores misconception fragments for a quiz, one row per (question, wrong answer) pair."""
+    client = get_supabase_client()
+    if not client or not fragments: return False
+    try:
+        rows = [
+            {"quiz_id": quiz_id, "mistake_key": key, "explanation": f.get("explanation", ""), "review": f.get("review", "")}
+            for key, f in fragments.items()
+        ]
+        client.table("quiz_misconceptions").upsert(rows, on_conflict="quiz_id,mistake_key").execute()
+        return True
+    except Exception as e:
+        print(f"Error saving quiz misconceptions: {e}")
+        return False
+
 # --- ASSIGNMENT DATABASE FUNCTIONS ---
 
 def save_assignment_to_db(assignment_data: Dict[str, Any]) -> Optional[str]:
@@ -165,6 +295,102 @@ def save_assignment_to_db(assignment_data: Dict[str, Any]) -> Optional[str]:
         st.error(f"An error occurred while saving the assignment: {str(e)}")
         return None
 
+def save_assignments_to_db(assignments: List[Dict[str, Any]]) -> List[Optional[str]]:
+    """Saves several coding assignments with a single insert.
+       Returns the new ids in input order, or an empty list if the insert failed."""
+    client = get_supabase_client()
+    user_id = get_user_id()
+    if not client or not user_id:
+        st.error("User not logged in or Supabase client error.")
+        return []
+    if not assignments:
+        return []
+    try:
+        rows = [{**assignment, "teacher_id": user_id} for assignment in assignments]
+        response = client.table("coding_assignments").insert(rows).execute()
+        if response.data:
+            return [row.get("id") for row in response.data]
+        st.error(f"Failed to save assignments. Error: {response.error}")
+        return []
+    except Exception as e:
+        st.error(f"An error occurred while saving the assignments: {str(e)}")
+        return []
+
+# --- COURSE MATERIALS ---
+_MATERIAL_LIST_COLUMNS = "id, title, page_count, pages_read, created_at"
+
+def save_course_material(material: Dict[str, Any]) -> Optional[str]:
+    """Stores a processed document in the teacher's library. Returns the material id."""
+    client = get_supabase_client()
+    user_id = get_user_id()
+    if not client or not user_id:
+        st.error("User not logged in or Supabase client error.")
+        return None
+    try:
+        response = client.table("course_materials").upsert(
+            {**material, "teacher_id": user_id}, on_conflict="teacher_id,file_sha256"
+        ).execute()
+        if response.data:
+            return response.data[0]["id"]
+        st.error(f"Failed to save the course material. Error: {response.error}")
+        return None
+    except Exception as e:
+        st.error(f"An error occurred while saving the course material: {str(e)}")
+        return None
+
+def find_course_material(file_sha256: str) -> Optional[Dict[str, Any]]:
+    """The current teacher's library entry for a file hash (list columns only), if it was uploaded before."""
+    client = get_supabase_client()
+    user_id = get_user_id()
+    if not client or not user_id:
+        return None
+    try:
+        response = client.table("course_materials").select(_MATERIAL_LIST_COLUMNS).eq("teacher_id", user_id).eq("file_sha256", file_sha256).limit(1).execute()
+        return response.data[0] if response.data else None
+    except Exception as e:
+        print(f"Error looking up course material: {e}")
+        return None
+
+def get_course_materials_for_teacher() -> List[Dict[str, Any]]:
+    """The current teacher's library, newest first, without the stored text and index."""
+    client = get_supabase_client()
+    user_id = get_user_id()
+    if not client or not user_id:
+        return []
+    try:
+        response = client.table("course_materials").select(_MATERIAL_LIST_COLUMNS).eq("teacher_id", user_id).order("created_at", desc=True).execute()
+        return response.data if response.data else []
+    except Exception as e:
+        st.error(f"Error fetching course materials: {e}")
+        return []
+
+def get_course_material(material_id: str) -> Optional[Dict[str, Any]]:
+    """A stored document with its text, chunk boundaries and search index."""
+    client = get_supabase_client()
+    if not client:
+        return None
+    try:
+        response = client.table("course_materials").select("*").eq("id", material_id).single().execute()
+        return response.data if response.data else None
+    except Exception as e:
+        st.error(f"Error fetching course material: {e}")
+        return None
+
+def delete_course_material(material_id: str) -> bool:
+    client = get_supabase_client()
+    user_id = get_user_id()
+    if not client or not user_id:
+        return False
+    try:
+        client.table("course_materials").delete().eq("id", material_id).eq("teacher_id", user_id).execute()
+        # Drop the deleted document's search index from this process's cache
+        from services.course_material_service import get_material_index
+        get_material_index.clear()
+        return True
+    except Exception as e:
+        st.error(f"Error deleting course material: {e}")
+        return False
+
 def get_assignments_for_student() -> List[Dict[str, Any]]:
     """Fetches all available assignments for a student."""
     client = get_supabase_client()
@@ -189,11 +415,12 @@ def get_assignment_details_by_id(assignment_id: str) -> Optional[Dict[str, Any]]
         st.error(f"Error fetching assignment details: {e}")
         return None
 
-def save_assignment_submission(assignment_id: str, student_id: str, submitted_code: str, evaluation_feedback: Optional[str] = None, score: Optional[float] = None) -> bool:
-    """Saves a student's assignment submission."""
+def save_assignment_submission(assignment_id: str, student_id: str, submitted_code: str, evaluation_feedback: Optional[str] = None, score: Optional[float] = None) -> Optional[str]:
+    """Saves a student's assignment submission.
+       Returns the submission id if successful, else None (the evaluation can be stored later)."""
     client = get_supabase_client()
     if not client:
-        return False
+        return None
     try:
         submission_data = {
             "assignment_id": assignment_id,
@@ -201,14 +428,59 @@ def save_assignment_submission(assignment_id: str, student_id: str, submitted_co
             "code": submitted_code,
             "evaluation": evaluation_feedback,
         }
+        if score is not None:
+            submission_data["score"] = score
         response = client.table("assignment_submissions").insert(submission_data).execute()
         if response.data:
             st.success("Assignment submission saved!")
-            return True
+            return response.data[0]["id"]
         st.error(f"Failed to save assignment submission: {response.error}")
-        return False
+        return None
     except Exception as e:
         st.error(f"Error saving assignment submission: {e}")
+        return None
+
+def update_assignment_submission_evaluation(submission_id: str, evaluation_feedback: Optional[str], score: Optional[float] = None) -> bool:
+    """Stores the evaluation (and optional test score) of an existing assignment submission."""
+    client = get_supabase_client()
+    if not client:
+        return False
+    try:
+        update_data = {"evaluation": evaluation_feedback}
+        if score is not None:
+            update_data["score"] = score
+        response = client.table("assignment_submissions").update(update_data).eq("id", submission_id).execute()
+        return bool(response.data)
+    except Exception as e:
+        print(f"Error updating assignment submission evaluation: {e}")
+        return False
+
+def get_cached_evaluation(fingerprint: str) -> Optional[Dict[str, str]]:
+    """Fetches a stored LLM evaluation for a code fingerprint, if one exists."""
+    client = get_supabase_client()
+    if not client: return None
+    try:
+        response = client.table("evaluation_cache").select("evaluation").eq("fingerprint", fingerprint).limit(1).execute()
+        if not response.data:
+            return None
+        evaluation = response.data[0].get("evaluation")
+        return json.loads(evaluation) if isinstance(evaluation, str) else evaluation
+    except Exception as e:
+        print(f"Error fetching cached evaluation: {e}")
+        return None
+
+def save_cached_evaluation(fingerprint: str, assignment_id: str, evaluation: Dict[str, str]) -> bool:
+    """Stores an LLM evaluation under its code fingerprint."""
+    client = get_supabase_client()
+    if not client or not evaluation: return False
+    try:
+        client.table("evaluation_cache").upsert(
+            {"fingerprint": fingerprint, "assignment_id": assignment_id, "evaluation": evaluation},
+            on_conflict="fingerprint"
+        ).execute()
+        return True
+    except Exception as e:
+        print(f"Error saving cached evaluation: {e}")
         return False
 
 def get_student_assignment_submissions(student_id: str, assignment_id: Optional[str] = None) -> List[Dict[str, Any]]:
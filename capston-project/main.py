@@ -1,30 +1,48 @@
 import streamlit as st
 import os
+import importlib
+from typing import Callable, Optional
 from dotenv import load_dotenv
 
+# Load environment variables first: service modules (the profiler included) read their settings on import
+load_dotenv()
+
+# Opt-in render profiling wraps the backend modules before any page module imports from them
+from services.page_profiler_service import install_instrumentation, page_render_profile
+install_instrumentation()
+
 # Custom Modules - Auth is still needed for get_current_user
-from auth import get_current_user # Removed signout_user as sidebar handles it
+from auth import get_current_user, supabase_client_created # Removed signout_user as sidebar handles it
 
-# UI Modules
+# UI Modules - only the shell is imported up front; page modules are loaded through PAGES
 from ui.shared_ui import setup_page_config
 from ui.sidebar import create_sidebar
-from ui.home_page import render_home_page
-from ui.auth_pages import render_login_page, render_signup_page
-from ui.dashboard_pages import render_teacher_dashboard, render_student_dashboard, render_assignment_feedback_page
-from ui.quiz_pages import (
-    render_quiz_page, 
-    render_results_page, 
-    render_take_quiz_page, 
-    render_quiz_submissions_page
-)
-from ui.assignment_pages import (
-    render_coding_page, 
-    render_solve_assignment_page, 
-    render_assignment_submissions_page
-)
 
-# Load environment variables
-load_dotenv()
+# Page name -> (module, render function). A page's module (and the services and SDKs it pulls in) is
+# imported the first time that page is shown, so a cold start only pays for the page being rendered.
+PAGES = {
+    "home": ("ui.home_page", "render_home_page"),
+    "login": ("ui.auth_pages", "render_login_page"),
+    "signup": ("ui.auth_pages", "render_signup_page"),
+    "teacher_dashboard": ("ui.dashboard_pages", "render_teacher_dashboard"),
+    "student_dashboard": ("ui.dashboard_pages", "render_student_dashboard"),
+    "assignment_feedback": ("ui.dashboard_pages", "render_assignment_feedback_page"),
+    "quiz": ("ui.quiz_pages", "render_quiz_page"),
+    "results": ("ui.quiz_pages", "render_results_page"),
+    "take_quiz": ("ui.quiz_pages", "render_take_quiz_page"),
+    "quiz_submissions": ("ui.quiz_pages", "render_quiz_submissions_page"),
+    "coding": ("ui.assignment_pages", "render_coding_page"),
+    "solve_assignment": ("ui.assignment_pages", "render_solve_assignment_page"),
+    "assignment_submissions": ("ui.assignment_pages", "render_assignment_submissions_page"),
+}
+
+def load_page(page: str) -> Optional[Callable[[], None]]:
+    """Render function for a page name, importing its module on first use (None for unknown pages)."""
+    target = PAGES.get(page)
+    if not target:
+        return None
+    module_name, function_name = target
+    return getattr(importlib.import_module(module_name), function_name)
 
 def main():
     """Main application entry point."""
@@ -54,47 +72,23 @@ def main():
         st.session_state.view_assignment_id = None
 
     setup_page_config()
-    
-    if not st.session_state.is_authenticated:
-        user_info = get_current_user()
-        if user_info and user_info.get('success'):
-            st.session_state.is_authenticated = True
-            st.session_state.user = user_info.get('user')
-            st.session_state.user_role = user_info.get('role')
 
-    create_sidebar()
-    
-    page = st.session_state.get("page", "home")
+    with page_render_profile(st.session_state.get("page", "home")):
+        # No client yet means no stored session: skip the SDK import for anonymous first visits
+        if not st.session_state.is_authenticated and supabase_client_created():
+            user_info = get_current_user()
+            if user_info and user_info.get('success'):
+                st.session_state.is_authenticated = True
+                st.session_state.user = user_info.get('user')
+                st.session_state.user_role = user_info.get('role')
 
-    if page == "home":
-        render_home_page()
-    elif page == "login":
-        render_login_page()
-    elif page == "signup":
-        render_signup_page()
-    elif page == "teacher_dashboard":
-        render_teacher_dashboard()
-    elif page == "student_dashboard":
-        render_student_dashboard()
-    elif page == "quiz":
-        render_quiz_page()
-    elif page == "results":
-        render_results_page()
-    elif page == "take_quiz":
-        render_take_quiz_page()
-    elif page == "quiz_submissions":
-        render_quiz_submissions_page()
-    elif page == "coding":
-        render_coding_page()
-    elif page == "solve_assignment":
-        render_solve_assignment_page()
-    elif page == "assignment_submissions":
-        render_assignment_submissions_page()
-    elif page == "assignment_feedback":
-        render_assignment_feedback_page()
-    else:
-        st.session_state.page = "home"
-        st.rerun()
+        create_sidebar()
+
+        render_page = load_page(st.session_state.get("page", "home"))
+        if render_page is None:
+            st.session_state.page = "home"
+            st.rerun()
+        render_page()
 
 if __name__ == "__main__":
     main()
@@ -1,11 +1,54 @@
+import sys
+import threading
+from collections import OrderedDict
 from dataclasses import dataclass
-from typing import List
+from typing import Sequence, Tuple, Optional
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Question:
     id: int
     question: str
-    answers: List[str]
+    answers: Tuple[str, ...]  # Stored as a tuple; lists are converted on construction
     correct_answer: int
     question_type: str = "mcq"  # New field: 'mcq', 'fill_blank', 'true_false', 'open_ended'
-    db_id: int = 0 # Added to match usage in render_take_quiz_page and other places 
\ No newline at end of file
+    db_id: int = 0 # Added to match usage in render_take_quiz_page and other places
+    source: str = ""  # Citation of the course-material passage the question was generated from, if any
+
+    def __post_init__(self):
+        # Slotted + frozen keeps each instance small and safe to share between sessions;
+        # interning means every question of a type points at the same type string.
+        object.__setattr__(self, "answers", tuple(self.answers))
+        object.__setattr__(self, "question_type", sys.intern(self.question_type))
+        if isinstance(self.db_id, str):
+            object.__setattr__(self, "db_id", sys.intern(self.db_id))
+
+# --- SHARED PER-QUIZ QUESTION SETS ---
+# Every session taking or reviewing the same quiz references one immutable tuple of Questions
+# instead of holding its own copy. Bounded so long-running servers do not grow without limit.
+MAX_SHARED_QUESTION_SETS = 512
+_question_sets: "OrderedDict[str, Tuple[str, Tuple[Question, ...]]]" = OrderedDict()
+_question_sets_lock = threading.Lock()
+
+def register_question_set(quiz_id: str, questions: Sequence[Question], fingerprint: str = "") -> Tuple[Question, ...]:
+    """Returns the shared question tuple for quiz_id, replacing it only if the fingerprint changed."""
+    key = str(quiz_id)
+    with _question_sets_lock:
+        cached = _question_sets.get(key)
+        if cached and cached[0] == fingerprint:
+            _question_sets.move_to_end(key)
+            return cached[1]
+        shared = tuple(questions)
+        _question_sets[key] = (fingerprint, shared)
+        _question_sets.move_to_end(key)
+        while len(_question_sets) > MAX_SHARED_QUESTION_SETS:
+            _question_sets.popitem(last=False)
+        return shared
+
+def get_question_set(quiz_id: str, fingerprint: Optional[str] = None) -> Optional[Tuple[Question, ...]]:
+    """Returns the shared question tuple for quiz_id if this process has already loaded it
+       (and, when a fingerprint is given, only if the stored questions still match it)."""
+    with _question_sets_lock:
+        cached = _question_sets.get(str(quiz_id))
+        if not cached or (fingerprint is not None and cached[0] != fingerprint):
+            return None
+        return cached[1]
@@ -0,0 +1,163 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import List, Dict, Any, Optional, Tuple, Callable
+from services.assignment_processing_service import (
+    generate_assignment_creation_prompt, parse_assignment_details, assignment_parse_errors, ASSIGNMENT_TOPICS
+)
+from services.assignment_test_service import validate_assignment_tests
+from services.profiling_service import profile_code, profile_entry_point
+from services.reference_material_service import ensure_reference_material
+from services.pregeneration_service import generate_with_pool
+from services.llm_service import generate_content
+
+# Assignments generated at the same time; LLM calls are additionally bounded by the llm_service rate limiter
+BULK_GENERATION_MAX_WORKERS = int(os.environ.get("BULK_GENERATION_MAX_WORKERS", "4"))
+# Attempts per assignment when the response cannot be parsed
+GENERATION_MAX_ATTEMPTS = 3
+
+DIFFICULTIES = ["Beginner", "Intermediate", "Advanced"]
+
+@dataclass
+class GenerationResult:
+    topic: str
+    difficulty: str
+    time_limit: int
+    status: str = "pending"                          # "generated" / "failed", then "saved" once inserted
+    assignment_data: Optional[Dict[str, Any]] = None
+    assignment_id: Optional[str] = None
+    error: str = ""
+    attempts: int = 0
+    elapsed: float = 0.0
+    notes: List[Tuple[str, str]] = field(default_factory=list)  # ("info"/"warning", message)
+
+def build_assignment_record(parsed_content: Dict[str, Any], topic: str, difficulty: str, time_limit: int,
+                            model_name: Optional[str] = None) -> Tuple[Dict[str, Any], List[Tuple[str, str]]]:
+    """Turns a parsed assignment into a coding_assignments row: reference material, validated tests and
+       the reference performance profile. Returns (row, notes for the teacher)."""
+    notes: List[Tuple[str, str]] = []
+    # Reference solution and graded hints are produced once here and reused for every evaluation
+    ensure_reference_material(parsed_content, model_name=model_name)
+    # Validate the generated tests against the generated reference solution before storing them
+    tests_source, tests_validated, tests_summary = validate_assignment_tests(
+        parsed_content.get("reference_solution_content", ""),
+        parsed_content.get("tests_content", "")
+    )
+    notes.append(("info", tests_summary) if tests_validated else ("warning", f"{tests_summary} Submissions will be evaluated by AI only."))
+    # Profile the reference once; submissions are compared against the stored profile
+    input_generator = parsed_content.get("input_generator_content", "")
+    reference_profile = None
+    if input_generator and parsed_content.get("reference_solution_content"):
+        reference_profile = profile_code(
+            parsed_content["reference_solution_content"], input_generator,
+            profile_entry_point(parsed_content.get("code_template_content", ""))
+        )
+        if reference_profile.ok:
+            notes.append(("info", f"Reference solution profiled: {reference_profile.time_class or 'undetermined'} time. Submissions will get a measured performance report."))
+        else:
+            notes.append(("warning", f"The generated input generator could not be used ({reference_profile.error or 'too few measurements'}); performance will not be profiled."))
+            input_generator, reference_profile = "", None
+    assignment_data = {
+        "title": parsed_content.get("title", f"Assignment on {topic}"),
+        "description": parsed_content.get("background", ""),
+        "requirements": parsed_content.get("requirements", ""),
+        "hints": parsed_content.get("hints", ""),
+        "graded_hints": parsed_content.get("graded_hints_list", []),
+        "code_template": parsed_content.get("code_template_content", ""),
+        "expected_output": parsed_content.get("expected_output_content", ""),
+        "evaluation_criteria": parsed_content.get("evaluation_criteria", ""),
+        "reference_solution": parsed_content.get("reference_solution_content", ""),
+        "tests": tests_source,
+        "tests_validated": tests_validated,
+        "input_generator": input_generator,
+        "reference_profile": reference_profile.to_dict() if reference_profile else None,
+        "topic": topic,
+        "difficulty": difficulty,
+        "time_limit": time_limit
+    }
+    return assignment_data, notes
+
+def generate_assignment(topic: str, difficulty: str, time_limit: int, model_name: Optional[str] = None,
+                        max_attempts: int = GENERATION_MAX_ATTEMPTS) -> GenerationResult:
+    """Generates and prepares one assignment without any UI, retrying responses that cannot be parsed."""
+    result = GenerationResult(topic=topic, difficulty=difficulty, time_limit=time_limit)
+    start = time.perf_counter()
+    prompt = generate_assignment_creation_prompt(topic, difficulty, time_limit)
+    try:
+        parsed_content = None
+        while result.attempts < max_attempts:
+            result.attempts += 1
+            # A pooled response is only tried first; retries always ask the model again
+            if result.attempts == 1:
+                response = generate_with_pool("assignment", prompt, model_name=model_name, show_spinner=False)
+            else:
+                response = generate_content(prompt, show_spinner=False, model_name=model_name)
+            if not response:
+                result.error = "The LLM service returned no content."
+                continue
+            parsed_content = parse_assignment_details(response)
+            missing = assignment_parse_errors(parsed_content)
+            if not missing:
+                break
+            result.error = f"Could not parse the response (missing: {', '.join(missing)})."
+            parsed_content = None
+        if parsed_content is not None:
+            result.assignment_data, result.notes = build_assignment_record(parsed_content, topic, difficulty, time_limit, model_name)
+            result.status, result.error = "generated", ""
+        else:
+            result.status = "failed"
+    except Exception as e:
+        print(f"Assignment generation for '{topic}' failed: {e}")
+        result.status, result.error = "failed", str(e)
+    result.elapsed = time.perf_counter() - start
+    return result
+
+def generate_assignments(items: List[Tuple[str, str, int]], model_name: Optional[str] = None,
+                         max_workers: int = BULK_GENERATION_MAX_WORKERS,
+                         on_result: Optional[Callable[[int, GenerationResult, int, int], None]] = None) -> List[GenerationResult]:
+    """Generates many assignments concurrently. on_result(index, result, completed, total) is called from
+       the calling thread as each one finishes (index is the item's position in items), so it can safely
+       update the page. Results are in input order."""
+    results: List[Optional[GenerationResult]] = [None] * len(items)
+    with ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="assignment-gen") as executor:
+        futures = {
+            executor.submit(generate_assignment, topic, difficulty, time_limit, model_name): i
+            for i, (topic, difficulty, time_limit) in enumerate(items)
+        }
+        for completed, future in enumerate(as_completed(futures), start=1):
+            index = futures[future]
+            results[index] = future.result()
+            if on_result:
+                on_result(index, results[index], completed, len(items))
+    return results
+
+def category_items(category: str, difficulty: str, time_limit: int) -> List[Tuple[str, str, int]]:
+    """One (topic, difficulty, time_limit) item per topic of a category."""
+    return [(topic, difficulty, time_limit) for topic in ASSIGNMENT_TOPICS.get(category, [])]
+
+def parse_curriculum_lines(text: str, default_difficulty: str = "Intermediate",
+                           default_time_limit: int = 30) -> Tuple[List[Tuple[str, str, int]], List[str]]:
+    """Parses "topic, difficulty, minutes" lines (difficulty and minutes optional).
+       Returns (items, error messages for lines that could not be read)."""
+    items, errors = [], []
+    for line_no, line in enumerate((text or "").splitlines(), start=1):
+        parts = [p.strip() for p in line.split(",")]
+        if not parts[0]:
+            continue
+        difficulty = default_difficulty
+        time_limit = default_time_limit
+        if len(parts) > 1 and parts[1]:
+            matches = [d for d in DIFFICULTIES if d.lower() == parts[1].lower()]
+            if not matches:
+                errors.append(f"Line {line_no}: unknown difficulty '{parts[1]}' (use {', '.join(DIFFICULTIES)}).")
+                continue
+            difficulty = matches[0]
+        if len(parts) > 2 and parts[2]:
+            try:
+                time_limit = int(parts[2])
+            except ValueError:
+                errors.append(f"Line {line_no}: '{parts[2]}' is not a number of minutes.")
+                continue
+        items.append((parts[0], difficulty, time_limit))
+    return items, errors
@@ -1,12 +1,51 @@
 import streamlit as st
 import re
-from typing import Dict
+from typing import Dict, List, Optional, Tuple
+
+# Topic tree offered on the assignment generator page
+ASSIGNMENT_TOPICS: Dict[str, List[str]] = {
+    "Python": ["Python Basics", "Functions", "Classes & OOP", "File Handling", "Error Handling"],
+    "Data Structures": ["Lists", "Dictionaries", "Sets", "Tuples", "Stacks & Queues", "Trees", "Graphs"],
+    "Algorithms": ["Searching", "Sorting", "Dynamic Programming", "Recursion", "Greedy Algorithms"],
+    "Data Science": ["Pandas Basics", "Data Visualization", "Linear Regression", "Classification", "Clustering"],
+    "Advanced": ["Neural Networks", "NLP", "Computer Vision", "Web Scraping", "API Development"]
+}
+# Categories whose assignments get an input generator, so submissions can be profiled on growing inputs
+PROFILED_CATEGORIES = ("Data Structures", "Algorithms")
+
+def is_profiled_topic(topic: str) -> bool:
+    return any(topic in ASSIGNMENT_TOPICS[category] for category in PROFILED_CATEGORIES)
+
+_INPUT_GENERATOR_SECTION = """
+<input_generator>
+```python
+# Builds an input of size n for performance profiling of the template's main function.
+# make_input(n) must return a tuple of positional arguments, be fast even for n = 65536 and use only the
+# random module for randomness (it is seeded before each call). Set ENTRY_POINT if the function to profile
+# is not the first function of the code template.
+import random
+
+ENTRY_POINT = "solve_problem"
+
+def make_input(n):
+    return ([random.randint(0, 1000) for _ in range(n)],)
+```
+</input_generator>
+"""
 
 # This prompt is for LLM to generate assignment content
-def generate_assignment_creation_prompt(topic: str, difficulty: str, time_limit: int) -> str:
-    """Generate the prompt for LLM coding assignment creation."""
+def generate_assignment_creation_prompt(topic: str, difficulty: str, time_limit: int,
+                                        source_passages: Optional[List[Tuple[str, str]]] = None) -> str:
+    """Generate the prompt for LLM coding assignment creation.
+       Algorithm and data structure topics also ask for an input generator used for profiling.
+       source_passages [(label, text)] from the course material ground the assignment in what was taught."""
+    input_generator_section = _INPUT_GENERATOR_SECTION if is_profiled_topic(topic) else ""
+    material_section = ""
+    if source_passages:
+        material_section = ("\nBase the problem on the course material below: use its terminology, notation and examples where they fit.\n\n"
+                            + "\n\n".join(f"[{label}] {text}" for label, text in source_passages) + "\n")
     return f"""Create a high-quality coding assignment about {topic} for a {difficulty.lower()} level student that can be completed in approximately {time_limit} minutes.
-
+{material_section}
 Please format your response EXACTLY as follows, including the ```python and ``` markers for code blocks:
 
 <title>
@@ -61,6 +100,69 @@ Output: 6
 1. Correctness: Does the code produce the expected output for various test cases?
 2. Adherence to requirements: Does the solution meet all specified requirements?
 </evaluation_criteria>
+
+<graded_hints>
+<hint level="1">[A gentle nudge: which concept or data structure to think about. No code.]</hint>
+<hint level="2">[The overall approach in a few steps, still without code.]</hint>
+<hint level="3">[A near-complete outline of the algorithm, e.g. pseudocode, for students who are stuck.]</hint>
+</graded_hints>
+
+<reference_solution>
+```python
+[A complete, correct solution that uses exactly the same function/class names and signatures as the code template. It must pass every test below.]
+```
+</reference_solution>
+
+<tests>
+```python
+# 4-8 deterministic pytest-style test functions. Each test calls the functions/classes from the code template directly
+# and checks the result with assert. No input(), no printing, no randomness, no files or network.
+def test_basic_case():
+    assert solve_problem([1, 2, 3]) == 6
+
+def test_empty_input():
+    assert solve_problem([]) == 0
+```
+</tests>
+{input_generator_section}"""
+
+def parse_graded_hints(response: str) -> List[str]:
+    """Hints ordered from gentlest to most specific; empty if the section is missing."""
+    section = re.search(r'<graded_hints>(.*?)</graded_hints>', response or "", re.DOTALL | re.IGNORECASE)
+    if not section:
+        return []
+    hints = re.findall(r'<hint(?:\s+level="?(\d+)"?)?\s*>(.*?)</hint>', section.group(1), re.DOTALL | re.IGNORECASE)
+    ordered = sorted(enumerate(hints), key=lambda item: (int(item[1][0]) if item[1][0] else item[0] + 1, item[0]))
+    return [text.strip() for _, (_, text) in ordered if text.strip()]
+
+def generate_reference_material_prompt(title: str, requirements: str, code_template: str, expected_output: str) -> str:
+    """Prompt for the reference solution and graded hints of an assignment that lacks them."""
+    return f"""You are preparing grading material for the coding assignment "{title}".
+
+ASSIGNMENT REQUIREMENTS:
+{requirements}
+
+CODE TEMPLATE GIVEN TO STUDENTS:
+```python
+{code_template}
+```
+
+EXPECTED OUTPUT / BEHAVIOR:
+{expected_output}
+
+Format your response EXACTLY as follows:
+
+<reference_solution>
+```python
+[A complete, correct solution that uses exactly the same function/class names and signatures as the code template.]
+```
+</reference_solution>
+
+<graded_hints>
+<hint level="1">[A gentle nudge: which concept or data structure to think about. No code.]</hint>
+<hint level="2">[The overall approach in a few steps, still without code.]</hint>
+<hint level="3">[A near-complete outline of the algorithm, e.g. pseudocode, for students who are stuck.]</hint>
+</graded_hints>
 """
 
 def parse_assignment_details(response: str) -> Dict[str, str]:
@@ -75,7 +177,11 @@ def parse_assignment_details(response: str) -> Dict[str, str]:
         "hints": r'<hints>(.*?)</hints>',
         "code_template": r'<code_template>(.*?)</code_template>',
         "expected_output": r'<expected_output>(.*?)</expected_output>',
-        "evaluation_criteria": r'<evaluation_criteria>(.*?)</evaluation_criteria>'
+        "evaluation_criteria": r'<evaluation_criteria>(.*?)</evaluation_criteria>',
+        "reference_solution": r'<reference_solution>(.*?)</reference_solution>',
+        "tests": r'<tests>(.*?)</tests>',
+        "graded_hints": r'<graded_hints>(.*?)</graded_hints>',
+        "input_generator": r'<input_generator>(.*?)</input_generator>'
     }
     
     parsed_content = {}
@@ -100,12 +206,71 @@ def parse_assignment_details(response: str) -> Dict[str, str]:
         parsed_content["expected_output_content"] = parsed_content["expected_output"]
     else:
         parsed_content["expected_output_content"] = "# No expected output provided."
+
+    parsed_content["graded_hints_list"] = parse_graded_hints(response)
+
+    # Executable parts used for objective grading; empty when the model left them out
+    for key in ("reference_solution", "tests", "input_generator"):
+        section = re.search(sections[key], response, re.DOTALL | re.IGNORECASE)
+        code_match = re.search(r'```(?:python)?\s*(.*?)\s*```', section.group(1), re.DOTALL) if section else None
+        parsed_content[f"{key}_content"] = code_match.group(1).strip() if code_match else (section.group(1).strip() if section else "")
         
     return parsed_content
 
+REQUIRED_ASSIGNMENT_SECTIONS = ("title", "requirements", "code_template")
+
+def assignment_parse_errors(parsed_content: Dict[str, str]) -> List[str]:
+    """Required sections that are missing from a parsed assignment (empty list if it is usable)."""
+    if not parsed_content:
+        return ["empty response"]
+    missing = [key for key in REQUIRED_ASSIGNMENT_SECTIONS
+               if not parsed_content.get(key) or parsed_content[key].startswith(f"<{key}> section not found")]
+    if "code_template" not in missing and parsed_content.get("code_template_content", "").startswith("# Error parsing"):
+        missing.append("code_template")
+    return missing
+
 # This prompt is for LLM to evaluate submitted code
-def generate_code_evaluation_prompt(code: str, requirements: str, expected_output: str) -> str:
-    """Generate the prompt for LLM code evaluation."""
+def generate_code_evaluation_prompt(code: str, requirements: str, expected_output: str, execution_report: str = "",
+                                    static_report: str = "", reference_solution: str = "") -> str:
+    """Generate the prompt for LLM code evaluation.
+       execution_report is the result of actually running the code locally (see code_execution_service),
+       static_report the findings of the local static pre-pass (see static_analysis_service).
+       With a stored reference_solution the prompt is shorter: the model compares against the
+       reference instead of working out a solution from the expected output."""
+    execution_section = f"""
+LOCAL EXECUTION RESULT (the code was actually run; trust this over your own reasoning about what it prints):
+{execution_report}
+""" if execution_report else ""
+    static_section = f"""
+STATIC ANALYSIS (already checked locally; confirm rather than re-derive these, and focus on logic and correctness):
+{static_report}
+""" if static_report else ""
+    if reference_solution:
+        return f"""Evaluate a student's Python solution to a coding assignment by comparing it with a known-correct reference solution.
+
+ASSIGNMENT REQUIREMENTS:
+{requirements}
+
+REFERENCE SOLUTION (correct; use it to judge correctness instead of solving the problem yourself; other correct approaches are fine):
+```python
+{reference_solution}
+```
+
+STUDENT CODE:
+```python
+{code}
+```
+{execution_section}{static_section}
+Judge functionality and correctness against the requirements and the reference, point out concrete bugs, and give specific, concise suggestions for improvement.
+
+<verdict>Yes / No / Partially</verdict>
+<analysis>
+[Functionality, bugs and correctness.]
+</analysis>
+<improvements>
+[Specific suggestions for improvement.]
+</improvements>
+"""
     return f"""Please evaluate the following Python code solution for a coding assignment. 
 
 ASSIGNMENT REQUIREMENTS:
@@ -118,7 +283,7 @@ PYTHON CODE TO EVALUATE:
 ```python
 {code}
 ```
-
+{execution_section}{static_section}
 Provide a comprehensive review. Address the following points clearly:
 1.  **Functionality**: Does the code work as expected based on the requirements? Does it produce the correct output?
 2.  **Bugs/Errors**: Identify any syntax errors, runtime errors, or logical bugs.
@@ -149,4 +314,22 @@ def parse_code_evaluation(evaluation: str) -> Dict[str, str]:
         "verdict": verdict_match.group(1).strip() if verdict_match else "Unknown",
         "analysis": analysis_match.group(1).strip() if analysis_match else "Analysis not found or format error.",
         "improvements": improvements_match.group(1).strip() if improvements_match else "No specific improvements suggested or format error."
-    } 
\ No newline at end of file
+    }
+
+EVALUATION_SECTIONS = ("verdict", "analysis", "improvements")
+
+def parse_partial_code_evaluation(evaluation: str) -> Dict[str, str]:
+    """Sections of a code evaluation that is still being generated: every section whose opening tag
+       has arrived, with the text received so far (a closing tag ends it)."""
+    partial = {}
+    for key in EVALUATION_SECTIONS:
+        start = re.search(f'<{key}>', evaluation, re.IGNORECASE)
+        if not start:
+            continue
+        rest = evaluation[start.end():]
+        end = re.search(f'</{key}>', rest, re.IGNORECASE)
+        text = rest[:end.start()] if end else rest
+        # Hide a closing tag that has only partially arrived
+        text = re.sub(r'</?[a-zA-Z]*$', '', text)
+        partial[key] = text.strip()
+    return partial
@@ -0,0 +1,418 @@
+import ast
+import json
+from dataclasses import dataclass, field
+from typing import List, Dict, Any, Tuple, Optional
+from services.code_execution_service import run_code, ExecutionResult, EXEC_WALL_SECONDS, EXEC_MAX_OUTPUT_CHARS
+
+# The submitted code never runs in the process that runs the tests and writes the report. The harness starts
+# it in a child interpreter (as a module named `solution`, so its `if __name__ == '__main__':` demo block is
+# skipped) and the tests reach it through proxies: calls, attribute access and the common container protocols
+# are forwarded to the child, and only plain data (None, bool, int, float, str, bytes, complex and lists,
+# tuples, dicts and sets of them) comes back by value; anything else stays in the child behind a reference.
+# The report is the only thing the harness writes to its stdout, which the child does not share; the child's
+# output is relayed inside it. A solution can therefore neither patch the test machinery nor print a result.
+_SOLUTION_PROCESS_SOURCE = r"""
+import io, json, os, sys, types
+
+requests = os.fdopen(os.dup(0), "r", encoding="utf-8")
+replies = os.fdopen(os.dup(1), "w", encoding="utf-8")
+devnull = os.open(os.devnull, os.O_RDWR)
+os.dup2(devnull, 0)
+os.dup2(2, 1)  # raw writes to fd 1 go to stderr; print() output is captured and relayed
+sys.stdin = io.StringIO("")
+sys.stdout = captured = io.StringIO()
+objects, refs = {}, {}
+
+def ref(value):
+    if id(value) not in refs:
+        refs[id(value)] = len(objects)
+        objects[len(objects)] = value
+    return refs[id(value)]
+
+def encode(value):
+    kind = type(value)
+    if value is None or kind in (bool, int, float, str):
+        return value
+    if kind in (list, tuple, set, frozenset):
+        return [kind.__name__, [encode(x) for x in value]]
+    if kind is dict:
+        return ["dict", [[encode(k), encode(x)] for k, x in value.items()]]
+    if kind is bytes:
+        return ["bytes", value.hex()]
+    if kind is complex:
+        return ["complex", value.real, value.imag]
+    return ["ref", ref(value), kind.__name__]
+
+def decode(value):
+    if not isinstance(value, list):
+        return value
+    tag, items = value[0], value[1]
+    if tag == "ref":
+        return objects[items]
+    if tag == "dict":
+        return {decode(k): decode(x) for k, x in items}
+    if tag == "bytes":
+        return bytes.fromhex(items)
+    if tag == "complex":
+        return complex(items, value[2])
+    return {"list": list, "tuple": tuple, "set": set, "frozenset": frozenset}[tag](decode(x) for x in items)
+
+def load(source):
+    module = types.ModuleType("solution")
+    module.__file__ = "solution.py"
+    sys.modules["solution"] = module
+    exec(compile(source, "solution.py", "exec"), module.__dict__)
+    public = getattr(module, "__all__", None) or [n for n in vars(module) if not n.startswith("_")]
+    return {n: getattr(module, n) for n in public if hasattr(module, n)}
+
+OPERATIONS = {
+    "getattr": getattr, "setattr": setattr, "len": len, "iter": list, "bool": bool, "repr": repr, "str": str,
+    "hash": hash, "getitem": lambda o, k: o[k], "contains": lambda o, k: k in o, "eq": lambda a, b: a == b,
+    "setitem": lambda o, k, v: o.__setitem__(k, v), "delitem": lambda o, k: o.__delitem__(k),
+}
+
+for line in requests:
+    request = json.loads(line)
+    reply = {}
+    try:
+        if request["op"] == "load":
+            reply["value"] = encode(load(request["source"]))
+        else:
+            args = [decode(a) for a in request["args"]]
+            if request["op"] == "call":
+                kwargs = {k: decode(v) for k, v in request["kwargs"].items()}
+                reply["value"] = encode(decode(request["target"])(*args, **kwargs))
+                # Lists, dicts and sets passed by value may have been changed in place
+                reply["mutated"] = [[i, encode(a)] for i, a in enumerate(args) if type(a) in (list, dict, set)]
+            else:
+                reply["value"] = encode(OPERATIONS[request["op"]](decode(request["target"]), *args))
+    except BaseException as e:
+        reply = {"error": [type(e).__name__, str(e)]}
+    reply["out"] = captured.getvalue()
+    captured.seek(0)
+    captured.truncate()
+    replies.write(json.dumps(reply) + "\n")
+    replies.flush()
+"""
+
+# Runs the tests against the proxies. `assert a == b` / `a != b` statements are rewritten to also require
+# both sides to have the same type, element by element, so a proxy never passes for plain data.
+_HARNESS_SOURCE = r"""
+import ast as _ast, builtins as _builtins, io as _io, json as _json, subprocess as _subprocess, sys as _sys
+import time as _time, traceback as _traceback, types as _types
+_type, _isinstance, _len, _zip, _str = type, isinstance, len, zip, str
+_NUMBERS = (int, float, complex)
+_report_stream, _dumps = _sys.stdout, _json.dumps
+
+try:  # Linux: the solution process (same user) may not read this process's memory or file descriptors
+    import ctypes as _ctypes
+    _ctypes.CDLL(None).prctl(4, 0, 0, 0, 0)  # PR_SET_DUMPABLE, 0
+except Exception:
+    pass
+
+class _Remote:
+    # A value that lives in the solution process
+    __slots__ = ("_ref", "_type_name")
+
+    def __init__(self, ref, type_name):
+        object.__setattr__(self, "_ref", ref)
+        object.__setattr__(self, "_type_name", type_name)
+
+    def __getattr__(self, name):
+        return _request("getattr", self, name)
+
+    def __setattr__(self, name, value):
+        _request("setattr", self, name, value)
+
+    def __call__(self, *args, **kwargs):
+        return _request("call", self, *args, **kwargs)
+
+    def __len__(self):
+        return _expect(int, _request("len", self))
+
+    def __iter__(self):
+        return iter(_expect(list, _request("iter", self)))
+
+    def __getitem__(self, key):
+        return _request("getitem", self, key)
+
+    def __setitem__(self, key, value):
+        _request("setitem", self, key, value)
+
+    def __delitem__(self, key):
+        _request("delitem", self, key)
+
+    def __contains__(self, item):
+        return _expect(bool, _request("contains", self, item))
+
+    def __bool__(self):
+        return _expect(bool, _request("bool", self))
+
+    def __repr__(self):
+        return _expect(str, _request("repr", self))
+
+    def __str__(self):
+        return _expect(str, _request("str", self))
+
+    def __hash__(self):
+        return _expect(int, _request("hash", self))
+
+    def __eq__(self, other):
+        # Two values of the solution compare as the solution says; anything else only by identity
+        return _expect(bool, _request("eq", self, other)) if _type(other) is _Remote else self is other
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+_child = _subprocess.Popen([_sys.executable, "-I", "-c", _SOLUTION_PROCESS_SOURCE], stdin=_subprocess.PIPE,
+                           stdout=_subprocess.PIPE, encoding="utf-8", errors="replace")
+_output = _io.StringIO()
+_proxies = {}
+
+def _expect(kind, value):
+    if _type(value) is not kind:
+        raise TypeError(f"the solution returned {_type_name(value)} where {kind.__name__} was expected")
+    return value
+
+def _type_name(value):
+    return value._type_name if _type(value) is _Remote else _type(value).__name__
+
+def _encode(value):
+    kind = _type(value)
+    if value is None or kind in (bool, int, float, str):
+        return value
+    if kind in (list, tuple, set, frozenset):
+        return [kind.__name__, [_encode(x) for x in value]]
+    if kind is dict:
+        return ["dict", [[_encode(k), _encode(x)] for k, x in value.items()]]
+    if kind is bytes:
+        return ["bytes", value.hex()]
+    if kind is complex:
+        return ["complex", value.real, value.imag]
+    if kind is _Remote:
+        return ["ref", value._ref]
+    raise TypeError(f"a {kind.__name__} cannot be passed to the solution")
+
+def _decode(value):
+    # Replies are untrusted: only builtin data and references are ever built from them
+    kind = _type(value)
+    if value is None or kind in (bool, int, float, str):
+        return value
+    if kind is list and _len(value) >= 2:
+        tag, items = value[0], value[1]
+        if tag == "ref" and _type(items) is int and _len(value) == 3 and _type(value[2]) is str:
+            if items not in _proxies:
+                _proxies[items] = _Remote(items, value[2])
+            return _proxies[items]
+        if tag == "bytes" and _type(items) is str:
+            return bytes.fromhex(items)
+        if tag == "complex" and _type(items) is float and _len(value) == 3 and _type(value[2]) is float:
+            return complex(items, value[2])
+        if _type(items) is list:
+            if tag == "dict" and _all_pairs(items):
+                return {_decode(k): _decode(x) for k, x in items}
+            containers = {"list": list, "tuple": tuple, "set": set, "frozenset": frozenset}
+            if tag in containers:
+                return containers[tag](_decode(x) for x in items)
+    raise ValueError("malformed reply from the solution process")
+
+def _all_pairs(items):
+    return all(_type(p) is list and _len(p) == 2 for p in items)
+
+def _remote_error(name, message):
+    cls = getattr(_builtins, name, None)
+    if not (_isinstance(cls, type) and issubclass(cls, Exception)):
+        cls = _type(name, (Exception,), {})
+    try:
+        return cls(message)
+    except Exception:
+        return _type(name, (Exception,), {})(message)
+
+def _request(op, target, /, *args, **kwargs):
+    return _exchange({"op": op, "target": _encode(target), "args": [_encode(a) for a in args],
+                      "kwargs": {k: _encode(v) for k, v in kwargs.items()}}, args)
+
+def _exchange(message, args=()):
+    try:
+        _child.stdin.write(_dumps(message) + "\n")
+        _child.stdin.flush()
+    except OSError:
+        raise ConnectionError("the solution process exited") from None
+    line = _child.stdout.readline()
+    if not line:
+        raise ConnectionError("the solution process exited")
+    reply = _json.loads(line)
+    if _type(reply) is not dict:
+        raise ValueError("malformed reply from the solution process")
+    if _type(reply.get("out")) is str:
+        _output.write(reply["out"])
+    if "error" in reply:
+        error = reply["error"]
+        if not (_type(error) is list and _len(error) == 2 and _type(error[0]) is str and _type(error[1]) is str):
+            raise ValueError("malformed reply from the solution process")
+        raise _remote_error(error[0], error[1])
+    value = _decode(reply.get("value"))
+    mutated = reply.get("mutated")
+    for item in mutated if _type(mutated) is list else []:
+        if _type(item) is list and _len(item) == 2 and _type(item[0]) is int and 0 <= item[0] < _len(args):
+            original, changed = args[item[0]], _decode(item[1])
+            if _type(original) is _type(changed) is list:
+                original[:] = changed
+            elif _type(original) is _type(changed) and _type(original) in (dict, set):
+                original.clear()
+                original.update(changed)
+    return value
+
+def _check_types(a, b):
+    if _isinstance(a, _NUMBERS) and _isinstance(b, _NUMBERS) and _type(a) is not bool and _type(b) is not bool:
+        return
+    if _type(a) is not _type(b) or (_type(a) is _Remote and a._type_name != b._type_name):
+        raise AssertionError(f"type mismatch: {_type_name(a)} compared with {_type_name(b)}")
+    if _type(a) in (list, tuple):
+        if _len(a) == _len(b):
+            for x, y in _zip(a, b):
+                _check_types(x, y)
+    elif _type(a) is dict:
+        for key in a:
+            if key in b:
+                _check_types(a[key], b[key])
+
+def _checked_eq(a, b):
+    _check_types(a, b)
+    return a == b
+
+def _checked_ne(a, b):
+    _check_types(a, b)
+    return a != b
+
+class _CheckedAsserts(_ast.NodeTransformer):
+    def visit_Assert(self, node):
+        test = node.test
+        if _isinstance(test, _ast.Compare) and _len(test.ops) == 1 and _isinstance(test.ops[0], (_ast.Eq, _ast.NotEq)):
+            helper = "_checked_eq" if _isinstance(test.ops[0], _ast.Eq) else "_checked_ne"
+            node.test = _ast.copy_location(_ast.Call(_ast.Name(helper, _ast.Load()), [test.left, test.comparators[0]], []), test)
+        return node
+
+def _truncate(text, limit):
+    return text if _len(text) <= limit else text[:limit] + " ..."
+
+_sys.stdout = _output  # print() in the tests goes to the relayed output, never to the report stream
+_tests_tree = _ast.fix_missing_locations(_CheckedAsserts().visit(_ast.parse(_TESTS, "tests.py")))
+_cases = []
+try:
+    _public = _exchange({"op": "load", "source": _SOLUTION})
+    _solution = _types.ModuleType("solution")
+    _solution.__dict__.update(_public)
+    _sys.modules["solution"] = _solution
+    _test_ns = {"__name__": "tests", "_checked_eq": _checked_eq, "_checked_ne": _checked_ne}
+    _test_ns.update(_public)
+    exec(compile(_tests_tree, "tests.py", "exec"), _test_ns)
+    _test_lines = _TESTS.splitlines()
+    for _name in _TEST_NAMES:
+        _fn = _test_ns.get(_name)
+        _start = _time.perf_counter()
+        try:
+            _fn()
+            _cases.append({"name": _name, "passed": True, "message": ""})
+        except AssertionError as _e:
+            # Without a message, show the failing assert line itself
+            _frames = [f for f in _traceback.extract_tb(_e.__traceback__) if f.filename == "tests.py"]
+            _line = _test_lines[_frames[-1].lineno - 1].strip() if _frames and _frames[-1].lineno <= _len(_test_lines) else ""
+            _cases.append({"name": _name, "passed": False, "message": "AssertionError: " + _truncate(_str(_e) or _line, 300)})
+        except Exception as _e:
+            _cases.append({"name": _name, "passed": False, "message": _type(_e).__name__ + ": " + _truncate(_str(_e), 300)})
+        _cases[-1]["time_ms"] = round((_time.perf_counter() - _start) * 1000, 3)
+finally:
+    _child.kill()
+    _child.wait()
+    _sys.stdout = _report_stream
+_report = _dumps({"cases": _cases})
+_report_stream.write(_dumps({"cases": _cases, "stdout": _truncate(_output.getvalue(), max(0, _OUTPUT_BUDGET - _len(_report)))}))
+_report_stream.flush()
+"""
+
+@dataclass
+class TestRunResult:
+    cases: List[Dict[str, Any]] = field(default_factory=list)  # {name, passed, message, time_ms}
+    execution: Optional[ExecutionResult] = None
+
+    @property
+    def total(self) -> int:
+        return len(self.cases)
+
+    @property
+    def passed(self) -> int:
+        return sum(1 for c in self.cases if c.get("passed"))
+
+    @property
+    def score(self) -> float:
+        return (self.passed / self.total) * 100 if self.total else 0.0
+
+def run_tests(code: str, tests: str, wall_seconds: float = EXEC_WALL_SECONDS) -> TestRunResult:
+    """Runs assert-based test functions against the code in the sandbox."""
+    test_names = list_test_names(tests)
+    program = (f"_SOLUTION, _TESTS, _TEST_NAMES = {code or ''!r}, {tests or ''!r}, {test_names!r}\n"
+               f"_SOLUTION_PROCESS_SOURCE, _OUTPUT_BUDGET = {_SOLUTION_PROCESS_SOURCE!r}, {EXEC_MAX_OUTPUT_CHARS - 200}\n"
+               + _HARNESS_SOURCE)
+    execution = run_code(program, wall_seconds=wall_seconds)
+    cases: List[Dict[str, Any]] = []
+    try:
+        report = json.loads(execution.stdout)
+    except ValueError:
+        report = None
+    if isinstance(report, dict):
+        # Only the tests of the assignment count
+        cases = [c for c in report.get("cases") or [] if isinstance(c, dict) and c.get("name") in test_names]
+        # The harness report is hidden from the student-visible output
+        execution.stdout = str(report.get("stdout", ""))
+    return TestRunResult(cases=cases, execution=execution)
+
+def list_test_names(tests: str) -> List[str]:
+    """Names of the top-level test_* functions in a tests source."""
+    try:
+        tree = ast.parse(tests or "")
+    except SyntaxError:
+        return []
+    return [n.name for n in tree.body if isinstance(n, ast.FunctionDef) and n.name.startswith("test_")]
+
+def filter_tests_source(tests: str, keep_names: List[str]) -> str:
+    """Drops the test_* functions not in keep_names, keeping imports and helpers."""
+    tree = ast.parse(tests)
+    tree.body = [
+        n for n in tree.body
+        if not (isinstance(n, ast.FunctionDef) and n.name.startswith("test_") and n.name not in keep_names)
+    ]
+    return ast.unparse(tree)
+
+def validate_assignment_tests(reference_solution: str, tests: str) -> Tuple[str, bool, str]:
+    """Runs the generated tests against the generated reference solution.
+       Tests the reference fails are assumed to be wrong and removed.
+       Returns (validated tests source, whether any test survived, human readable summary)."""
+    if not reference_solution or not tests:
+        return "", False, "No reference solution or tests were generated."
+    if not list_test_names(tests):
+        return "", False, "The generated tests could not be parsed."
+    result = run_tests(reference_solution, tests)
+    if not result.cases:
+        reason = result.execution.exception if result.execution and result.execution.exception else "no tests ran"
+        return "", False, f"The reference solution could not be tested ({reason})."
+    passing = [c["name"] for c in result.cases if c.get("passed")]
+    if not passing:
+        return "", False, "The reference solution failed every generated test."
+    dropped = result.total - len(passing)
+    summary = f"{len(passing)} test(s) validated against the reference solution"
+    if dropped:
+        summary += f"; {dropped} inconsistent test(s) dropped"
+    return filter_tests_source(tests, passing), True, summary + "."
+
+def format_test_report(result: TestRunResult) -> str:
+    """Short plain-text summary of a test run, suitable for an LLM prompt."""
+    if not result.cases:
+        reason = result.execution.exception if result.execution and result.execution.exception else "no tests ran"
+        return f"Automated tests: could not run ({reason})."
+    lines = [f"Automated tests: {result.passed}/{result.total} passed ({result.score:.0f}%)."]
+    for case in result.cases:
+        status = "PASS" if case.get("passed") else "FAIL"
+        message = f" - {case.get('message')}" if case.get("message") else ""
+        lines.append(f"  [{status}] {case.get('name')}{message}")
+    return "\n".join(lines)
@@ -0,0 +1,82 @@
+import streamlit as st
+import os
+import json
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import List, Dict, Any, Optional
+from services.code_evaluation_service import evaluate_submission
+
+# Submissions evaluated at the same time; LLM calls are additionally bounded by the llm_service rate limiter
+BULK_EVAL_MAX_WORKERS = int(os.environ.get("BULK_EVAL_MAX_WORKERS", "8"))
+
+@dataclass
+class BulkEvaluationJob:
+    assignment_id: str
+    total: int
+    started_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+    # submission id -> {"student_id", "status": "done"/"failed", "evaluation", "score", "elapsed"}
+    results: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    @property
+    def completed(self) -> int:
+        with self.lock:
+            return len(self.results)
+
+    @property
+    def done(self) -> bool:
+        return self.completed >= self.total
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        with self.lock:
+            return dict(self.results)
+
+@st.cache_resource
+def _get_bulk_evaluation_state():
+    """Process-wide job registry and worker pool, so jobs survive reruns and page switches."""
+    return {"jobs": {}, "executor": ThreadPoolExecutor(max_workers=BULK_EVAL_MAX_WORKERS, thread_name_prefix="bulk-eval")}
+
+def get_bulk_evaluation_job(assignment_id: str) -> Optional[BulkEvaluationJob]:
+    return _get_bulk_evaluation_state()["jobs"].get(assignment_id)
+
+def _evaluate_one(job: BulkEvaluationJob, submission: Dict[str, Any], assignment_details: Dict[str, Any],
+                  model_name: Optional[str], use_cache: bool = True):
+    # Imported here: db_utils pulls in Supabase, which the pure evaluation pipeline does not need
+    from db_utils import update_assignment_submission_evaluation
+    start = time.perf_counter()
+    try:
+        evaluation, checks = evaluate_submission(submission.get("code") or "", assignment_details, model_name=model_name, use_cache=use_cache)
+        if evaluation:
+            update_assignment_submission_evaluation(submission["id"], json.dumps(evaluation), checks.score)
+        entry = {"status": "done" if evaluation else "failed", "evaluation": evaluation, "score": checks.score}
+    except Exception as e:
+        print(f"Bulk evaluation of submission {submission.get('id')} failed: {e}")
+        entry = {"status": "failed", "evaluation": {}, "score": None}
+    entry["student_id"] = submission.get("student_id")
+    entry["elapsed"] = time.perf_counter() - start
+    with job.lock:
+        job.results[str(submission["id"])] = entry
+        if len(job.results) >= job.total:
+            job.finished_at = time.time()
+
+def start_bulk_evaluation(assignment_details: Dict[str, Any], submissions: List[Dict[str, Any]],
+                          only_unevaluated: bool = True, model_name: Optional[str] = None) -> Optional[BulkEvaluationJob]:
+    """Evaluates every submission of an assignment on the shared worker pool and stores each result
+       in assignment_submissions.evaluation as it finishes. Returns the running job if one already exists.
+       Re-evaluating everything (only_unevaluated=False) bypasses the evaluation cache."""
+    assignment_id = assignment_details["id"]
+    state = _get_bulk_evaluation_state()
+    existing = state["jobs"].get(assignment_id)
+    if existing and not existing.done:
+        return existing
+    pending = [s for s in submissions if not (only_unevaluated and s.get("evaluation"))]
+    if not pending:
+        return None
+    job = BulkEvaluationJob(assignment_id=assignment_id, total=len(pending))
+    state["jobs"][assignment_id] = job
+    for submission in pending:
+        state["executor"].submit(_evaluate_one, job, submission, assignment_details, model_name, only_unevaluated)
+    return job
@@ -0,0 +1,161 @@
+from dataclasses import dataclass
+from typing import List, Dict, Any, Optional, Tuple, Iterator
+from services.code_execution_service import run_code, submit_sandboxed, format_execution_report, ExecutionResult
+from services.assignment_test_service import run_tests, format_test_report, list_test_names, TestRunResult
+from services.static_analysis_service import analyze_code, format_static_report, static_analysis_evaluation, StaticAnalysisResult
+from services.profiling_service import (
+    ProfileResult, profile_code, profile_entry_point, load_reference_profile, format_profile_report
+)
+from services.assignment_processing_service import generate_code_evaluation_prompt, parse_code_evaluation, parse_partial_code_evaluation
+from services.llm_service import generate_content, stream_content
+from services.reference_material_service import usable_reference_solution
+from services.code_fingerprint_service import (
+    code_fingerprint, is_unmodified_template, unmodified_template_evaluation,
+    get_shared_cached_evaluation, set_shared_cached_evaluation, is_cacheable_evaluation
+)
+
+@dataclass
+class LocalCheckResult:
+    execution: ExecutionResult
+    tests: Optional[TestRunResult] = None
+    analysis: Optional[StaticAnalysisResult] = None
+    profile: Optional[ProfileResult] = None             # measured on growing inputs (algorithm topics only)
+    reference_profile: Optional[ProfileResult] = None
+
+    @property
+    def score(self) -> Optional[float]:
+        """Objective score from the assignment tests, if the assignment has any."""
+        return self.tests.score if self.tests and self.tests.total else None
+
+def build_execution_report(checks: LocalCheckResult) -> str:
+    """Local run (and test results, if the assignment has tests) as text for the evaluation prompt."""
+    report = format_execution_report(checks.execution)
+    if checks.tests is not None:
+        report += "\n\n" + format_test_report(checks.tests)
+    if checks.profile is not None:
+        report += "\n\n" + format_profile_report(checks.profile, checks.reference_profile)
+    return report
+
+def run_local_checks(code: str, assignment_details: Dict[str, Any]) -> LocalCheckResult:
+    """Static pre-pass, then the sandboxed run plus the assignment's stored tests and, for assignments
+       with an input generator, a performance profile against the reference solution.
+       Code with fatal static problems is not executed; its tests are recorded as failed."""
+    analysis = analyze_code(code, assignment_details.get('code_template', ''))
+    tests_source = assignment_details.get("tests")
+    if analysis.fatal:
+        reason = f"SyntaxError: {analysis.syntax_error}" if analysis.syntax_error else "Not run: " + (
+            f"missing definitions {', '.join(analysis.missing_definitions)}" if analysis.missing_definitions else "nothing implemented")
+        execution = ExecutionResult(exception=reason)
+        tests = TestRunResult(cases=[{"name": name, "passed": False, "message": reason, "time_ms": 0.0}
+                                     for name in list_test_names(tests_source)]) if tests_source else None
+        return LocalCheckResult(execution=execution, tests=tests, analysis=analysis)
+    # Tests and profiling run in their own sandboxes, in parallel with the plain run
+    tests_future = submit_sandboxed(run_tests, code, tests_source) if tests_source else None
+    input_generator = assignment_details.get("input_generator")
+    reference_profile = load_reference_profile(assignment_details) if input_generator else None
+    profile_futures = {}
+    if input_generator:
+        entry_point = profile_entry_point(assignment_details.get('code_template', ''))
+        profile_futures["profile"] = submit_sandboxed(profile_code, code, input_generator, entry_point)
+        if reference_profile is None and assignment_details.get("reference_solution"):
+            profile_futures["reference"] = submit_sandboxed(profile_code, assignment_details["reference_solution"], input_generator, entry_point)
+    execution = run_code(code)
+    checks = LocalCheckResult(execution=execution, tests=tests_future.result() if tests_future else None, analysis=analysis)
+    if profile_futures:
+        checks.profile = profile_futures["profile"].result()
+        checks.reference_profile = profile_futures["reference"].result() if "reference" in profile_futures else reference_profile
+    return checks
+
+def get_cached_evaluation(fingerprint: str) -> Optional[Dict[str, str]]:
+    """Shared app cache first, then the evaluation_cache table."""
+    cached = get_shared_cached_evaluation(fingerprint)
+    if cached is None:
+        # Imported here: db_utils pulls in Supabase, which the pure evaluation pipeline does not need
+        from db_utils import get_cached_evaluation as get_stored_evaluation
+        cached = get_stored_evaluation(fingerprint)
+        if not is_cacheable_evaluation(cached):
+            return None
+        set_shared_cached_evaluation(fingerprint, cached)
+    return dict(cached)
+
+def store_cached_evaluation(fingerprint: str, assignment_id: str, evaluation: Dict[str, str]):
+    from db_utils import save_cached_evaluation
+    set_shared_cached_evaluation(fingerprint, dict(evaluation))
+    save_cached_evaluation(fingerprint, assignment_id, evaluation)
+
+def _with_performance(evaluation: Dict[str, str], checks: Optional[LocalCheckResult]) -> Dict[str, str]:
+    """Adds the measured performance profile to the feedback; it is not cached, timings are per run."""
+    if evaluation and checks and checks.profile is not None:
+        evaluation = dict(evaluation, performance=format_profile_report(checks.profile, checks.reference_profile))
+    return evaluation
+
+def _prepare_evaluation(code: str, assignment_details: Dict[str, Any], checks: Optional[LocalCheckResult],
+                        use_cache: bool) -> Tuple[Optional[Dict[str, str]], str, Optional[str]]:
+    """Returns (evaluation answered without the LLM or None, LLM prompt, cache fingerprint)."""
+    if is_unmodified_template(code, assignment_details.get('code_template', '')):
+        return unmodified_template_evaluation(), "", None
+    analysis = checks.analysis if checks and checks.analysis else analyze_code(code, assignment_details.get('code_template', ''))
+    if analysis.fatal:
+        return static_analysis_evaluation(analysis), "", None
+    assignment_id = assignment_details.get('id')
+    fingerprint = code_fingerprint(code, assignment_id, assignment_details.get('code_template', '')) if assignment_id else None
+    if fingerprint and use_cache:
+        cached = get_cached_evaluation(fingerprint)
+        if cached:
+            return _with_performance(cached, checks), "", fingerprint
+
+    prompt = generate_code_evaluation_prompt(
+        code,
+        assignment_details.get('requirements', ''),
+        assignment_details.get('expected_output', ''),
+        execution_report=build_execution_report(checks) if checks else "",
+        static_report=format_static_report(analysis),
+        reference_solution=usable_reference_solution(assignment_details)
+    )
+    return None, prompt, fingerprint
+
+def _finish_evaluation(response: Optional[str], fingerprint: Optional[str], assignment_id: Optional[str],
+                       checks: Optional[LocalCheckResult]) -> Dict[str, str]:
+    evaluation = parse_code_evaluation(response) if response else {}
+    if fingerprint and is_cacheable_evaluation(evaluation):
+        store_cached_evaluation(fingerprint, assignment_id, evaluation)
+    return _with_performance(evaluation, checks)
+
+def evaluate_with_llm(code: str, assignment_details: Dict[str, Any], checks: Optional[LocalCheckResult] = None,
+                      show_spinner: bool = False, model_name: Optional[str] = None, use_cache: bool = True) -> Dict[str, str]:
+    """Asks the LLM for the verdict/analysis/improvements; returns {} if the LLM call failed.
+       Unmodified templates, code with fatal static problems and code already evaluated for this
+       assignment (same AST fingerprint) are answered without an LLM call.
+       use_cache=False forces a fresh evaluation (and refreshes the cache)."""
+    evaluation, prompt, fingerprint = _prepare_evaluation(code, assignment_details, checks, use_cache)
+    if evaluation is not None:
+        return evaluation
+    response = generate_content(prompt, show_spinner=show_spinner, model_name=model_name)
+    return _finish_evaluation(response, fingerprint, assignment_details.get('id'), checks)
+
+def stream_evaluation(code: str, assignment_details: Dict[str, Any], checks: Optional[LocalCheckResult] = None,
+                      model_name: Optional[str] = None, use_cache: bool = True) -> Iterator[Tuple[Dict[str, str], bool]]:
+    """Like evaluate_with_llm, but yields (sections received so far, done) while the model is generating.
+       The last item is (complete evaluation, True); the evaluation is {} if the LLM call failed or the
+       stream broke off."""
+    evaluation, prompt, fingerprint = _prepare_evaluation(code, assignment_details, checks, use_cache)
+    if evaluation is not None:
+        yield evaluation, True
+        return
+    chunks: List[str] = []
+    try:
+        for chunk in stream_content(prompt, model_name=model_name):
+            chunks.append(chunk)
+            yield parse_partial_code_evaluation("".join(chunks)), False
+    except Exception:
+        # A dropped stream is a failed call: the truncated text is neither parsed nor cached
+        yield {}, True
+        return
+    yield _finish_evaluation("".join(chunks), fingerprint, assignment_details.get('id'), checks), True
+
+def evaluate_submission(code: str, assignment_details: Dict[str, Any], model_name: Optional[str] = None, use_cache: bool = True):
+    """Full evaluation pipeline without any UI: local checks, then the LLM.
+       Returns (parsed evaluation, LocalCheckResult)."""
+    checks = run_local_checks(code, assignment_details)
+    evaluation = evaluate_with_llm(code, assignment_details, checks, show_spinner=False, model_name=model_name, use_cache=use_cache)
+    return evaluation, checks
@@ -0,0 +1,245 @@
+import os
+import sys
+import json
+import signal
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, Future
+from dataclasses import dataclass
+from typing import List, Optional
+
+# Sandbox limits (all overridable from .env)
+EXEC_CPU_SECONDS = int(os.environ.get("EXEC_CPU_SECONDS", "5"))
+EXEC_WALL_SECONDS = float(os.environ.get("EXEC_WALL_SECONDS", "10"))
+EXEC_MEMORY_MB = int(os.environ.get("EXEC_MEMORY_MB", "256"))
+EXEC_MAX_OUTPUT_CHARS = int(os.environ.get("EXEC_MAX_OUTPUT_CHARS", "20000"))
+EXEC_MAX_WORKERS = int(os.environ.get("EXEC_MAX_WORKERS", str(os.cpu_count() or 2)))
+# Isolation: "bwrap" runs every program under bubblewrap (Linux) in its own user, network, PID and mount
+# namespaces; "none" runs the bare interpreter with only the resource limits, for trusted local development.
+# Without bwrap installed, submissions are not executed at all rather than run unisolated.
+EXEC_SANDBOX = os.environ.get("EXEC_SANDBOX", "bwrap").lower()
+EXEC_SANDBOX_UID = int(os.environ.get("EXEC_SANDBOX_UID", "65534"))  # "nobody" inside the sandbox
+
+# Inside the sandbox the program only sees the interpreter (read-only), these two files, a writable scratch
+# directory (its cwd) and an output directory for the report; the app directory, .env and home are not mounted.
+SANDBOX_ROOT = "/sandbox"
+_SANDBOX_ENV = {"PYTHONIOENCODING": "utf-8", "PYTHONDONTWRITEBYTECODE": "1", "PATH": "/usr/bin:/bin"}
+
+# Bootstrap executed by the child interpreter: lowers its own resource limits (hard limits, so the submitted
+# code cannot raise them again), runs the code and records the outcome in the report file.
+_RUNNER_SOURCE = r'''
+import sys, os, json, time, traceback
+
+_result_path, _solution_path = sys.argv[1], sys.argv[2]
+_cpu_seconds, _memory_mb = int(sys.argv[3]), int(sys.argv[4])
+try:
+    import resource
+    resource.setrlimit(resource.RLIMIT_CPU, (_cpu_seconds, _cpu_seconds + 1))
+    resource.setrlimit(resource.RLIMIT_AS, (_memory_mb * 1024 * 1024,) * 2)
+    resource.setrlimit(resource.RLIMIT_FSIZE, (10 * 1024 * 1024,) * 2)
+    resource.setrlimit(resource.RLIMIT_CORE, (0, 0))
+    resource.setrlimit(resource.RLIMIT_NOFILE, (64, 64))
+except ImportError:  # Windows: only the wall-clock timeout applies
+    resource = None
+
+with open(_solution_path, "r", encoding="utf-8") as f:
+    _source = f.read()
+
+_report = {"exception": None, "traceback": ""}
+_cpu_start = time.process_time()
+try:
+    exec(compile(_source, "solution.py", "exec"), {"__name__": "__main__", "__builtins__": __builtins__})
+except SystemExit as e:
+    if e.code not in (None, 0):
+        _report["exception"] = f"SystemExit: {e.code}"
+except BaseException as e:
+    _report["exception"] = f"{type(e).__name__}: {e}" if str(e) else type(e).__name__
+    _report["traceback"] = traceback.format_exc(limit=-5)
+_report["cpu_time"] = time.process_time() - _cpu_start
+_report["peak_memory_kb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss if resource else 0
+sys.stdout.flush()
+with open(_result_path, "w") as _result_file:
+    _result_file.write(json.dumps(_report))
+'''
+
+@dataclass
+class ExecutionResult:
+    stdout: str = ""
+    stderr: str = ""
+    exception: Optional[str] = None    # "ValueError: ..." raised by the submitted code
+    traceback: str = ""
+    return_code: Optional[int] = None
+    timed_out: bool = False
+    wall_time: float = 0.0             # seconds
+    cpu_time: float = 0.0              # seconds spent in the submitted code
+    peak_memory_kb: int = 0
+
+    @property
+    def ok(self) -> bool:
+        return not self.timed_out and self.exception is None and self.return_code == 0
+
+_bwrap_path: Optional[str] = None
+_bwrap_checked = False
+
+def _find_bwrap() -> Optional[str]:
+    global _bwrap_path, _bwrap_checked
+    if not _bwrap_checked:
+        _bwrap_path = shutil.which("bwrap") if os.name == "posix" else None
+        _bwrap_checked = True
+        if _bwrap_path is None:
+            print("bubblewrap (bwrap) is not installed: submitted code will not be executed. "
+                  "Install it, or set EXEC_SANDBOX=none on a trusted development machine.")
+    return _bwrap_path
+
+def _interpreter_mounts() -> List[str]:
+    """Read-only mounts for the interpreter and its standard library, at their host paths."""
+    args = ["--ro-bind", "/usr", "/usr"]
+    for path in ("/bin", "/sbin", "/lib", "/lib32", "/lib64"):
+        if os.path.islink(path):
+            args += ["--symlink", os.readlink(path), path]  # merged /usr layouts
+        elif os.path.isdir(path):
+            args += ["--ro-bind", path, path]
+    args += ["--ro-bind-try", "/etc/ld.so.cache", "/etc/ld.so.cache"]
+    prefixes = {os.path.realpath(p) for p in (sys.base_prefix, sys.prefix, os.path.dirname(os.path.dirname(os.path.realpath(sys.executable))))}
+    for prefix in sorted(prefixes):
+        if prefix != "/" and prefix != "/usr" and not prefix.startswith("/usr/"):
+            args += ["--ro-bind", prefix, prefix]
+    return args
+
+def _sandbox_command(bwrap: str, work_dir: str, scratch_dir: str, out_dir: str, cpu_seconds: int, memory_mb: int) -> List[str]:
+    """bubblewrap command line: no network, no other processes visible, all capabilities dropped, a fresh
+       filesystem view holding only the interpreter, the program and its scratch and output directories,
+       and an environment holding only _SANDBOX_ENV."""
+    command = [bwrap, "--unshare-all", "--unshare-user", "--uid", str(EXEC_SANDBOX_UID), "--gid", str(EXEC_SANDBOX_UID),
+               "--die-with-parent", "--new-session", "--cap-drop", "ALL", "--hostname", "sandbox"]
+    command += _interpreter_mounts()
+    command += ["--proc", "/proc", "--dev", "/dev", "--tmpfs", "/tmp", "--dir", SANDBOX_ROOT,
+                "--ro-bind", os.path.join(work_dir, "runner.py"), f"{SANDBOX_ROOT}/runner.py",
+                "--ro-bind", os.path.join(work_dir, "solution.py"), f"{SANDBOX_ROOT}/solution.py",
+                "--bind", out_dir, f"{SANDBOX_ROOT}/out",
+                "--bind", scratch_dir, f"{SANDBOX_ROOT}/scratch",
+                "--chdir", f"{SANDBOX_ROOT}/scratch", "--clearenv"]
+    for name, value in dict(_SANDBOX_ENV, HOME=f"{SANDBOX_ROOT}/scratch").items():
+        command += ["--setenv", name, value]
+    return command + ["--", os.path.realpath(sys.executable), "-I", f"{SANDBOX_ROOT}/runner.py",
+                      f"{SANDBOX_ROOT}/out/result.json", f"{SANDBOX_ROOT}/solution.py", str(cpu_seconds), str(memory_mb)]
+
+def _truncate(text: str) -> str:
+    if len(text) <= EXEC_MAX_OUTPUT_CHARS:
+        return text
+    return text[:EXEC_MAX_OUTPUT_CHARS] + f"\n... [output truncated, {len(text) - EXEC_MAX_OUTPUT_CHARS} more characters]"
+
+def run_code(code: str, stdin: str = "", cpu_seconds: int = EXEC_CPU_SECONDS, wall_seconds: float = EXEC_WALL_SECONDS,
+             memory_mb: int = EXEC_MEMORY_MB) -> ExecutionResult:
+    """Runs Python code in a separate interpreter under bubblewrap (see EXEC_SANDBOX), with CPU, memory
+       and wall-clock limits, no network, a scrubbed environment and a throwaway scratch directory as cwd."""
+    if EXEC_SANDBOX != "none" and _find_bwrap() is None:
+        return ExecutionResult(exception="SandboxError: no sandbox is available on the server, the code was not run")
+    work_dir = tempfile.mkdtemp(prefix="sandbox_")
+    scratch_dir = os.path.join(work_dir, "scratch")
+    out_dir = os.path.join(work_dir, "out")
+    os.makedirs(scratch_dir)
+    os.makedirs(out_dir)
+    runner_path = os.path.join(work_dir, "runner.py")
+    solution_path = os.path.join(work_dir, "solution.py")
+    result_path = os.path.join(out_dir, "result.json")
+    with open(runner_path, "w", encoding="utf-8") as f:
+        f.write(_RUNNER_SOURCE)
+    with open(solution_path, "w", encoding="utf-8") as f:
+        f.write(code or "")
+
+    if EXEC_SANDBOX == "none":
+        command = [sys.executable, "-I", runner_path, result_path, solution_path, str(cpu_seconds), str(memory_mb)]
+        cwd, env = scratch_dir, dict(_SANDBOX_ENV)
+    else:
+        command = _sandbox_command(_find_bwrap(), work_dir, scratch_dir, out_dir, cpu_seconds, memory_mb)
+        cwd, env = work_dir, {}
+    # A new session lets us kill the whole process group on timeout; no preexec_fn (unsafe with threads)
+    popen_kwargs = {"start_new_session": True} if os.name == "posix" else {}
+
+    result = ExecutionResult()
+    start = time.perf_counter()
+    try:
+        proc = subprocess.Popen(
+            command, cwd=cwd, env=env, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+            text=True, encoding="utf-8", errors="replace", **popen_kwargs
+        )
+        try:
+            stdout, stderr = proc.communicate(input=stdin, timeout=wall_seconds)
+        except subprocess.TimeoutExpired:
+            result.timed_out = True
+            if os.name == "posix":
+                try:
+                    os.killpg(proc.pid, signal.SIGKILL)
+                except ProcessLookupError:
+                    pass
+            else:
+                proc.kill()
+            stdout, stderr = proc.communicate()
+        result.wall_time = time.perf_counter() - start
+        result.return_code = proc.returncode
+        # bwrap reports a child killed by a signal as exit status 128 + signal
+        killed_by = -proc.returncode if proc.returncode < 0 else (
+            proc.returncode - 128 if EXEC_SANDBOX != "none" and proc.returncode > 128 else 0)
+        result.stdout = _truncate(stdout or "")
+        result.stderr = _truncate(stderr or "")
+
+        if os.path.exists(result_path) and os.path.getsize(result_path) > 0:
+            with open(result_path, "r", encoding="utf-8") as f:
+                report = json.load(f)
+            result.exception = report.get("exception")
+            result.traceback = report.get("traceback", "")
+            result.cpu_time = report.get("cpu_time", 0.0)
+            result.peak_memory_kb = report.get("peak_memory_kb", 0)
+        elif EXEC_SANDBOX != "none" and result.stderr.startswith("bwrap:"):
+            result.exception = f"SandboxError: {result.stderr.strip()}"
+        elif result.timed_out:
+            result.exception = f"TimeoutError: exceeded the {wall_seconds:g}s time limit"
+        elif os.name == "posix" and killed_by == signal.SIGXCPU:
+            result.exception = f"TimeoutError: exceeded the {cpu_seconds}s CPU time limit"
+        elif killed_by:
+            result.exception = f"Killed by signal {killed_by} (likely the {memory_mb} MB memory limit)"
+        elif "MemoryError" in result.stderr:
+            result.exception = f"MemoryError: exceeded the {memory_mb} MB memory limit"
+        else:
+            result.exception = "The program terminated before reporting a result."
+    except Exception as e:
+        result.wall_time = time.perf_counter() - start
+        result.exception = f"SandboxError: {e}"
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return result
+
+# --- PARALLEL EXECUTION ---
+# Each submission runs in its own child interpreter; the pool threads only wait on those children,
+# so EXEC_MAX_WORKERS submissions execute in parallel across CPU cores.
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=EXEC_MAX_WORKERS, thread_name_prefix="sandbox")
+        return _executor
+
+def submit_sandboxed(fn, *args, **kwargs) -> Future:
+    """Schedules any sandbox-backed call (e.g. a test or profiling run) on the shared pool."""
+    return _get_executor().submit(fn, *args, **kwargs)
+
+def format_execution_report(result: ExecutionResult, max_chars: int = 2000) -> str:
+    """Short plain-text summary of a local run, suitable for an LLM prompt."""
+    lines = [
+        f"Status: {'completed successfully' if result.ok else ('timed out' if result.timed_out else 'failed')}",
+        f"Wall time: {result.wall_time:.3f}s, CPU time: {result.cpu_time:.3f}s, Peak memory: {result.peak_memory_kb / 1024:.1f} MB",
+    ]
+    if result.exception:
+        lines.append(f"Exception: {result.exception}")
+    if result.stdout.strip():
+        lines.append("Stdout:\n" + result.stdout.strip()[:max_chars])
+    else:
+        lines.append("Stdout: (empty)")
+    return "\n".join(lines)
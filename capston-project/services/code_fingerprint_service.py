@@ -0,0 +1,127 @@
+import ast
+import builtins
+import hashlib
+import os
+import re
+from typing import Dict, Iterable, Optional, Set
+from services.shared_cache_service import cache_get, cache_set
+
+_BUILTIN_NAMES = set(dir(builtins))
+
+class _CanonicalizeNames(ast.NodeTransformer):
+    """Renames user-chosen identifiers to v0, v1, ... in order of first appearance and drops docstrings,
+       so reformatted or renamed copies of the same program produce the same tree. Names in keep_names
+       (the functions and classes the assignment requires) are left as they are."""
+
+    def __init__(self, keep_names: Iterable[str] = ()):
+        self.mapping: Dict[str, str] = {}
+        self.keep_names = set(keep_names)
+
+    def _canonical(self, name: str) -> str:
+        if name in _BUILTIN_NAMES or name in self.keep_names or (name.startswith("__") and name.endswith("__")):
+            return name
+        if name not in self.mapping:
+            self.mapping[name] = f"v{len(self.mapping)}"
+        return self.mapping[name]
+
+    def _strip_docstring(self, node):
+        body = getattr(node, "body", None)
+        if body and isinstance(body[0], ast.Expr) and isinstance(body[0].value, ast.Constant) and isinstance(body[0].value.value, str):
+            node.body = body[1:] or [ast.Pass()]
+        return node
+
+    def visit_Module(self, node):
+        self._strip_docstring(node)
+        return self.generic_visit(node)
+
+    def _visit_function(self, node):
+        self._strip_docstring(node)
+        node.name = self._canonical(node.name)
+        return self.generic_visit(node)
+
+    visit_FunctionDef = _visit_function
+    visit_AsyncFunctionDef = _visit_function
+
+    def visit_ClassDef(self, node):
+        self._strip_docstring(node)
+        node.name = self._canonical(node.name)
+        return self.generic_visit(node)
+
+    def visit_Name(self, node):
+        node.id = self._canonical(node.id)
+        return node
+
+    def visit_arg(self, node):
+        node.arg = self._canonical(node.arg)
+        node.annotation = None
+        return node
+
+    def visit_alias(self, node):
+        # `import x as y` binds y; `import x` binds x
+        if node.asname:
+            node.asname = self._canonical(node.asname)
+        return node
+
+def required_names(template: str) -> Set[str]:
+    """Functions and classes (and their methods) defined by a code template."""
+    try:
+        tree = ast.parse(template or "")
+    except (SyntaxError, ValueError):
+        return set()
+    names = set()
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            names.add(node.name)
+        if isinstance(node, ast.ClassDef):
+            names.update(n.name for n in node.body if isinstance(n, (ast.FunctionDef, ast.AsyncFunctionDef)))
+    return names
+
+def normalize_code(code: str, keep_names: Iterable[str] = ()) -> str:
+    """Canonical form of the code: comments, docstrings, formatting and identifier names (except keep_names)
+       removed. Falls back to whitespace-collapsed text (minus comments) when the code does not parse."""
+    try:
+        tree = ast.parse(code or "")
+    except (SyntaxError, ValueError):
+        without_comments = re.sub(r'#[^\n]*', '', code or "")
+        return "raw:" + ' '.join(without_comments.split())
+    tree = _CanonicalizeNames(keep_names).visit(tree)
+    return "ast:" + ast.dump(tree, annotate_fields=False, include_attributes=False)
+
+def code_fingerprint(code: str, assignment_id: str, template: str = "") -> str:
+    """SHA-256 of the assignment id and the normalized code; equal fingerprints get the same evaluation.
+       The template's function and class names are kept, so a submission that misnames them does not
+       share the evaluation of one that uses the required names."""
+    normalized = normalize_code(code, required_names(template))
+    return hashlib.sha256(f"{assignment_id}\n{normalized}".encode("utf-8")).hexdigest()
+
+def is_unmodified_template(code: str, template: str) -> bool:
+    """True if the submission is the code template with at most comment/formatting/renaming changes."""
+    if not template or not template.strip():
+        return False
+    return normalize_code(code) == normalize_code(template)
+
+def unmodified_template_evaluation() -> Dict[str, str]:
+    """Evaluation returned without an LLM call when the student submitted the starter template."""
+    return {
+        "verdict": "No",
+        "analysis": "The submitted code is the unmodified code template (only comments, formatting or names differ), so none of the requirements have been implemented yet.",
+        "improvements": "Start from the template and implement the required functionality described in the requirements, then test it with the example from the expected output before submitting."
+    }
+
+# Layer in front of the evaluation_cache table, shared by every app process (see shared_cache_service)
+EVALUATION_CACHE_NAMESPACE = "evaluation"
+EVALUATION_CACHE_TTL_HOURS = float(os.environ.get("EVALUATION_CACHE_TTL_HOURS", "168"))
+
+# The verdicts the evaluation prompts ask for (see assignment_processing_service)
+CACHEABLE_VERDICTS = ("yes", "no", "partially")
+
+def is_cacheable_evaluation(evaluation: Optional[Dict[str, str]]) -> bool:
+    """Only evaluations with a parsed Yes/No/Partially verdict are reused; a malformed response ("Unknown") is not."""
+    return bool(evaluation) and str(evaluation.get("verdict", "")).strip().lower() in CACHEABLE_VERDICTS
+
+def get_shared_cached_evaluation(fingerprint: str) -> Optional[Dict[str, str]]:
+    cached = cache_get(EVALUATION_CACHE_NAMESPACE, fingerprint)
+    return cached if isinstance(cached, dict) and is_cacheable_evaluation(cached) else None
+
+def set_shared_cached_evaluation(fingerprint: str, evaluation: Dict[str, str]):
+    cache_set(EVALUATION_CACHE_NAMESPACE, fingerprint, evaluation, EVALUATION_CACHE_TTL_HOURS * 3600)
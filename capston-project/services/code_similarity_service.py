@@ -0,0 +1,230 @@
+import streamlit as st
+import keyword
+import builtins
+import re
+import threading
+import zlib
+from collections import Counter, OrderedDict, defaultdict
+from typing import List, Dict, Set, FrozenSet, Optional, Any
+
+# Noise threshold k (shortest match that counts) and guarantee threshold t (every shared
+# run of t tokens is detected); the winnowing window is t - k + 1.
+SIMILARITY_K = 5
+SIMILARITY_T = 12
+# Fingerprints shared by more than this fraction of submissions (or more than SIMILARITY_MAX_POSTINGS
+# submissions) are boilerplate, not copying; skipping them also keeps pair counting near-linear
+SIMILARITY_COMMON_FRACTION = 0.5
+SIMILARITY_MAX_POSTINGS = 100
+# A match needs at least this many shared fingerprints, so tiny submissions do not match everything
+SIMILARITY_MIN_SHARED = 3
+# Indexes kept in memory per process; the least recently used assignment's index is dropped beyond this
+SIMILARITY_MAX_INDEXES = 32
+
+_BUILTIN_NAMES = set(dir(builtins))
+_KEPT_NAMES = _BUILTIN_NAMES | set(keyword.kwlist)
+# One pass over the source; much faster than the tokenize module and tolerant of broken code
+_TOKEN_RE = re.compile(
+    r'(?P<comment>#[^\n]*)'
+    r'|(?P<string>[rbuRBUfF]{0,2}(?:"""[\s\S]*?"""|\'\'\'[\s\S]*?\'\'\'|"(?:\\.|[^"\\\n])*"|\'(?:\\.|[^\'\\\n])*\'))'
+    r'|(?P<name>[A-Za-z_]\w*)'
+    r'|(?P<number>\d[\w.]*)'
+    r'|(?P<newline>\n[ \t]*)'
+    r'|(?P<op>[^\s\w])'
+)
+
+def tokenize_code(code: str) -> List[str]:
+    """Normalized token stream of Python code. Comments and blank lines are dropped; identifiers,
+       numbers and strings are abstracted so renaming variables or changing literals does not hide a copy."""
+    tokens: List[str] = []
+    indent, line_indent = 0, 0
+    for match in _TOKEN_RE.finditer(code or ""):
+        kind = match.lastgroup
+        if kind == "newline":
+            if tokens and tokens[-1] != ";":
+                tokens.append(";")
+            line_indent = len(match.group()) - 1
+            continue
+        if kind == "comment":
+            continue
+        # Block structure: indentation changes of non-blank lines
+        if tokens and tokens[-1] == ";" and line_indent != indent:
+            tokens.append("{" if line_indent > indent else "}")
+            indent = line_indent
+        if kind == "name":
+            value = match.group()
+            tokens.append(value if value in _KEPT_NAMES else "N")
+        elif kind == "op":
+            tokens.append(match.group())
+        elif kind == "number":
+            tokens.append("0")
+        elif kind == "string":
+            tokens.append("S")
+    return tokens
+
+def kgram_hashes(tokens: List[str], k: int = SIMILARITY_K) -> List[int]:
+    """Stable 32-bit hash of every k-gram of the token stream."""
+    if len(tokens) < k:
+        return [zlib.crc32(" ".join(tokens).encode("utf-8"))] if tokens else []
+    return [zlib.crc32(" ".join(tokens[i:i + k]).encode("utf-8")) for i in range(len(tokens) - k + 1)]
+
+def winnow(hashes: List[int], window: int = SIMILARITY_T - SIMILARITY_K + 1) -> FrozenSet[int]:
+    """Winnowing: keeps the minimum hash of every window (rightmost on ties), recording each
+       selected position once."""
+    if len(hashes) <= window:
+        return frozenset([min(hashes)]) if hashes else frozenset()
+    selected: Set[int] = set()
+    last_pos = -1
+    for start in range(len(hashes) - window + 1):
+        window_hashes = hashes[start:start + window]
+        min_hash = min(window_hashes)
+        # Rightmost position of the minimum inside the window
+        pos = start + window - 1 - window_hashes[::-1].index(min_hash)
+        if pos != last_pos:
+            selected.add(min_hash)
+            last_pos = pos
+    return frozenset(selected)
+
+def code_fingerprints(code: str) -> FrozenSet[int]:
+    return winnow(kgram_hashes(tokenize_code(code)))
+
+class SimilarityIndex:
+    """Inverted index from winnowed fingerprints to submission ids for one assignment.
+       Submissions can be added at any time; only new or changed code is re-fingerprinted."""
+
+    def __init__(self, ignored_code: str = ""):
+        self.fingerprints: Dict[str, FrozenSet[int]] = {}
+        self.postings: Dict[int, Set[str]] = defaultdict(set)
+        self._code_hashes: Dict[str, int] = {}
+        # Fingerprints of the code template are shared by everyone and never count as copying
+        self.ignored: FrozenSet[int] = code_fingerprints(ignored_code) if ignored_code else frozenset()
+        self.ignored_hash = zlib.crc32((ignored_code or "").encode("utf-8"))
+        self.lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.fingerprints)
+
+    def add(self, submission_id: str, code: str) -> bool:
+        """Indexes (or re-indexes) a submission. Returns False if it was already indexed unchanged."""
+        submission_id = str(submission_id)
+        code_hash = zlib.crc32((code or "").encode("utf-8"))
+        with self.lock:
+            if self._code_hashes.get(submission_id) == code_hash:
+                return False
+            self._remove_locked(submission_id)
+            fps = code_fingerprints(code) - self.ignored
+            self.fingerprints[submission_id] = fps
+            self._code_hashes[submission_id] = code_hash
+            for fp in fps:
+                self.postings[fp].add(submission_id)
+            return True
+
+    def remove(self, submission_id: str):
+        with self.lock:
+            self._remove_locked(str(submission_id))
+
+    def _remove_locked(self, submission_id: str):
+        for fp in self.fingerprints.pop(submission_id, ()):
+            ids = self.postings.get(fp)
+            if ids:
+                ids.discard(submission_id)
+                if not ids:
+                    del self.postings[fp]
+        self._code_hashes.pop(submission_id, None)
+
+    def _max_postings(self) -> int:
+        return max(2, min(SIMILARITY_MAX_POSTINGS, int(len(self.fingerprints) * SIMILARITY_COMMON_FRACTION)))
+
+    def _informative_count(self, submission_id: str, max_postings: int) -> int:
+        """Fingerprints of a submission that are rare enough to count as evidence."""
+        return sum(1 for fp in self.fingerprints[submission_id] if len(self.postings[fp]) <= max_postings)
+
+    def similar_pairs(self, min_score: float = 0.5, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Pairs of submissions sharing fingerprints, highest score first:
+           [{"a", "b", "score", "shared"}]. Only pairs that share at least one posting list are ever scored.
+           The score is the overlap relative to the smaller submission, so a copied function inside
+           a longer file still scores high."""
+        with self.lock:
+            max_postings = self._max_postings()
+            shared: Counter = Counter()
+            informative: Counter = Counter()
+            for ids in self.postings.values():
+                if len(ids) > max_postings:
+                    continue
+                informative.update(ids)
+                if len(ids) < 2:
+                    continue
+                ordered = sorted(ids)
+                for i, a in enumerate(ordered):
+                    for b in ordered[i + 1:]:
+                        shared[(a, b)] += 1
+            pairs = []
+            for (a, b), count in shared.items():
+                if count < SIMILARITY_MIN_SHARED:
+                    continue
+                smaller = min(informative[a], informative[b])
+                score = count / smaller if smaller else 0.0
+                if score >= min_score:
+                    pairs.append({"a": a, "b": b, "score": round(score, 3), "shared": count})
+        pairs.sort(key=lambda p: (-p["score"], -p["shared"]))
+        return pairs[:limit] if limit else pairs
+
+    def query(self, code: str, min_score: float = 0.5, exclude_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Indexed submissions similar to a piece of code: [{"id", "score", "shared"}]."""
+        fps = code_fingerprints(code) - self.ignored
+        if not fps:
+            return []
+        with self.lock:
+            max_postings = self._max_postings()
+            shared: Counter = Counter()
+            query_informative = 0
+            for fp in fps:
+                ids = self.postings.get(fp)
+                if not ids:
+                    query_informative += 1
+                elif len(ids) <= max_postings:
+                    query_informative += 1
+                    shared.update(ids)
+            if exclude_id is not None:
+                shared.pop(str(exclude_id), None)
+            matches = []
+            for sid, count in shared.items():
+                if count < SIMILARITY_MIN_SHARED:
+                    continue
+                smaller = min(query_informative, self._informative_count(sid, max_postings))
+                score = count / smaller if smaller else 0.0
+                if score >= min_score:
+                    matches.append({"id": sid, "score": round(score, 3), "shared": count})
+        matches.sort(key=lambda m: -m["score"])
+        return matches
+
+    def update(self, submissions: List[Dict[str, Any]]) -> int:
+        """Brings the index in line with a list of assignment_submissions rows: submissions missing from the
+           list (deleted) are removed. Returns how many were (re)indexed."""
+        present = {str(s["id"]) for s in submissions if s.get("id") is not None}
+        with self.lock:
+            for submission_id in [sid for sid in self.fingerprints if sid not in present]:
+                self._remove_locked(submission_id)
+        return sum(1 for s in submissions if s.get("id") is not None and self.add(s["id"], s.get("code") or ""))
+
+@st.cache_resource
+def _get_similarity_indexes() -> "OrderedDict[str, SimilarityIndex]":
+    """Process-wide indexes, one per assignment (least recently used first), kept across reruns so updates
+       are incremental."""
+    return OrderedDict()
+
+_indexes_lock = threading.Lock()
+
+def get_similarity_index(assignment_details: Dict[str, Any], submissions: List[Dict[str, Any]]) -> SimilarityIndex:
+    """The assignment's index, updated with any new, edited or deleted submissions. The index is rebuilt
+       when the assignment's code template changed, since the ignored fingerprints depend on it."""
+    template = assignment_details.get("code_template", "") or ""
+    indexes = _get_similarity_indexes()
+    with _indexes_lock:
+        index = indexes.get(assignment_details["id"])
+        if index is None or index.ignored_hash != zlib.crc32(template.encode("utf-8")):
+            index = indexes[assignment_details["id"]] = SimilarityIndex(ignored_code=template)
+        indexes.move_to_end(assignment_details["id"])
+        while len(indexes) > SIMILARITY_MAX_INDEXES:
+            indexes.popitem(last=False)
+    index.update(submissions)
+    return index
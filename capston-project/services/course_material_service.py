@@ -0,0 +1,66 @@
+import streamlit as st
+import os
+from typing import List, Dict, Any, Optional, Tuple, Callable
+from services.pdf_cache_service import pdf_digest
+from services.pdf_extraction_service import extract_pdf_text
+from services.retrieval_service import BM25Index, Passage, chunk_text, passage_bounds, passages_from_bounds
+
+# Indexes of library documents kept in memory per process, so repeated generations skip the database
+MATERIAL_INDEX_CACHE_ENTRIES = 32
+
+def process_pdf_material(pdf_bytes: bytes, title: str,
+                         on_progress: Optional[Callable[[int, int], None]] = None) -> Dict[str, Any]:
+    """Extracts, chunks and indexes a PDF into a course_materials row (without teacher_id)."""
+    extracted = extract_pdf_text(pdf_bytes, on_progress=on_progress)
+    passages = chunk_text(extracted.text, extracted.page_offsets)
+    return {
+        "title": title,
+        "file_sha256": pdf_digest(pdf_bytes),
+        "page_count": extracted.page_count,
+        "pages_read": extracted.pages_read,
+        "text": extracted.text,
+        "page_offsets": [list(p) for p in extracted.page_offsets],
+        "passages": passage_bounds(passages),
+        "search_index": BM25Index(passages).to_dict(),
+    }
+
+def add_pdf_to_library(pdf_bytes: bytes, title: str,
+                       on_progress: Optional[Callable[[int, int], None]] = None) -> Tuple[Optional[str], bool]:
+    """Adds an uploaded PDF to the teacher's library, processing it only if the same file is not there yet.
+       Returns (material id, True if it was already in the library)."""
+    from db_utils import find_course_material, save_course_material
+    existing = find_course_material(pdf_digest(pdf_bytes))
+    if existing:
+        return existing["id"], True
+    material = process_pdf_material(pdf_bytes, os.path.splitext(title)[0] or "Untitled document", on_progress)
+    if not material["text"].strip():
+        return None, False
+    return save_course_material(material), False
+
+def index_from_material(material: Dict[str, Any]) -> BM25Index:
+    """Search index of a stored document, rebuilt from its saved boundaries and postings (no re-tokenizing)."""
+    text = material.get("text") or ""
+    bounds = material.get("passages") or []
+    if not bounds:
+        return BM25Index(chunk_text(text, [tuple(p) for p in material.get("page_offsets") or []]))
+    passages = passages_from_bounds(text, bounds)
+    return BM25Index(passages, stored=material.get("search_index") or None)
+
+@st.cache_resource(max_entries=MATERIAL_INDEX_CACHE_ENTRIES, show_spinner=False)
+def get_material_index(material_id: str) -> BM25Index:
+    """Process-wide index for a library document; loaded from the database once.
+       Raises LookupError if the document cannot be loaded: exceptions are not cached, so a failed or
+       missing lookup is retried on the next call. delete_course_material clears this cache."""
+    from db_utils import get_course_material
+    material = get_course_material(material_id)
+    if not material:
+        raise LookupError(f"Course material {material_id} could not be loaded.")
+    return index_from_material(material)
+
+def retrieve_material_passages(material_id: str, query: str, k: int = 4) -> List[Passage]:
+    """Top-k passages of a library document for a query, in document order."""
+    try:
+        index = get_material_index(material_id)
+    except LookupError:
+        return []
+    return sorted((p for p, _ in index.search(query, k)), key=lambda p: p.id)
@@ -0,0 +1,71 @@
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import replace
+from typing import List, Dict, Tuple, Optional
+from models.question import Question
+from services.llm_service import generate_content
+from services.quiz_processing_service import generate_quiz_creation_prompt, parse_llm_questions
+from services.retrieval_service import BM25Index, Passage, passages_for_groups
+
+# Questions generated per LLM call; each group gets its own retrieved passages
+QUIZ_GROUP_SIZE = 5
+RETRIEVAL_TOP_K = int(os.environ.get("RETRIEVAL_TOP_K", "4"))
+# Groups generated at the same time; LLM calls are additionally bounded by the llm_service rate limiter
+QUIZ_GROUP_MAX_WORKERS = int(os.environ.get("QUIZ_GROUP_MAX_WORKERS", "4"))
+
+_QUESTION_TYPES = ("mcq", "fill_blank", "true_false", "open_ended")
+_LABEL_RE = re.compile(r"S(\d+)", re.IGNORECASE)
+
+def plan_question_groups(counts: Dict[str, int], group_size: int = QUIZ_GROUP_SIZE) -> List[Dict[str, int]]:
+    """Splits the requested counts per type into groups of at most group_size questions."""
+    flat = [q_type for q_type in _QUESTION_TYPES for _ in range(counts.get(q_type, 0))]
+    groups = []
+    for start in range(0, len(flat), group_size):
+        group = dict.fromkeys(_QUESTION_TYPES, 0)
+        for q_type in flat[start:start + group_size]:
+            group[q_type] += 1
+        groups.append(group)
+    return groups
+
+def passage_label(passage: Passage) -> str:
+    return f"S{passage.id + 1}"
+
+def format_citation(passage: Passage, max_chars: int = 100) -> str:
+    """Short citation shown with a question, e.g. 'p. 12: "Merge sort splits the list..."'."""
+    snippet = passage.text if len(passage.text) <= max_chars else passage.text[:max_chars].rsplit(" ", 1)[0] + "..."
+    return f'p. {passage.page}: "{snippet}"' if passage.page else f'"{snippet}"'
+
+def resolve_citation(source: str, passages: Dict[str, Passage]) -> str:
+    """Turns the model's 'Source: [S3]' label into a readable citation; unknown labels are dropped."""
+    match = _LABEL_RE.search(source or "")
+    passage = passages.get(f"S{match.group(1)}") if match else None
+    return format_citation(passage) if passage else ""
+
+def generate_grounded_questions(index: BM25Index, topics: str, counts: Dict[str, int], difficulty: str, num_options: int,
+                                model_name: Optional[str] = None) -> Tuple[List[Question], List[str], bool]:
+    """Generates the requested questions in groups, each prompted only with the top-k passages retrieved for
+       the teacher's topics. Groups run concurrently. Returns (questions with citations, raw responses, any_failed)."""
+    groups = plan_question_groups(counts)
+    if not groups:
+        return [], [], False
+    group_passages = passages_for_groups(index, topics, len(groups), RETRIEVAL_TOP_K)
+
+    def generate_group(group: Dict[str, int], passages: List[Passage]) -> Optional[str]:
+        prompt = generate_quiz_creation_prompt(
+            topics or "the provided source material",
+            group["mcq"], group["fill_blank"], group["true_false"], group["open_ended"],
+            difficulty, num_options,
+            source_passages=[(passage_label(p), p.text) for p in passages]
+        )
+        return generate_content(prompt, show_spinner=False, model_name=model_name)
+
+    with ThreadPoolExecutor(max_workers=max(1, min(QUIZ_GROUP_MAX_WORKERS, len(groups))), thread_name_prefix="quiz-group") as executor:
+        responses = list(executor.map(generate_group, groups, group_passages))
+
+    questions: List[Question] = []
+    for response, passages in zip(responses, group_passages):
+        by_label = {passage_label(p): p for p in passages}
+        for q in parse_llm_questions(response or ""):
+            questions.append(replace(q, source=resolve_citation(q.source, by_label)))
+    return questions, [r for r in responses if r], any(not r for r in responses)
@@ -1,8 +1,9 @@
 import streamlit as st
 import os
 import time
-from langchain_groq import ChatGroq
-from typing import Optional
+import threading
+from contextlib import contextmanager
+from typing import Optional, Iterator
 
 # List of supported Groq models
 GROQ_MODELS = [
@@ -21,6 +22,31 @@ GROQ_MODELS = [
     "meta-llama/llama-4-maverick-17b-128e-instruct"
 ]
 
+# --- RATE LIMITING ---
+# Shared by every caller in the process (pages, background pools, bulk jobs) so parallel work
+# never exceeds the provider limits.
+LLM_MAX_CONCURRENCY = int(os.environ.get("LLM_MAX_CONCURRENCY", "4"))
+LLM_REQUESTS_PER_MINUTE = int(os.environ.get("LLM_REQUESTS_PER_MINUTE", "30"))
+
+_llm_slots = threading.BoundedSemaphore(LLM_MAX_CONCURRENCY)
+_rate_lock = threading.Lock()
+_next_request_at = 0.0
+
+@contextmanager
+def llm_rate_limit():
+    """Blocks until a request may be sent: at most LLM_MAX_CONCURRENCY in flight and
+       requests spaced evenly to stay within LLM_REQUESTS_PER_MINUTE."""
+    global _next_request_at
+    with _llm_slots:
+        if LLM_REQUESTS_PER_MINUTE > 0:
+            with _rate_lock:
+                now = time.monotonic()
+                wait = max(0.0, _next_request_at - now)
+                _next_request_at = max(now, _next_request_at) + 60.0 / LLM_REQUESTS_PER_MINUTE
+            if wait:
+                time.sleep(wait)
+        yield
+
 # Initialize LLM client
 @st.cache_resource
 def get_llm(model_name: Optional[str] = None):
@@ -35,6 +61,7 @@ def get_llm(model_name: Optional[str] = None):
             return None # Callers should check for None
         if not model_name:
             model_name = "deepseek-r1-distill-llama-70b"  # Default to DeepSeek
+        from langchain_groq import ChatGroq  # imported on first use; pages that never call the LLM skip it
         return ChatGroq(model_name=model_name)
     except Exception as e:
         print(f"Error initializing LLM: {e}")
@@ -54,18 +81,43 @@ def generate_content(prompt: str, show_spinner: bool = True, model_name: Optiona
         if show_spinner and 'st' in globals(): # Check if streamlit context is available for spinner
             with st.spinner("Generating content..."):
                 start_time = time.time()
-                response = llm.invoke(prompt).content
+                with llm_rate_limit():
+                    response = llm.invoke(prompt).content
                 elapsed = time.time() - start_time
                 st.success(f"Generated in {elapsed:.2f} seconds")
             return response
         else:
             # Fallback for non-Streamlit contexts or when spinner is off
             start_time = time.time()
-            response = llm.invoke(prompt).content
+            with llm_rate_limit():
+                response = llm.invoke(prompt).content
             elapsed = time.time() - start_time
             print(f"LLM content generated in {elapsed:.2f} seconds (no spinner).")
             return response
     except Exception as e:
         # st.error(f"Error generating content: {str(e)}") # Cannot use st.error here directly
         print(f"Error generating content: {str(e)}")
-        return None 
\ No newline at end of file
+        return None
+
+# Stream content using LLM
+def stream_content(prompt: str, model_name: Optional[str] = None) -> Iterator[str]:
+    """Yields the response text chunk by chunk as the model generates it.
+       Yields nothing if the LLM is unavailable. Errors during the stream are logged and re-raised, so
+       callers can tell a dropped stream from a finished one."""
+    llm = get_llm(model_name)
+    if not llm:
+        print("LLM initialization failed. Check your API key.")
+        return
+    try:
+        start_time = time.time()
+        with llm_rate_limit():
+            first_chunk_at = None
+            for chunk in llm.stream(prompt):
+                if chunk.content:
+                    if first_chunk_at is None:
+                        first_chunk_at = time.time() - start_time
+                    yield chunk.content
+        print(f"LLM content streamed in {time.time() - start_time:.2f} seconds (first chunk after {first_chunk_at or 0:.2f}s).")
+    except Exception as e:
+        print(f"Error streaming content: {str(e)}")
+        raise
@@ -0,0 +1,174 @@
+import os
+import re
+from collections import Counter
+from typing import List, Dict, Any, Optional, Sequence
+from models.question import Question
+from services.quiz_processing_service import _normalize_fill_answer
+
+# Class-level analysis kicks in once a quiz has this many submissions (including the current one)
+MISCONCEPTION_MIN_SUBMISSIONS = int(os.environ.get("MISCONCEPTION_MIN_SUBMISSIONS", "5"))
+# Upper bound on (question, wrong answer) pairs explained in one LLM call
+MISCONCEPTION_BATCH_SIZE = 40
+
+UNANSWERED_MARK = "-"
+
+def _normalize_text_answer(s: str) -> str:
+    return ' '.join(s.strip().lower().split())
+
+def _answer_for(q: Question, index: int, answers: Dict[Any, Any]):
+    return answers.get(q.db_id, answers.get(str(q.db_id), answers.get(index)))
+
+def mistake_key(q: Question, user_answer) -> Optional[str]:
+    """Key identifying one wrong-answer pattern for a question, or None if the answer is correct/ungradable.
+       MCQ/TF: '<db_id>:<option letter>', fill-in: '<db_id>:text:<normalized answer>', skipped: '<db_id>:-'."""
+    if q.question_type in ["mcq", "true_false"]:
+        try:
+            idx = int(user_answer)
+        except (TypeError, ValueError):
+            idx = -1
+        if not (0 <= idx < len(q.answers)):
+            return f"{q.db_id}:{UNANSWERED_MARK}"
+        return None if idx == q.correct_answer else f"{q.db_id}:{chr(65 + idx)}"
+    if q.question_type == "fill_blank" and q.answers:
+        if not isinstance(user_answer, str) or not user_answer.strip():
+            return f"{q.db_id}:{UNANSWERED_MARK}"
+        # Same comparison as calculate_quiz_score, so a key exists exactly when the answer was graded wrong
+        if _normalize_fill_answer(user_answer) == _normalize_fill_answer(q.answers[0]):
+            return None
+        return f"{q.db_id}:text:{_normalize_text_answer(user_answer)}"
+    # Open-ended answers are graded manually and have no shared "wrong option"
+    return None
+
+def student_mistake_keys(questions: Sequence[Question], user_answers: Dict[Any, Any]) -> List[str]:
+    """Mistake keys for one student's answers, in question order."""
+    keys = []
+    for i, q in enumerate(questions):
+        key = mistake_key(q, _answer_for(q, i, user_answers))
+        if key:
+            keys.append(key)
+    return keys
+
+def cluster_wrong_answers(questions: Sequence[Question], all_answers: List[Dict[Any, Any]]) -> Counter:
+    """Counts how many students made each (question, wrong answer) mistake."""
+    counts: Counter = Counter()
+    for answers in all_answers:
+        counts.update(set(student_mistake_keys(questions, answers or {})))
+    return counts
+
+def _describe_mistake(questions_by_db_id: Dict[str, Question], key: str) -> Optional[str]:
+    db_id, _, wrong = key.partition(":")
+    q = questions_by_db_id.get(db_id)
+    if not q:
+        return None
+    if wrong == UNANSWERED_MARK:
+        wrong_text = "(left unanswered)"
+    elif wrong.startswith("text:"):
+        wrong_text = wrong[len("text:"):]
+    else:
+        idx = ord(wrong) - 65
+        wrong_text = f"{wrong}) {q.answers[idx]}" if 0 <= idx < len(q.answers) else wrong
+    if q.question_type == "fill_blank":
+        correct_text = q.answers[0] if q.answers else "(unknown)"
+    elif 0 <= q.correct_answer < len(q.answers):
+        correct_text = f"{chr(65 + q.correct_answer)}) {q.answers[q.correct_answer]}"
+    else:
+        correct_text = "(unknown)"
+    options = "".join(f"  {chr(65 + j)}) {a}\n" for j, a in enumerate(q.answers)) if q.question_type != "fill_blank" else ""
+    return f'<mistake id="{key}">\nQuestion: {q.question}\n{options}Student answer: {wrong_text}\nCorrect answer: {correct_text}\n</mistake>'
+
+def generate_misconception_prompt(questions: Sequence[Question], keys: List[str]) -> str:
+    """Generate the prompt asking for one reusable explanation per (question, wrong answer) pair."""
+    by_db_id = {str(q.db_id): q for q in questions}
+    mistakes = "\n\n".join(d for d in (_describe_mistake(by_db_id, k) for k in keys) if d)
+    return f"""Several students in a class answered the following quiz questions incorrectly in the same way.
+For each mistake, explain the likely misconception behind that specific wrong answer and what to review.
+Write to the student in the second person, 2-3 sentences for the explanation and one short sentence for the review.
+Do not mention other students.
+
+{mistakes}
+
+Answer with one block per mistake, copying the id exactly:
+<fragment id="MISTAKE_ID">
+<explanation>[Why this answer is tempting and what the misconception is]</explanation>
+<review>[The concept or skill to review]</review>
+</fragment>
+"""
+
+def parse_misconception_fragments(response: str) -> Dict[str, Dict[str, str]]:
+    """Parse the LLM response into {mistake_key: {"explanation": ..., "review": ...}}."""
+    if not response:
+        return {}
+    fragments = {}
+    for match in re.finditer(r'<fragment\s+id="([^"]+)">(.*?)</fragment>', response, re.DOTALL | re.IGNORECASE):
+        body = match.group(2)
+        explanation = re.search(r'<explanation>(.*?)</explanation>', body, re.DOTALL | re.IGNORECASE)
+        review = re.search(r'<review>(.*?)</review>', body, re.DOTALL | re.IGNORECASE)
+        fragments[match.group(1).strip()] = {
+            "explanation": explanation.group(1).strip() if explanation else body.strip(),
+            "review": review.group(1).strip() if review else "",
+        }
+    return fragments
+
+def assemble_student_feedback(questions: Sequence[Question], user_answers: Dict[Any, Any], fragments: Dict[str, Dict[str, str]],
+                              class_counts: Counter, correct: int, total: int, score_pct: float) -> Dict[str, str]:
+    """Build per-student feedback (same keys as parse_quiz_analysis) from cached class-level fragments."""
+    gaps, reviews, strengths = [], [], []
+    shared = 0
+    for i, q in enumerate(questions):
+        key = mistake_key(q, _answer_for(q, i, user_answers))
+        if key and key in fragments:
+            fragment = fragments[key]
+            gaps.append(f"**Q{i+1}: {q.question}**\n{fragment['explanation']}")
+            if fragment.get("review") and fragment["review"] not in reviews:
+                reviews.append(fragment["review"])
+            if class_counts.get(key, 0) > 1:
+                shared += 1
+        elif key is None and q.question_type != "open_ended":
+            strengths.append(f"Q{i+1}: {q.question}")
+
+    understanding = f"You answered {correct} of {total} auto-graded questions correctly ({score_pct:.1f}%)."
+    if gaps:
+        understanding += f" {shared} of your {len(gaps)} mistake(s) are common across the class, so they are worth reviewing carefully."
+    return {
+        "understanding": understanding,
+        "knowledge_gaps": "\n\n".join(gaps) if gaps else "No knowledge gaps were detected in the auto-graded questions.",
+        "recommendations": "\n".join(f"- {r}" for r in reviews) if reviews else "Keep practising with new questions on the same topics.",
+        "strengths": "\n".join(f"- {s}" for s in strengths) if strengths else "Keep going - every question you review now builds your understanding.",
+    }
+
+def build_class_level_feedback(quiz_id: str, questions: Sequence[Question], user_answers: Dict[Any, Any],
+                               correct: int, total: int, score_pct: float, already_submitted: bool = False,
+                               show_spinner: bool = True) -> Optional[Dict[str, str]]:
+    """Per-student feedback assembled from shared misconception fragments.
+
+    Returns None while the quiz has fewer than MISCONCEPTION_MIN_SUBMISSIONS submissions or when some of the
+    student's mistakes could not be explained; callers then fall back to the per-student LLM analysis.
+    Pass already_submitted=True when user_answers are already stored in quiz_results.
+    Only (question, wrong answer) pairs without a cached fragment cost an LLM call.
+    """
+    # Imported here so the pure clustering helpers above stay usable without Streamlit/Supabase
+    from db_utils import get_quiz_submission_answers, get_quiz_misconceptions, save_quiz_misconceptions
+    from services.llm_service import generate_content
+
+    class_answers = get_quiz_submission_answers(quiz_id)
+    all_answers = class_answers if already_submitted else class_answers + [user_answers]
+    if len(all_answers) < MISCONCEPTION_MIN_SUBMISSIONS:
+        return None
+
+    class_counts = cluster_wrong_answers(questions, all_answers)
+    own_keys = student_mistake_keys(questions, user_answers)
+    fragments = get_quiz_misconceptions(quiz_id)
+    # The student's own mistakes first, then the most common ones so later students hit the cache
+    missing = [k for k in own_keys if k not in fragments]
+    missing += [k for k, _ in class_counts.most_common() if k not in fragments and k not in missing]
+    missing = missing[:MISCONCEPTION_BATCH_SIZE]
+    if missing:
+        response = generate_content(generate_misconception_prompt(questions, missing), show_spinner=show_spinner)
+        new_fragments = {k: v for k, v in parse_misconception_fragments(response).items() if k in missing}
+        if new_fragments:
+            save_quiz_misconceptions(quiz_id, new_fragments)
+            fragments.update(new_fragments)
+
+    if any(k not in fragments for k in own_keys):
+        return None
+    return assemble_student_feedback(questions, user_answers, fragments, class_counts, correct, total, score_pct)
@@ -0,0 +1,172 @@
+import streamlit as st
+import os
+import sys
+import json
+import time
+import inspect
+import functools
+import tempfile
+import threading
+import contextvars
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, Any, List
+
+# Opt-in: instruments backend calls, records every page render and shows the debug panel in the sidebar
+PAGE_PROFILING = os.environ.get("PAGE_PROFILING", "0") == "1"
+PAGE_PROFILE_LOG = os.environ.get("PAGE_PROFILE_LOG", os.path.join(tempfile.gettempdir(), "eval_project_page_profile.jsonl"))
+PAGE_PROFILE_LOG_MAX_MB = float(os.environ.get("PAGE_PROFILE_LOG_MAX_MB", "5"))
+# Renders kept per session for the sidebar panel
+PAGE_PROFILE_HISTORY = 20
+MAX_CALLS_PER_RECORD = 200
+
+# Backend modules whose public functions are timed, by call kind
+INSTRUMENTED_MODULES = {"db_utils": "db", "auth": "auth", "services.llm_service": "llm"}
+
+# The render being recorded in this context. Worker threads start with an empty context, so calls made
+# by background pools are not attributed to whichever page happens to be rendering.
+_current_record: contextvars.ContextVar = contextvars.ContextVar("page_profile_record", default=None)
+_call_depth: contextvars.ContextVar = contextvars.ContextVar("page_profile_depth", default=0)
+_log_lock = threading.Lock()
+_install_lock = threading.Lock()
+
+def _payload_size(value: Any) -> int:
+    """Approximate bytes moved by a call: text length, or the size of the JSON form of structured data."""
+    if value is None:
+        return 0
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    if isinstance(value, str):
+        return len(value.encode("utf-8", errors="ignore"))
+    try:
+        return len(json.dumps(value, default=str))
+    except (TypeError, ValueError):
+        return sys.getsizeof(value)
+
+def _args_size(args, kwargs) -> int:
+    return sum(_payload_size(a) for a in args if isinstance(a, (str, bytes, dict, list))) + \
+           sum(_payload_size(v) for v in kwargs.values() if isinstance(v, (str, bytes, dict, list)))
+
+def _record_call(record: Dict[str, Any], kind: str, name: str, elapsed: float, sent: int, received: int, depth: int):
+    totals = record["totals"].setdefault(kind, {"count": 0, "ms": 0.0, "bytes": 0})
+    totals["count"] += 1
+    totals["ms"] += elapsed * 1000
+    totals["bytes"] += sent + received
+    if len(record["calls"]) < MAX_CALLS_PER_RECORD:
+        record["calls"].append({"kind": kind, "name": name, "ms": round(elapsed * 1000, 2),
+                                "bytes": sent + received, "nested": depth > 0})
+
+def _instrument(fn, kind: str):
+    name = fn.__name__
+    if inspect.isgeneratorfunction(fn):
+        @functools.wraps(fn)
+        def generator_wrapper(*args, **kwargs):
+            record = _current_record.get()
+            if record is None:
+                yield from fn(*args, **kwargs)
+                return
+            start, received = time.perf_counter(), 0
+            try:
+                for item in fn(*args, **kwargs):
+                    received += _payload_size(item)
+                    yield item
+            finally:
+                _record_call(record, kind, name, time.perf_counter() - start, _args_size(args, kwargs), received, _call_depth.get())
+        wrapper = generator_wrapper
+    else:
+        @functools.wraps(fn)
+        def call_wrapper(*args, **kwargs):
+            record = _current_record.get()
+            if record is None:
+                return fn(*args, **kwargs)
+            depth = _call_depth.get()
+            token = _call_depth.set(depth + 1)
+            start, result = time.perf_counter(), None
+            try:
+                result = fn(*args, **kwargs)
+                return result
+            finally:
+                _call_depth.reset(token)
+                _record_call(record, kind, name, time.perf_counter() - start, _args_size(args, kwargs), _payload_size(result), depth)
+        wrapper = call_wrapper
+    wrapper.__page_profiled__ = True
+    return wrapper
+
+def install_instrumentation():
+    """Wraps the public functions of the backend modules and rebinds every imported reference to them.
+       Idempotent; does nothing unless PAGE_PROFILING is on. Call it before the page modules are imported
+       so their `from db_utils import ...` names pick up the wrappers directly."""
+    if not PAGE_PROFILING:
+        return
+    import importlib
+    with _install_lock:
+        replaced = {}
+        for module_name, kind in INSTRUMENTED_MODULES.items():
+            module = importlib.import_module(module_name)
+            for attr, value in list(vars(module).items()):
+                # Plain functions defined in the module; st.cache_resource objects and imports are skipped
+                if attr.startswith("_") or not inspect.isfunction(value) or value.__module__ != module.__name__:
+                    continue
+                if getattr(value, "__page_profiled__", False):
+                    continue
+                wrapped = _instrument(value, kind)
+                setattr(module, attr, wrapped)
+                replaced[id(value)] = wrapped
+        if not replaced:
+            return
+        # Modules imported earlier hold their own references (e.g. db_utils' `from auth import get_user_id`)
+        for module in list(sys.modules.values()):
+            namespace = getattr(module, "__dict__", None)
+            if not namespace:
+                continue
+            for attr, value in list(namespace.items()):
+                if inspect.isfunction(value) and id(value) in replaced:
+                    setattr(module, attr, replaced[id(value)])
+
+def _write_log(record: Dict[str, Any]):
+    """Appends one JSON line, rotating to a single .1 backup once the log exceeds PAGE_PROFILE_LOG_MAX_MB."""
+    line = json.dumps(record, default=str) + "\n"
+    with _log_lock:
+        try:
+            if os.path.exists(PAGE_PROFILE_LOG) and os.path.getsize(PAGE_PROFILE_LOG) > PAGE_PROFILE_LOG_MAX_MB * 1024 * 1024:
+                os.replace(PAGE_PROFILE_LOG, PAGE_PROFILE_LOG + ".1")
+            with open(PAGE_PROFILE_LOG, "a", encoding="utf-8") as f:
+                f.write(line)
+        except OSError as e:
+            print(f"Could not write page profile log: {e}")
+
+@contextmanager
+def page_render_profile(page: str, render: str = ""):
+    """Records wall time and backend calls of one page render (no-op unless PAGE_PROFILING is on).
+       st.rerun()/st.stop() raise control-flow exceptions; the render is recorded either way."""
+    if not PAGE_PROFILING or _current_record.get() is not None:
+        yield
+        return
+    record = {"ts": time.time(), "page": page, "render": render, "wall_ms": 0.0, "totals": {}, "calls": []}
+    token = _current_record.set(record)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record["wall_ms"] = round((time.perf_counter() - start) * 1000, 2)
+        _current_record.reset(token)
+        for totals in record["totals"].values():
+            totals["ms"] = round(totals["ms"], 2)
+        history = st.session_state.setdefault("_page_profiles", deque(maxlen=PAGE_PROFILE_HISTORY))
+        history.append(record)
+        _write_log(record)
+
+def profile_render(fn):
+    """Decorator form of page_render_profile for render_* functions."""
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        with page_render_profile(st.session_state.get("page", ""), fn.__name__):
+            return fn(*args, **kwargs)
+    return wrapper
+
+def get_page_profiles() -> List[Dict[str, Any]]:
+    """This session's recent renders, oldest first."""
+    return list(st.session_state.get("_page_profiles", []))
+
+def slowest_calls(record: Dict[str, Any], limit: int = 5) -> List[Dict[str, Any]]:
+    return sorted(record.get("calls", []), key=lambda c: -c["ms"])[:limit]
@@ -0,0 +1,21 @@
+import os
+import hashlib
+from typing import Dict, Any, Optional
+from services.shared_cache_service import cache_get, cache_set
+
+# Extracted PDF text is kept in the shared cache (see shared_cache_service), keyed by the file's SHA-256,
+# so re-uploading a file that any app process has already extracted skips extraction.
+PDF_CACHE_NAMESPACE = "pdf_text"
+PDF_CACHE_TTL_DAYS = float(os.environ.get("PDF_CACHE_TTL_DAYS", "30"))
+
+def pdf_digest(pdf_bytes: bytes) -> str:
+    return hashlib.sha256(pdf_bytes).hexdigest()
+
+def load_cached_pdf_text(digest: str) -> Optional[Dict[str, Any]]:
+    """Cached extraction for a file digest, or None."""
+    data = cache_get(PDF_CACHE_NAMESPACE, digest)
+    return data if isinstance(data, dict) else None
+
+def store_cached_pdf_text(digest: str, data: Dict[str, Any]):
+    """Stores an extraction; the shared cache writes atomically and evicts least recently used entries."""
+    cache_set(PDF_CACHE_NAMESPACE, digest, data, PDF_CACHE_TTL_DAYS * 86400)
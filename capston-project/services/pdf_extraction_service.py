@@ -0,0 +1,194 @@
+import os
+import io
+import tempfile
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, Future
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from typing import List, Tuple, Iterator, Optional, Callable
+from services.pdf_cache_service import pdf_digest, load_cached_pdf_text, store_cached_pdf_text
+
+# Upload limits (all overridable from .env); pages beyond PDF_MAX_PAGES are ignored
+PDF_MAX_PAGES = int(os.environ.get("PDF_MAX_PAGES", "300"))
+PDF_MAX_MB = float(os.environ.get("PDF_MAX_MB", "50"))
+PDF_EXTRACTION_WORKERS = int(os.environ.get("PDF_EXTRACTION_WORKERS", str(min(4, os.cpu_count() or 2))))
+# Pages extracted per worker task: small enough to stream progress, large enough to amortize opening the file
+PDF_PAGES_PER_TASK = 8
+
+class PdfExtractionError(Exception):
+    """The upload is too large or cannot be read as a PDF."""
+
+@dataclass
+class ExtractedChunk:
+    pages: List[Tuple[int, str]]   # (1-based page number, text) of the pages in this chunk that had text
+    pages_done: int                # pages processed so far, in page order
+    pages_total: int               # pages that will be processed (after the page cap)
+    page_count: int                # pages in the document
+
+@dataclass
+class PdfText:
+    text: str = ""
+    page_offsets: List[Tuple[int, int]] = field(default_factory=list)  # (page number, offset of its text in `text`)
+    page_count: int = 0            # pages in the document
+    pages_read: int = 0            # pages processed before extraction stopped
+    truncated: bool = False        # stopped by the page cap or the character budget
+
+    @property
+    def last_page(self) -> int:
+        """Last page whose text is included."""
+        return self.page_offsets[-1][0] if self.page_offsets else 0
+
+# Worker-side reader of the file being extracted, so each worker parses the document structure once
+_worker_reader: Tuple[Optional[str], object] = (None, None)
+
+def _read_page_range(path: str, start: int, end: int) -> List[Tuple[int, str]]:
+    """Worker: text of pages [start, end) of the PDF at `path`, skipping pages without text."""
+    global _worker_reader
+    import PyPDF2
+    if _worker_reader[0] != path:
+        with open(path, "rb") as f:
+            _worker_reader = (path, PyPDF2.PdfReader(io.BytesIO(f.read())))
+    reader = _worker_reader[1]
+    pages = []
+    for index in range(start, end):
+        try:
+            text = reader.pages[index].extract_text() or ""
+        except Exception as e:  # one malformed page should not lose the whole document
+            print(f"Could not extract text from PDF page {index + 1}: {e}")
+            text = ""
+        if text.strip():
+            pages.append((index + 1, text))
+    return pages
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+def _get_pool() -> ProcessPoolExecutor:
+    """Process-wide extraction pool. Spawned workers, since forking a threaded Streamlit server is unsafe."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=PDF_EXTRACTION_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+def _reset_pool():
+    global _pool
+    with _pool_lock:
+        _pool = None
+
+def count_pdf_pages(pdf_bytes: bytes) -> int:
+    import PyPDF2
+    try:
+        return len(PyPDF2.PdfReader(io.BytesIO(pdf_bytes)).pages)
+    except Exception as e:
+        raise PdfExtractionError(f"The file could not be read as a PDF: {e}")
+
+def stream_pdf_text(pdf_bytes: bytes, max_pages: int = PDF_MAX_PAGES) -> Iterator[ExtractedChunk]:
+    """Extracts page text on the process pool and yields it in page order as soon as each chunk is ready.
+       Closing the iterator early cancels the chunks that have not started yet."""
+    if len(pdf_bytes) > PDF_MAX_MB * 1024 * 1024:
+        raise PdfExtractionError(f"The PDF is larger than {PDF_MAX_MB:.0f} MB.")
+    page_count = count_pdf_pages(pdf_bytes)
+    pages_total = min(page_count, max_pages)
+    if pages_total == 0:
+        return
+    # Workers read the upload from a temporary file instead of receiving the bytes with every task
+    fd, path = tempfile.mkstemp(suffix=".pdf")
+    futures: List[Future] = []
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(pdf_bytes)
+        ranges = [(start, min(start + PDF_PAGES_PER_TASK, pages_total)) for start in range(0, pages_total, PDF_PAGES_PER_TASK)]
+        try:
+            pool = _get_pool()
+            futures = [pool.submit(_read_page_range, path, start, end) for start, end in ranges]
+        except (BrokenProcessPool, RuntimeError, OSError) as e:
+            print(f"PDF extraction pool unavailable, extracting in-process: {e}")
+            _reset_pool()
+            futures = []
+        for i, (start, end) in enumerate(ranges):
+            if futures:
+                try:
+                    pages = futures[i].result()
+                except BrokenProcessPool:
+                    _reset_pool()
+                    pages = _read_page_range(path, start, end)
+            else:
+                pages = _read_page_range(path, start, end)
+            yield ExtractedChunk(pages=pages, pages_done=end, pages_total=pages_total, page_count=page_count)
+    finally:
+        for future in futures:
+            future.cancel()
+        try:
+            os.remove(path)
+        except OSError:
+            pass  # a worker still reading it on Windows; the OS temp cleanup removes it later
+
+def _limit_text(result: PdfText, max_chars: Optional[int]) -> PdfText:
+    """View of an extraction cut to the prompt budget."""
+    if max_chars is None or len(result.text) <= max_chars:
+        return result
+    return PdfText(
+        text=result.text[:max_chars],
+        page_offsets=[(page, offset) for page, offset in result.page_offsets if offset < max_chars],
+        page_count=result.page_count, pages_read=result.pages_read, truncated=True
+    )
+
+def _from_cache(digest: str, max_chars: Optional[int], max_pages: int) -> Optional[PdfText]:
+    """A cached extraction that covers this request: every page up to the cap, or enough text for the budget."""
+    data = load_cached_pdf_text(digest)
+    if not data:
+        return None
+    cached = PdfText(text=data.get("text", ""), page_offsets=[tuple(p) for p in data.get("page_offsets", [])],
+                     page_count=data.get("page_count", 0), pages_read=data.get("pages_read", 0))
+    if cached.pages_read > max_pages:
+        # Cached with a higher page cap: drop the pages beyond this one
+        beyond = [offset for page, offset in cached.page_offsets if page > max_pages]
+        if beyond:
+            cached.text = cached.text[:beyond[0]].rstrip("\n")
+            cached.page_offsets = [(page, offset) for page, offset in cached.page_offsets if page <= max_pages]
+        cached.pages_read = max_pages
+    covers_all_pages = cached.pages_read >= min(cached.page_count, max_pages)
+    if not covers_all_pages and (max_chars is None or len(cached.text) < max_chars):
+        return None
+    cached.truncated = cached.pages_read < cached.page_count
+    return _limit_text(cached, max_chars)
+
+def extract_pdf_text(pdf_bytes: bytes, max_chars: Optional[int] = None, max_pages: int = PDF_MAX_PAGES,
+                     on_progress: Optional[Callable[[int, int], None]] = None, use_cache: bool = True) -> PdfText:
+    """Collects streamed page text. With max_chars, extraction stops as soon as enough text has been read,
+       so generation can start without waiting for the rest of a long document.
+       on_progress(pages_done, pages_total) is called from the calling thread after every chunk.
+       Results are cached on disk by the SHA-256 of the file, so a re-upload skips extraction."""
+    digest = pdf_digest(pdf_bytes) if use_cache else ""
+    if use_cache:
+        cached = _from_cache(digest, max_chars, max_pages)
+        if cached is not None:
+            return cached
+    result = PdfText()
+    parts: List[str] = []
+    length = 0
+    chunks = stream_pdf_text(pdf_bytes, max_pages=max_pages)
+    try:
+        for chunk in chunks:
+            result.pages_read, result.page_count = chunk.pages_done, chunk.page_count
+            for page_number, text in chunk.pages:
+                result.page_offsets.append((page_number, length))
+                parts.append(text)
+                length += len(text) + 1
+            if on_progress:
+                on_progress(chunk.pages_done, chunk.pages_total)
+            if max_chars is not None and length >= max_chars and chunk.pages_done < chunk.pages_total:
+                break
+    finally:
+        chunks.close()
+    result.text = "\n".join(parts)
+    result.truncated = result.pages_read < result.page_count
+    if use_cache and result.page_count:
+        # The whole extracted text is cached; the budget only limits what is returned
+        store_cached_pdf_text(digest, {
+            "text": result.text, "page_offsets": result.page_offsets,
+            "page_count": result.page_count, "pages_read": result.pages_read
+        })
+    return _limit_text(result, max_chars)
@@ -0,0 +1,128 @@
+import streamlit as st
+import os
+import time
+import threading
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Deque, Optional, Tuple
+from services.llm_service import generate_content
+
+# Pool tuning (all overridable from .env)
+PREGEN_ENABLED = os.environ.get("PREGEN_ENABLED", "0") == "1"              # opt-in: background generation costs LLM calls
+PREGEN_POOL_SIZE = int(os.environ.get("PREGEN_POOL_SIZE", "2"))             # ready-made items kept per configuration
+PREGEN_TOP_CONFIGS = int(os.environ.get("PREGEN_TOP_CONFIGS", "10"))        # how many popular configurations are warmed
+PREGEN_MIN_REQUESTS = int(os.environ.get("PREGEN_MIN_REQUESTS", "2"))       # requests before a configuration counts as popular
+PREGEN_MAX_CALLS_PER_HOUR = int(os.environ.get("PREGEN_MAX_CALLS_PER_HOUR", "30"))  # spending cap for background LLM calls
+PREGEN_MAX_WORKERS = int(os.environ.get("PREGEN_MAX_WORKERS", "2"))
+PREGEN_TRACKED_CONFIGS = int(os.environ.get("PREGEN_TRACKED_CONFIGS", "500"))  # request counts kept before they decay
+
+PoolKey = Tuple[str, str, str] # (kind, model_name, prompt)
+
+class PregenerationPool:
+    """Keeps a few ready-made LLM responses for the most requested quiz/assignment configurations.
+
+    A configuration is identified by its prompt (which is fully determined by topic, difficulty, etc.)
+    and model. Every pooled response is handed out once, and taking one triggers an async refill.
+    """
+
+    def __init__(self, pool_size: int = PREGEN_POOL_SIZE, top_configs: int = PREGEN_TOP_CONFIGS,
+                 min_requests: int = PREGEN_MIN_REQUESTS, max_calls_per_hour: int = PREGEN_MAX_CALLS_PER_HOUR,
+                 max_workers: int = PREGEN_MAX_WORKERS, tracked_configs: int = PREGEN_TRACKED_CONFIGS):
+        self.pool_size = pool_size
+        self.top_configs = top_configs
+        self.min_requests = min_requests
+        self.max_calls_per_hour = max_calls_per_hour
+        self.tracked_configs = tracked_configs
+        self._lock = threading.Lock()
+        self._request_counts: Counter = Counter()
+        self._pools: Dict[PoolKey, Deque[str]] = {}
+        self._in_flight: Counter = Counter()
+        self._call_times: Deque[float] = deque()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="pregen")
+
+    def take(self, kind: str, prompt: str, model_name: Optional[str] = None) -> Optional[str]:
+        """Records a request and returns a pooled response for it, or None if the pool is empty."""
+        key = (kind, model_name or "", prompt)
+        with self._lock:
+            self._record_request(key)
+            pool = self._pools.get(key)
+            response = pool.popleft() if pool else None
+        self._schedule_refill(key)
+        return response
+
+    def stats(self) -> Dict[str, int]:
+        """Small summary for debugging/monitoring."""
+        with self._lock:
+            self._prune_call_times()
+            return {
+                "tracked_configs": len(self._request_counts),
+                "pooled_items": sum(len(p) for p in self._pools.values()),
+                "in_flight": sum(self._in_flight.values()),
+                "calls_last_hour": len(self._call_times),
+            }
+
+    def _record_request(self, key: PoolKey):
+        """Counts a request. Once more than tracked_configs configurations are counted, every count is halved
+           and the ones reaching zero are dropped, so one-off configurations age out and old popularity decays."""
+        self._request_counts[key] += 1
+        if len(self._request_counts) > self.tracked_configs:
+            for k in list(self._request_counts):
+                self._request_counts[k] //= 2
+                if not self._request_counts[k]:
+                    del self._request_counts[k]
+                    if not self._in_flight[k]:
+                        self._in_flight.pop(k, None)
+                        self._pools.pop(k, None)
+
+    def _is_popular(self, key: PoolKey) -> bool:
+        if self._request_counts[key] < self.min_requests:
+            return False
+        top = [k for k, _ in self._request_counts.most_common(self.top_configs)]
+        return key in top
+
+    def _prune_call_times(self):
+        cutoff = time.time() - 3600
+        while self._call_times and self._call_times[0] < cutoff:
+            self._call_times.popleft()
+
+    def _schedule_refill(self, key: PoolKey):
+        with self._lock:
+            if not self._is_popular(key):
+                return
+            self._prune_call_times()
+            missing = self.pool_size - len(self._pools.get(key, ())) - self._in_flight[key]
+            budget_left = self.max_calls_per_hour - len(self._call_times)
+            to_start = max(0, min(missing, budget_left))
+            for _ in range(to_start):
+                # Reserve the budget up front so concurrent reruns cannot overspend
+                self._call_times.append(time.time())
+                self._in_flight[key] += 1
+        for _ in range(to_start):
+            self._executor.submit(self._refill, key)
+
+    def _refill(self, key: PoolKey):
+        kind, model_name, prompt = key
+        try:
+            response = generate_content(prompt, show_spinner=False, model_name=model_name or None)
+        except Exception as e:
+            print(f"Pre-generation for {kind} failed: {e}")
+            response = None
+        with self._lock:
+            self._in_flight[key] -= 1
+            if not self._in_flight[key]:
+                del self._in_flight[key]
+            if response:
+                self._pools.setdefault(key, deque()).append(response)
+
+@st.cache_resource
+def get_pregeneration_pool() -> PregenerationPool:
+    """One pool per server process, shared by all sessions."""
+    return PregenerationPool()
+
+def generate_with_pool(kind: str, prompt: str, model_name: Optional[str] = None, show_spinner: bool = True) -> Optional[str]:
+    """Drop-in replacement for generate_content that serves popular configurations from the warm pool."""
+    if PREGEN_ENABLED:
+        pooled = get_pregeneration_pool().take(kind, prompt, model_name)
+        if pooled:
+            return pooled
+    return generate_content(prompt, show_spinner=show_spinner, model_name=model_name)
@@ -0,0 +1,195 @@
+import os
+import json
+import math
+import uuid
+from dataclasses import dataclass, field
+from typing import List, Dict, Any, Optional, Tuple
+from services.code_execution_service import run_code
+from services.static_analysis_service import required_definitions
+
+# Measured time per profile run; sizes double from PROFILE_START_N until the budget or PROFILE_MAX_N is reached
+PROFILE_TIME_BUDGET = float(os.environ.get("PROFILE_TIME_BUDGET", "2"))
+PROFILE_START_N = 8
+PROFILE_MAX_N = int(os.environ.get("PROFILE_MAX_N", "65536"))
+PROFILE_CPU_SECONDS = int(os.environ.get("PROFILE_CPU_SECONDS", "10"))
+PROFILE_WALL_SECONDS = float(os.environ.get("PROFILE_WALL_SECONDS", "20"))
+MIN_PROFILE_POINTS = 4
+
+# The harness loads the solution as a module, builds inputs with the assignment's make_input(n) outside the
+# timed region, keeps the best of a few runs per size, measures peak memory of one extra run with
+# tracemalloc (kept separate so tracing does not inflate the timings) and prints a JSON report after a marker.
+_PROFILE_HARNESS = '''
+import json as _json, time as _time, random as _random, tracemalloc as _tracemalloc
+_ns = {{"__name__": "solution"}}
+exec(compile({solution!r}, "solution.py", "exec"), _ns)
+_gen = {{"__name__": "input_generator"}}
+exec(compile({generator!r}, "input_generator.py", "exec"), _gen)
+_entry = _gen.get("ENTRY_POINT") or {entry!r}
+_report = {{"entry": _entry, "points": [], "error": None}}
+
+def _args_for(n):
+    _random.seed(n)
+    args = _gen["make_input"](n)
+    return args if isinstance(args, tuple) else (args,)
+
+try:
+    _fn = _ns[_entry]
+    _n, _spent = {start_n}, 0.0
+    while _n <= {max_n} and _spent < {budget}:
+        _best = None
+        for _repeat in range(5):
+            _args = _args_for(_n)
+            _start = _time.perf_counter()
+            _fn(*_args)
+            _elapsed = _time.perf_counter() - _start
+            _spent += _elapsed
+            _best = _elapsed if _best is None else min(_best, _elapsed)
+            if _elapsed > 0.05:  # slow sizes are measured once
+                break
+        _args = _args_for(_n)
+        _tracemalloc.start()
+        _start = _time.perf_counter()
+        _fn(*_args)
+        _spent += _time.perf_counter() - _start
+        _peak = _tracemalloc.get_traced_memory()[1]
+        _tracemalloc.stop()
+        _report["points"].append({{"n": _n, "time": _best, "peak_kb": _peak / 1024}})
+        # Stop before a doubling that would likely blow the budget (assumes at most cubic growth)
+        if _spent + _best * 8 * 2 > {budget}:
+            break
+        _n *= 2
+except Exception as _e:
+    _report["error"] = type(_e).__name__ + ": " + str(_e)
+print({marker!r} + _json.dumps(_report))
+'''
+
+COMPLEXITY_CLASSES: List[Tuple[str, Any]] = [
+    ("O(1)", lambda n: 1.0),
+    ("O(log n)", lambda n: math.log2(n)),
+    ("O(n)", lambda n: float(n)),
+    ("O(n log n)", lambda n: n * math.log2(n)),
+    ("O(n^2)", lambda n: float(n) ** 2),
+    ("O(n^3)", lambda n: float(n) ** 3),
+]
+_CLASS_RANK = {name: i for i, (name, _) in enumerate(COMPLEXITY_CLASSES)}
+
+@dataclass
+class ProfileResult:
+    points: List[Dict[str, float]] = field(default_factory=list)   # {n, time (s), peak_kb}
+    time_class: str = ""
+    memory_class: str = ""
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return not self.error and len(self.points) >= MIN_PROFILE_POINTS
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"points": self.points, "time_class": self.time_class, "memory_class": self.memory_class, "error": self.error}
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict[str, Any]]) -> Optional["ProfileResult"]:
+        if not data:
+            return None
+        return cls(points=data.get("points", []), time_class=data.get("time_class", ""),
+                   memory_class=data.get("memory_class", ""), error=data.get("error"))
+
+# Timings below this are dominated by call overhead and timer noise
+TIME_NOISE_FLOOR = 1e-4
+# Classes are fitted on the sizes within this factor of the largest one, where the leading term dominates
+FIT_SIZE_RANGE = 64
+
+def _relative_residual(points: List[Tuple[int, float]], f) -> float:
+    """Residual of the least squares fit value = c * f(n) in log space: how far value / f(n) is from constant,
+       as a relative error, so small and large sizes count alike."""
+    deviations = [math.log(v) - math.log(f(n)) for n, v in points]
+    mean = sum(deviations) / len(deviations)
+    return sum((d - mean) ** 2 for d in deviations)
+
+def fit_complexity(sizes: List[int], values: List[float], noise_floor: float = 0.0) -> str:
+    """Empirical complexity class from measurements at growing n: every class of COMPLEXITY_CLASSES is fitted
+       to the measurements and the one with the smallest residual wins (a single log-log slope cannot tell
+       n from n log n at the measured sizes). Returns "" with too few points."""
+    points = [(n, v) for n, v in zip(sizes, values) if n > 1 and v > 0]
+    if len(points) < MIN_PROFILE_POINTS:
+        return ""
+    reliable = [(n, v) for n, v in points if v >= noise_floor]
+    if len(reliable) >= MIN_PROFILE_POINTS:
+        points = reliable
+    elif points[-1][1] < noise_floor:
+        # Never slow enough to measure: constant (or logarithmic) work per call
+        return "O(1)"
+    largest = [(n, v) for n, v in points if n * FIT_SIZE_RANGE >= points[-1][0]]
+    if len(largest) >= MIN_PROFILE_POINTS:
+        points = largest
+    return min(COMPLEXITY_CLASSES, key=lambda item: _relative_residual(points, item[1]))[0]
+
+def profile_code(code: str, input_generator: str, entry_point: str = "solve_problem") -> ProfileResult:
+    """Runs the code on inputs of growing size in the sandbox and fits its time and memory complexity."""
+    marker = f"__PROFILE_{uuid.uuid4().hex}__"
+    program = _PROFILE_HARNESS.format(
+        solution=code or "", generator=input_generator or "", entry=entry_point, marker=marker,
+        start_n=PROFILE_START_N, max_n=PROFILE_MAX_N, budget=PROFILE_TIME_BUDGET
+    )
+    execution = run_code(program, cpu_seconds=PROFILE_CPU_SECONDS, wall_seconds=PROFILE_WALL_SECONDS)
+    report = None
+    for line in execution.stdout.splitlines():
+        if line.startswith(marker):
+            try:
+                report = json.loads(line[len(marker):])
+            except ValueError:
+                report = None
+    if report is None:
+        return ProfileResult(error=execution.exception or "The profiling run did not report any measurements.")
+    result = ProfileResult(points=report.get("points", []), error=report.get("error"))
+    sizes = [p["n"] for p in result.points]
+    result.time_class = fit_complexity(sizes, [p["time"] for p in result.points], noise_floor=TIME_NOISE_FLOOR)
+    # Memory is exact, so any allocation growth is real; constant allocations are O(1)
+    peaks = [p["peak_kb"] for p in result.points]
+    result.memory_class = fit_complexity(sizes, peaks) if peaks and max(peaks) > 1 else ("O(1)" if peaks else "")
+    return result
+
+def profile_entry_point(code_template: str) -> str:
+    """Function profiled when the input generator sets no ENTRY_POINT: the template's first top-level function."""
+    functions = [name for name in required_definitions(code_template) if "." not in name and not name[:1].isupper()]
+    return functions[0] if functions else "solve_problem"
+
+def load_reference_profile(assignment_details: Dict[str, Any]) -> Optional[ProfileResult]:
+    """The reference profile stored with the assignment at creation time (JSON string or dict)."""
+    data = assignment_details.get("reference_profile")
+    if isinstance(data, str):
+        try:
+            data = json.loads(data)
+        except ValueError:
+            data = None
+    return ProfileResult.from_dict(data)
+
+def _format_time(seconds: float) -> str:
+    return f"{seconds * 1000:.2f} ms" if seconds < 1 else f"{seconds:.2f} s"
+
+def format_profile_report(profile: ProfileResult, reference: Optional[ProfileResult] = None) -> str:
+    """Short plain-text summary of the measured performance, suitable for an LLM prompt and for feedback."""
+    if not profile.points:
+        return f"Performance profile: could not be measured ({profile.error or 'no measurements'})."
+    largest = profile.points[-1]
+    lines = [
+        f"Performance profile (measured on generated inputs up to n={largest['n']}):",
+        f"  Empirical time complexity: {profile.time_class or 'undetermined'}; "
+        f"{_format_time(largest['time'])} at n={largest['n']}; peak memory {largest['peak_kb']:.0f} KB ({profile.memory_class or 'undetermined'}).",
+    ]
+    if profile.error:
+        lines.append(f"  Stopped early: {profile.error}")
+    if reference and reference.points:
+        lines.append(f"  Reference solution: {reference.time_class or 'undetermined'} time, {reference.memory_class or 'undetermined'} memory.")
+        common = {p["n"]: p for p in reference.points}
+        shared = [p for p in profile.points if p["n"] in common]
+        if shared:
+            point = shared[-1]
+            ref_point = common[point["n"]]
+            ratio = point["time"] / ref_point["time"] if ref_point["time"] > 0 else 0
+            lines.append(f"  At n={point['n']}: {_format_time(point['time'])} vs {_format_time(ref_point['time'])} for the reference ({ratio:.1f}x).")
+        if profile.time_class and reference.time_class and _CLASS_RANK[profile.time_class] > _CLASS_RANK[reference.time_class]:
+            lines.append(f"  The submission scales worse than the reference ({profile.time_class} vs {reference.time_class}).")
+        if profile.points[-1]["n"] < reference.points[-1]["n"]:
+            lines.append(f"  The submission ran out of time budget at n={profile.points[-1]['n']}, the reference reached n={reference.points[-1]['n']}.")
+    return "\n".join(lines)
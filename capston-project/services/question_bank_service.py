@@ -0,0 +1,106 @@
+import hashlib
+import re
+from typing import List, Dict, Any, Tuple
+from models.question import Question
+
+# Words that carry no topical meaning and would make every question match every topic
+TOPIC_STOPWORDS = {
+    "a", "an", "and", "the", "of", "in", "on", "for", "to", "with", "by", "at", "or",
+    "is", "are", "be", "as", "from", "into", "about", "basics", "basic", "intro", "introduction"
+}
+
+QUESTION_TYPES = ["mcq", "fill_blank", "true_false", "open_ended"]
+
+def normalize_question_text(text: str) -> str:
+    """Lowercase the question text, drop punctuation and collapse whitespace so trivially different stems compare equal."""
+    text = (text or "").lower()
+    text = re.sub(r'[^\w\s]', ' ', text)
+    return ' '.join(text.split())
+
+def question_text_hash(question_text: str, question_type: str = "mcq", difficulty: str = "") -> str:
+    """Stable hash used to deduplicate questions (same stem + same type = same question). The bank also
+       passes the difficulty, so the same stem saved at another difficulty is a separate bank entry."""
+    key = f"{question_type}:{normalize_question_text(question_text)}"
+    if difficulty:
+        key = f"{difficulty.lower()}:{key}"
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+def extract_topic_tokens(topics: str) -> List[str]:
+    """Split a free-text topics string into sorted, unique lowercase tokens for the bank index."""
+    tokens = re.split(r'[^\w+#]+', (topics or "").lower())
+    return sorted({t for t in tokens if len(t) > 1 and t not in TOPIC_STOPWORDS})
+
+def question_to_bank_row(q: Question, topics: str, difficulty: str, teacher_id: str, shared: bool = False) -> Dict[str, Any]:
+    """Build a question_bank row from a Question. Rows belong to the teacher who saved them; shared rows
+       are also offered to other teachers who opt in."""
+    question_type = getattr(q, "question_type", "mcq")
+    return {
+        "teacher_id": teacher_id,
+        "shared": shared,
+        "text_hash": question_text_hash(q.question, question_type, difficulty),
+        "question": q.question,
+        "answers": list(q.answers),
+        "correct_answer": q.correct_answer,
+        "question_type": question_type,
+        "difficulty": difficulty,
+        "topic_tokens": extract_topic_tokens(topics),
+    }
+
+def bank_row_to_question(row: Dict[str, Any], question_id: int) -> Question:
+    """Rebuild a Question from a question_bank row."""
+    return Question(
+        id=question_id,
+        question=row["question"],
+        answers=row.get("answers") or [],
+        correct_answer=row.get("correct_answer", -1),
+        question_type=row.get("question_type", "mcq"),
+    )
+
+def select_bank_questions(rows: List[Dict[str, Any]], counts: Dict[str, int], topics: str, num_options: int) -> Tuple[List[Question], Dict[str, int]]:
+    """Pick up to counts[question_type] bank rows per type, best topic overlap first.
+       Returns the selected questions and the per-type shortfall that still has to be generated."""
+    wanted_tokens = set(extract_topic_tokens(topics))
+    by_type: Dict[str, List[Dict[str, Any]]] = {t: [] for t in QUESTION_TYPES}
+    seen_hashes = set()
+    for row in rows:
+        q_type = row.get("question_type", "mcq")
+        if q_type not in by_type or row.get("text_hash") in seen_hashes:
+            continue
+        # MCQs must match the requested option count so the quiz looks consistent
+        if q_type == "mcq" and len(row.get("answers") or []) != num_options:
+            continue
+        seen_hashes.add(row.get("text_hash"))
+        by_type[q_type].append(row)
+
+    selected: List[Question] = []
+    shortfall: Dict[str, int] = {}
+    for q_type in QUESTION_TYPES:
+        wanted = counts.get(q_type, 0)
+        candidates = sorted(
+            by_type[q_type],
+            key=lambda r: len(wanted_tokens.intersection(r.get("topic_tokens") or [])),
+            reverse=True
+        )
+        for row in candidates[:wanted]:
+            selected.append(bank_row_to_question(row, len(selected) + 1))
+        shortfall[q_type] = max(wanted - min(wanted, len(candidates)), 0)
+    return selected, shortfall
+
+def merge_question_lists(bank_questions: List[Question], generated_questions: List[Question]) -> List[Question]:
+    """Concatenate bank and freshly generated questions, dropping duplicates and renumbering ids from 1."""
+    merged = []
+    seen_hashes = set()
+    for q in list(bank_questions) + list(generated_questions):
+        h = question_text_hash(q.question, q.question_type)
+        if h in seen_hashes:
+            continue
+        seen_hashes.add(h)
+        merged.append(Question(
+            id=len(merged) + 1,
+            question=q.question,
+            answers=q.answers,
+            correct_answer=q.correct_answer,
+            question_type=q.question_type,
+            source=q.source,
+        ))
+    return merged
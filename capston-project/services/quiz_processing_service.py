@@ -28,6 +28,7 @@ def parse_llm_questions(response: str) -> List[Question]:
     type_pattern = re.compile(r'^(MCQ|FILL|TF|OPEN)\s*(\d+)[:\.\)]\s*(.+)', re.IGNORECASE)
     answer_pattern = re.compile(r'^([A-Z])[:\.\)]\s*(.+)', re.IGNORECASE)
     fill_answer_pattern = re.compile(r'^Answer:\s*(.+)', re.IGNORECASE)
+    source_pattern = re.compile(r'^Source:\s*(.+)', re.IGNORECASE)
     
     current_type = None
     current_question_text = None
@@ -35,6 +36,7 @@ def parse_llm_questions(response: str) -> List[Question]:
     correct_answer_index = -1
     question_id_counter = 1
     tf_correct = None
+    current_source = ""
     
     for line in lines:
         line = line.strip()
@@ -43,6 +45,7 @@ def parse_llm_questions(response: str) -> List[Question]:
         type_match = type_pattern.match(line)
         answer_match = answer_pattern.match(line)
         fill_answer_match = fill_answer_pattern.match(line)
+        source_match = source_pattern.match(line)
         
         if type_match:
             # Save previous question if exists
@@ -55,7 +58,8 @@ def parse_llm_questions(response: str) -> List[Question]:
                         question=current_question_text,
                         answers=current_answers,
                         correct_answer=correct_answer_index,
-                        question_type='mcq'
+                        question_type='mcq',
+                        source=current_source
                     ))
                 elif current_type == 'FILL':
                     # Only one answer, correct_answer is always 0
@@ -69,7 +73,8 @@ def parse_llm_questions(response: str) -> List[Question]:
                         question=current_question_text,
                         answers=current_answers,
                         correct_answer=0,
-                        question_type='fill_blank'
+                        question_type='fill_blank',
+                        source=current_source
                     ))
                 elif current_type == 'TF':
                     # Always two options: True/False
@@ -78,7 +83,8 @@ def parse_llm_questions(response: str) -> List[Question]:
                         question=current_question_text,
                         answers=["True", "False"],
                         correct_answer=tf_correct if tf_correct is not None else 0,
-                        question_type='true_false'
+                        question_type='true_false',
+                        source=current_source
                     ))
                 elif current_type == 'OPEN':
                     questions.append(Question(
@@ -86,7 +92,8 @@ def parse_llm_questions(response: str) -> List[Question]:
                         question=current_question_text,
                         answers=[],
                         correct_answer=-1,
-                        question_type='open_ended'
+                        question_type='open_ended',
+                        source=current_source
                     ))
                 question_id_counter += 1
             # Start new question
@@ -95,6 +102,10 @@ def parse_llm_questions(response: str) -> List[Question]:
             current_answers = []
             correct_answer_index = -1
             tf_correct = None
+            current_source = ""
+        elif source_match and current_type:
+            # Grounded quizzes cite the passage each question came from, e.g. "Source: [S3]"
+            current_source = source_match.group(1).strip()
         elif answer_match and current_type == 'MCQ':
             text = answer_match.group(2).strip()
             if "**" in text:
@@ -124,7 +135,8 @@ def parse_llm_questions(response: str) -> List[Question]:
                 question=current_question_text,
                 answers=current_answers,
                 correct_answer=correct_answer_index,
-                question_type='mcq'
+                question_type='mcq',
+                source=current_source
             ))
         elif current_type == 'FILL':
             if current_answers:
@@ -136,7 +148,8 @@ def parse_llm_questions(response: str) -> List[Question]:
                 question=current_question_text,
                 answers=current_answers,
                 correct_answer=0,
-                question_type='fill_blank'
+                question_type='fill_blank',
+                source=current_source
             ))
         elif current_type == 'TF':
             questions.append(Question(
@@ -144,7 +157,8 @@ def parse_llm_questions(response: str) -> List[Question]:
                 question=current_question_text,
                 answers=["True", "False"],
                 correct_answer=tf_correct if tf_correct is not None else 0,
-                question_type='true_false'
+                question_type='true_false',
+                source=current_source
             ))
         elif current_type == 'OPEN':
             questions.append(Question(
@@ -152,10 +166,18 @@ def parse_llm_questions(response: str) -> List[Question]:
                 question=current_question_text,
                 answers=[],
                 correct_answer=-1,
-                question_type='open_ended'
+                question_type='open_ended',
+                source=current_source
             ))
     return questions
 
+def _normalize_fill_answer(s: str) -> str:
+    """Compare after stripping, lowering, removing spaces, and basic singular/plural normalization."""
+    s = s.strip().lower().replace(' ', '')
+    if s.endswith('s') and len(s) > 1:
+        s = s[:-1]
+    return s
+
 def calculate_quiz_score(questions: List[Question], user_answers: Dict[int, int]) -> tuple:
     """Calculate the quiz score from Question objects and user's answers (by index or string)."""
     if not questions:
@@ -171,13 +193,7 @@ def calculate_quiz_score(questions: List[Question], user_answers: Dict[int, int]
         elif q.question_type == "fill_blank":
             total_auto_graded += 1
             if isinstance(user_answer, str) and q.answers and len(q.answers) > 0:
-                # Compare after stripping, lowering, removing spaces, and basic singular/plural normalization
-                def normalize(s):
-                    s = s.strip().lower().replace(' ', '')
-                    if s.endswith('s') and len(s) > 1:
-                        s = s[:-1]
-                    return s
-                if normalize(user_answer) == normalize(q.answers[0]):
+                if _normalize_fill_answer(user_answer) == _normalize_fill_answer(q.answers[0]):
                     correct_count += 1
         # open_ended: skip from auto-grading
     score_percentage = (correct_count / total_auto_graded) * 100 if total_auto_graded > 0 else 0.0
@@ -191,7 +207,8 @@ def generate_quiz_creation_prompt(
     num_true_false: int,
     num_open_ended: int,
     difficulty: str,
-    num_options: int
+    num_options: int,
+    source_passages: Optional[List[Tuple[str, str]]] = None
 ) -> str:
     """
     Build a few-shot prompt that:
@@ -199,6 +216,7 @@ def generate_quiz_creation_prompt(
       - TF: always as MCQ with two options: 'A) True', 'B) False', mark correct
       - Fill: use ____ and provide the correct answer after the question as 'Answer: ...' (single word or at most two words)
       - Open: leave unanswered
+    With source_passages [(label, text)], questions are restricted to those passages and cite them as 'Source: [label]'.
     """
     prompt = (
         "You are an expert instructional designer creating assessments for college-level students.\n"
@@ -227,6 +245,16 @@ def generate_quiz_creation_prompt(
         "A) **True**\n"
         "B) False\n\n"
         "OPEN 1. Explain how natural selection drives evolution over time.\n\n"
+    )
+    if source_passages:
+        prompt += (
+            "### Source material\n"
+            "Base every question only on the passages below. After each question (after its options or answer) "
+            "add a line `Source: [label]` naming the passage it came from.\n\n"
+            + "\n\n".join(f"[{label}] {text}" for label, text in source_passages)
+            + "\n\n"
+        )
+    prompt += (
         "----\n"
         "**Now, create the quiz:**\n"
     )
@@ -286,37 +314,106 @@ def parse_quiz_analysis(evaluation: str) -> Dict[str, str]:
     
     return result
 
-def create_quiz_summary_for_llm(questions: List[Question], user_answers: Dict[int, int]) -> str:
-    """Create a text summary of the quiz questions, options, user's answers, and correct answers for LLM analysis."""
-    quiz_summary = "QUIZ QUESTIONS, ANSWERS, AND USER PERFORMANCE:\n\n"
-    for i, q in enumerate(questions):
-        user_selected_option_index = user_answers.get(i, user_answers.get(q.db_id, -1))
-        user_answer_text = "Not answered"
-        # For MCQ/TF: index, for fill/open: string
-        if q.question_type in ["mcq", "true_false"]:
-            if q.answers and isinstance(user_selected_option_index, int) and 0 <= user_selected_option_index < len(q.answers):
-                user_answer_text = q.answers[user_selected_option_index]
-            user_choice_label = chr(65 + user_selected_option_index) if isinstance(user_selected_option_index, int) and user_selected_option_index != -1 and q.answers and 0 <= user_selected_option_index < len(q.answers) else "N/A"
-        else:
-            if isinstance(user_selected_option_index, str) and user_selected_option_index.strip():
-                user_answer_text = user_selected_option_index
-            user_choice_label = "N/A"
+# Rough token budget for the quiz summary embedded in generate_quiz_analysis_prompt
+QUIZ_SUMMARY_TOKEN_BUDGET = 1500
+COMPACT_STEM_CHARS = 90
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token for English text), good enough for budgeting prompts."""
+    return len(text) // 4 + 1
+
+def _shorten(text: str, limit: int = COMPACT_STEM_CHARS) -> str:
+    text = ' '.join((text or "").split())
+    return text if len(text) <= limit else text[:limit - 3].rstrip() + "..."
+
+def _describe_answers(q: Question, user_answer) -> Tuple[str, str, str]:
+    """Returns (status, user answer label, correct answer label) for one question.
+       status is one of 'correct', 'incorrect', 'unanswered', 'pending' (open-ended)."""
+    if q.question_type in ["mcq", "true_false"]:
+        answered = isinstance(user_answer, int) and q.answers and 0 <= user_answer < len(q.answers)
+        user_label = f"{chr(65 + user_answer)}) {q.answers[user_answer]}" if answered else "N/A) Not answered"
         if q.answers and 0 <= q.correct_answer < len(q.answers):
-            correct_answer_text = q.answers[q.correct_answer]
-            correct_choice_label = chr(65 + q.correct_answer)
-        elif q.question_type == "fill_blank" and q.answers:
-            correct_answer_text = q.answers[0]
-            correct_choice_label = "(text)"
-        elif q.question_type == "open_ended":
-            correct_answer_text = "Under evaluation"
-            correct_choice_label = "N/A"
+            correct_label = f"{chr(65 + q.correct_answer)}) {q.answers[q.correct_answer]}"
+        else:
+            correct_label = "N/A) (No correct answer)"
+        if not answered:
+            return "unanswered", user_label, correct_label
+        return ("correct" if user_answer == q.correct_answer else "incorrect"), user_label, correct_label
+    answered = isinstance(user_answer, str) and user_answer.strip()
+    user_label = f"N/A) {user_answer}" if answered else "N/A) Not answered"
+    if q.question_type == "fill_blank" and q.answers:
+        correct_label = f"(text)) {q.answers[0]}"
+        if not answered:
+            return "unanswered", user_label, correct_label
+        return ("correct" if _normalize_fill_answer(user_answer) == _normalize_fill_answer(q.answers[0]) else "incorrect"), user_label, correct_label
+    if q.question_type == "open_ended":
+        return ("pending" if answered else "unanswered"), user_label, "N/A) Under evaluation"
+    return ("unanswered" if not answered else "incorrect"), user_label, "N/A) (No correct answer)"
+
+def create_quiz_summary_for_llm(questions: List[Question], user_answers: Dict[int, int], max_tokens: Optional[int] = QUIZ_SUMMARY_TOKEN_BUDGET) -> str:
+    """Create a text summary of the quiz for LLM analysis within a token budget.
+       Incorrect, unanswered and open-ended questions come first with their options; correctly answered
+       ones are collapsed into one line each. Whatever does not fit in max_tokens is summarized as omitted."""
+    header = "QUIZ QUESTIONS, ANSWERS, AND USER PERFORMANCE:\n\n"
+    detailed: List[Tuple[str, str, str]] = [] # (status, full block, compact line)
+    compact: List[Tuple[str, str, str]] = []
+    for i, q in enumerate(questions):
+        user_answer = user_answers.get(i, user_answers.get(q.db_id, -1))
+        status, user_label, correct_label = _describe_answers(q, user_answer)
+        if status == "correct":
+            compact.append((status, "", f"Q{i+1} (correct): {_shorten(q.question)} | Answer: {correct_label}\n"))
+            continue
+        compact_line = f"Q{i+1} ({status}): {_shorten(q.question)} | User: {user_label} | Correct: {correct_label}\n"
+        block = [f"Question {i+1} ({status}): {q.question}\n"]
+        block.extend(f"  {chr(65+j)}) {ans_text}\n" for j, ans_text in enumerate(q.answers))
+        block.append(f"  User's answer: {user_label}\n")
+        block.append(f"  Correct answer: {correct_label}\n\n")
+        detailed.append((status, "".join(block), compact_line))
+
+    # Reserve room for the header and omission note so truncation never pushes the summary over budget
+    used = estimate_tokens(header) + (30 if max_tokens else 0)
+    omitted: Dict[str, int] = {}
+
+    def fits(cost: int) -> bool:
+        return max_tokens is None or used + cost <= max_tokens
+
+    # 1) every mistake gets at least a compact line, 2) upgrade mistakes to full blocks while budget allows
+    chosen: Dict[int, str] = {}
+    for idx, (status, _, compact_line) in enumerate(detailed):
+        cost = estimate_tokens(compact_line)
+        if fits(cost):
+            chosen[idx] = compact_line
+            used += cost
         else:
-            correct_answer_text = "(No correct answer)"
-            correct_choice_label = "N/A"
-        quiz_summary += f"Question {i+1}: {q.question}\n"
-        for j, ans_text in enumerate(q.answers):
-            option_label = chr(65+j)
-            quiz_summary += f"  {option_label}) {ans_text}\n"
-        quiz_summary += f"  User's answer: {user_choice_label}) {user_answer_text}\n"
-        quiz_summary += f"  Correct answer: {correct_choice_label}) {correct_answer_text}\n\n"
-    return quiz_summary 
\ No newline at end of file
+            omitted[status] = omitted.get(status, 0) + 1
+    for idx in chosen:
+        _, block, compact_line = detailed[idx]
+        extra = estimate_tokens(block) - estimate_tokens(compact_line)
+        if fits(extra):
+            chosen[idx] = block
+            used += extra
+    parts = [header]
+    parts.extend(chosen[idx] for idx in sorted(chosen))
+
+    # 3) correctly answered questions, one line each
+    correct_lines = []
+    if compact and fits(estimate_tokens("CORRECTLY ANSWERED:\n")):
+        used += estimate_tokens("CORRECTLY ANSWERED:\n")
+        for status, _, compact_line in compact:
+            cost = estimate_tokens(compact_line)
+            if fits(cost):
+                correct_lines.append(compact_line)
+                used += cost
+            else:
+                omitted[status] = omitted.get(status, 0) + 1
+    else:
+        for status, _, _ in compact:
+            omitted[status] = omitted.get(status, 0) + 1
+    if correct_lines:
+        parts.append(("" if parts[-1].endswith("\n\n") else "\n") + "CORRECTLY ANSWERED:\n")
+        parts.extend(correct_lines)
+
+    if omitted:
+        counts = ", ".join(f"{n} {status}" for status, n in omitted.items())
+        parts.append(f"\n[{sum(omitted.values())} more question(s) omitted for length: {counts}]\n")
+    return "".join(parts)
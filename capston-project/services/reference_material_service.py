@@ -0,0 +1,41 @@
+import ast
+from typing import Dict, Any, Optional
+from services.assignment_processing_service import (
+    generate_reference_material_prompt, parse_assignment_details, parse_graded_hints
+)
+from services.llm_service import generate_content
+
+def usable_reference_solution(assignment_details: Dict[str, Any]) -> str:
+    """The stored reference solution, or "" if there is none or it does not parse."""
+    reference = assignment_details.get("reference_solution") or ""
+    if not reference.strip():
+        return ""
+    try:
+        ast.parse(reference)
+    except SyntaxError:
+        return ""
+    return reference
+
+def ensure_reference_material(parsed_content: Dict[str, Any], model_name: Optional[str] = None,
+                              show_spinner: bool = False) -> bool:
+    """Fills in reference_solution_content and graded_hints_list of a parsed assignment, once, before it is saved.
+       The creation prompt already asks for both, so an extra LLM call is only made when the model left
+       one of them out (or the reference does not parse). Returns True if the reference was (re)generated."""
+    reference = usable_reference_solution({"reference_solution": parsed_content.get("reference_solution_content", "")})
+    if reference and parsed_content.get("graded_hints_list"):
+        return False
+    prompt = generate_reference_material_prompt(
+        parsed_content.get("title", ""),
+        parsed_content.get("requirements", ""),
+        parsed_content.get("code_template_content", ""),
+        parsed_content.get("expected_output_content", "")
+    )
+    response = generate_content(prompt, show_spinner=show_spinner, model_name=model_name)
+    if not response:
+        return False
+    if not parsed_content.get("graded_hints_list"):
+        parsed_content["graded_hints_list"] = parse_graded_hints(response)
+    if reference:
+        return False
+    parsed_content["reference_solution_content"] = parse_assignment_details(response).get("reference_solution_content", "")
+    return True
@@ -0,0 +1,151 @@
+import math
+import re
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from typing import List, Dict, Tuple, Optional, Set, Any
+
+# Passages are windows of words over the document; the overlap keeps sentences cut at a boundary retrievable
+PASSAGE_WORDS = 180
+PASSAGE_OVERLAP_WORDS = 40
+# Okapi BM25 parameters
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+_WORD_RE = re.compile(r"[A-Za-z0-9]+(?:['’][A-Za-z]+)?")
+_STOPWORDS = frozenset("""
+a about above after again against all also am an and any are as at be because been before being below between both but by
+can could did do does doing down during each few for from further had has have having he her here hers him his how i if in
+into is it its itself just me more most my no nor not now of off on once only or other our ours out over own same she should
+so some such than that the their theirs them then there these they this those through to too under until up very was we were
+what when where which while who whom why will with would you your yours
+""".split())
+
+@dataclass(frozen=True)
+class Passage:
+    id: int
+    page: int      # page the passage starts on (0 when the text has no pages)
+    text: str
+    start: int = 0  # character span of the passage in the source text
+    end: int = 0
+
+def _stem(word: str) -> str:
+    """Very light suffix stripping so "trees"/"tree" and "sorting"/"sort" match."""
+    for suffix in ("ing", "es", "s"):
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            return word[:-len(suffix)]
+    return word
+
+def tokenize_terms(text: str) -> List[str]:
+    return [_stem(w) for w in (m.group().lower() for m in _WORD_RE.finditer(text or "")) if w not in _STOPWORDS and len(w) > 1]
+
+def chunk_text(text: str, page_offsets: Optional[List[Tuple[int, int]]] = None,
+               words: int = PASSAGE_WORDS, overlap: int = PASSAGE_OVERLAP_WORDS) -> List[Passage]:
+    """Splits extracted text into overlapping word windows, each tagged with the page it starts on."""
+    spans = [(m.start(), m.end()) for m in re.finditer(r"\S+", text or "")]
+    offsets = sorted(page_offsets or [], key=lambda p: p[1])
+    passages: List[Passage] = []
+    step = max(1, words - overlap)
+    page_index = 0
+    for start in range(0, len(spans), step):
+        window = spans[start:start + words]
+        if not window:
+            break
+        char_start = window[0][0]
+        while page_index + 1 < len(offsets) and offsets[page_index + 1][1] <= char_start:
+            page_index += 1
+        page = offsets[page_index][0] if offsets else 0
+        passages.append(Passage(id=len(passages), page=page, text=" ".join(text[s:e] for s, e in window),
+                                start=char_start, end=window[-1][1]))
+        if start + words >= len(spans):
+            break
+    return passages
+
+class BM25Index:
+    """In-memory Okapi BM25 index over passages; no external service involved."""
+
+    def __init__(self, passages: List[Passage], stored: Optional[Dict[str, Any]] = None):
+        self.passages = passages
+        self.postings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)  # term -> [(passage id, term frequency)]
+        self.lengths: List[int] = []
+        if stored:
+            # Index saved with the course material: no tokenizing needed
+            for term, postings in stored.get("postings", {}).items():
+                self.postings[term] = [(pid, tf) for pid, tf in postings]
+            self.lengths = list(stored.get("lengths", []))
+        else:
+            for passage in passages:
+                terms = Counter(tokenize_terms(passage.text))
+                self.lengths.append(sum(terms.values()))
+                for term, tf in terms.items():
+                    self.postings[term].append((passage.id, tf))
+        self.avg_length = (sum(self.lengths) / len(self.lengths)) if self.lengths else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-serializable postings and lengths; the passages are stored separately as boundaries."""
+        return {"postings": {term: [[pid, tf] for pid, tf in postings] for term, postings in self.postings.items()},
+                "lengths": self.lengths}
+
+    def __len__(self) -> int:
+        return len(self.passages)
+
+    def idf(self, term: str) -> float:
+        df = len(self.postings.get(term, ()))
+        return math.log(1 + (len(self.passages) - df + 0.5) / (df + 0.5))
+
+    def search(self, query: str, k: int = 5, exclude: Optional[Set[int]] = None) -> List[Tuple[Passage, float]]:
+        """Top-k passages for the query, best first. Only passages sharing a query term are scored."""
+        scores: Dict[int, float] = defaultdict(float)
+        for term in set(tokenize_terms(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = self.idf(term)
+            for pid, tf in postings:
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * self.lengths[pid] / self.avg_length) if self.avg_length else BM25_K1
+                scores[pid] += idf * tf * (BM25_K1 + 1) / (tf + norm)
+        if exclude:
+            for pid in exclude:
+                scores.pop(pid, None)
+        best = sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:k]
+        return [(self.passages[pid], score) for pid, score in best]
+
+def passage_bounds(passages: List[Passage]) -> List[List[int]]:
+    """Chunk boundaries for storage: [page, start, end] per passage."""
+    return [[p.page, p.start, p.end] for p in passages]
+
+def passages_from_bounds(text: str, bounds: List[List[int]]) -> List[Passage]:
+    """Rebuilds passages from stored boundaries without re-chunking."""
+    return [Passage(id=i, page=page, text=" ".join(text[start:end].split()), start=start, end=end)
+            for i, (page, start, end) in enumerate(bounds)]
+
+def split_topics(topics: str) -> List[str]:
+    """The teacher's comma/semicolon separated topics, e.g. "Sorting, Binary trees" -> two queries."""
+    return [t.strip() for t in re.split(r"[,;\n]", topics or "") if t.strip()]
+
+def passages_for_groups(index: BM25Index, topics: str, groups: int, k: int) -> List[List[Passage]]:
+    """k passages per question group. Groups cycle through the teacher's topics and never reuse a passage
+       while unused relevant ones remain; without topics (or without any match) passages are spread evenly
+       over the document so the quiz covers all of it."""
+    queries = split_topics(topics)
+    used: Set[int] = set()
+    selected: List[List[Passage]] = []
+    for g in range(groups):
+        chosen: List[Passage] = []
+        if queries:
+            query = queries[g % len(queries)]
+            chosen = [p for p, _ in index.search(query, k, exclude=used)]
+            if not chosen and len(queries) > 1:
+                chosen = [p for p, _ in index.search(topics, k, exclude=used)]
+            if not chosen:
+                # Every relevant passage has been used by earlier groups: allow reuse rather than go off-topic
+                chosen = [p for p, _ in index.search(topics, k)]
+        if not chosen and len(index):
+            # Evenly spaced passages from this group's share of the document
+            share = len(index) / groups
+            start, end = int(g * share), max(int((g + 1) * share), int(g * share) + 1)
+            span = list(range(start, min(end, len(index))))
+            stride = max(1, len(span) // k)
+            chosen = [index.passages[i] for i in span[::stride][:k]]
+        used.update(p.id for p in chosen)
+        selected.append(sorted(chosen, key=lambda p: p.id))
+    return selected
@@ -0,0 +1,184 @@
+import os
+import json
+import stat
+import time
+import sqlite3
+import threading
+from typing import Any, Optional
+
+# Cache shared by every app process, so workers behind a load balancer reuse each other's results instead of
+# each warming its own copy. "sqlite" is one WAL-mode file on local disk (all processes on one host);
+# "redis" (any Redis-compatible server) also spans hosts; "none" disables it.
+# Cached evaluations are served as grades, so the SQLite files live in a directory only the app user can
+# write (created with mode 0700), never at a predictable path in the shared temp directory.
+APP_DATA_DIR = os.environ.get("APP_DATA_DIR", os.path.join(
+    os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"), "eval_project"))
+SHARED_CACHE_BACKEND = os.environ.get("SHARED_CACHE_BACKEND", "sqlite").lower()
+SHARED_CACHE_PATH = os.environ.get("SHARED_CACHE_PATH", os.path.join(APP_DATA_DIR, "cache.sqlite3"))
+SHARED_CACHE_MAX_MB = float(os.environ.get("SHARED_CACHE_MAX_MB", "256"))
+SHARED_CACHE_REDIS_URL = os.environ.get("SHARED_CACHE_REDIS_URL", "redis://localhost:6379/0")
+
+# A read only rewrites an entry's recency when it is older than this, so hot keys do not turn every read into a write
+TOUCH_INTERVAL_SECONDS = 60
+SQLITE_BUSY_TIMEOUT_SECONDS = 5.0
+REDIS_KEY_PREFIX = "eval_project"
+
+def ensure_private_file(path: str) -> str:
+    """Creates path's directory (mode 0700) if needed and checks that nobody else can control the SQLite
+       file: the directory must not be writable by other users (unless sticky, like /tmp) and the file and
+       its WAL/journal companions, if they exist, must be regular files owned by this user.
+       Raises PermissionError otherwise; returns path."""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    if os.name != "posix":
+        return path
+    dir_stat = os.stat(directory)
+    if dir_stat.st_uid not in (0, os.getuid()) or (dir_stat.st_mode & 0o022 and not dir_stat.st_mode & stat.S_ISVTX):
+        raise PermissionError(f"{directory} can be modified by other users")
+    for candidate in (path, path + "-wal", path + "-shm", path + "-journal"):
+        try:
+            file_stat = os.lstat(candidate)
+        except FileNotFoundError:
+            continue
+        if not stat.S_ISREG(file_stat.st_mode) or file_stat.st_uid != os.getuid():
+            raise PermissionError(f"{candidate} is not a regular file owned by this user")
+    return path
+
+class SqliteCache:
+    """Entries in one SQLite table. Every write is a single transaction (readers see the old or the new value,
+       never a partial one); expired entries are purged and least recently used ones evicted beyond max_bytes
+       in the same transaction."""
+
+    def __init__(self, path: str, max_bytes: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._local = threading.local()  # sqlite3 connections must stay on the thread that opened them
+        self._connection()
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            ensure_private_file(self.path)
+            conn = sqlite3.connect(self.path, timeout=SQLITE_BUSY_TIMEOUT_SECONDS, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")  # readers never block the writer and vice versa
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("""CREATE TABLE IF NOT EXISTS cache_entries (
+                namespace TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, size INTEGER NOT NULL,
+                expires_at REAL, accessed_at REAL NOT NULL, PRIMARY KEY (namespace, key))""")
+            conn.execute("CREATE INDEX IF NOT EXISTS cache_entries_accessed ON cache_entries (accessed_at)")
+            conn.execute("CREATE INDEX IF NOT EXISTS cache_entries_expires ON cache_entries (expires_at)")
+            self._local.conn = conn
+        return conn
+
+    def get(self, namespace: str, key: str) -> Optional[str]:
+        conn = self._connection()
+        now = time.time()
+        row = conn.execute("SELECT value, expires_at, accessed_at FROM cache_entries WHERE namespace = ? AND key = ?",
+                           (namespace, key)).fetchone()
+        if row is None:
+            return None
+        value, expires_at, accessed_at = row
+        if expires_at is not None and expires_at <= now:
+            return None  # purged by the next write
+        if now - accessed_at > TOUCH_INTERVAL_SECONDS:
+            conn.execute("UPDATE cache_entries SET accessed_at = ? WHERE namespace = ? AND key = ?", (now, namespace, key))
+        return value
+
+    def set(self, namespace: str, key: str, value: str, ttl: Optional[float] = None) -> bool:
+        size = len(value.encode("utf-8"))
+        if size > self.max_bytes:
+            return False
+        now = time.time()
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("INSERT OR REPLACE INTO cache_entries VALUES (?, ?, ?, ?, ?, ?)",
+                         (namespace, key, value, size, now + ttl if ttl else None, now))
+            self._evict(conn, now)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return True
+
+    def _evict(self, conn: sqlite3.Connection, now: float):
+        conn.execute("DELETE FROM cache_entries WHERE expires_at IS NOT NULL AND expires_at <= ?", (now,))
+        excess = conn.execute("SELECT COALESCE(SUM(size), 0) FROM cache_entries").fetchone()[0] - self.max_bytes
+        if excess <= 0:
+            return
+        victims = []
+        for namespace, key, size in conn.execute("SELECT namespace, key, size FROM cache_entries ORDER BY accessed_at"):
+            victims.append((namespace, key))
+            excess -= size
+            if excess <= 0:
+                break
+        conn.executemany("DELETE FROM cache_entries WHERE namespace = ? AND key = ?", victims)
+
+class RedisCache:
+    """Entries as Redis strings with native expiry. Size-based eviction is the server's: run it with
+       maxmemory and maxmemory-policy allkeys-lru. Requires the optional `redis` package."""
+
+    def __init__(self, url: str):
+        import redis
+        self.client = redis.Redis.from_url(url, socket_timeout=2)
+        self.client.ping()
+
+    def _key(self, namespace: str, key: str) -> str:
+        return f"{REDIS_KEY_PREFIX}:{namespace}:{key}"
+
+    def get(self, namespace: str, key: str) -> Optional[str]:
+        value = self.client.get(self._key(namespace, key))
+        return value.decode("utf-8") if value is not None else None
+
+    def set(self, namespace: str, key: str, value: str, ttl: Optional[float] = None) -> bool:
+        return bool(self.client.set(self._key(namespace, key), value, ex=max(1, int(ttl)) if ttl else None))
+
+_cache = None
+_cache_ready = False
+_cache_lock = threading.Lock()
+
+def _create_backend():
+    if SHARED_CACHE_BACKEND == "none":
+        return None
+    if SHARED_CACHE_BACKEND == "redis":
+        try:
+            return RedisCache(SHARED_CACHE_REDIS_URL)
+        except Exception as e:
+            print(f"Redis cache unavailable ({e}); falling back to the SQLite cache.")
+    try:
+        return SqliteCache(SHARED_CACHE_PATH, int(SHARED_CACHE_MAX_MB * 1024 * 1024))
+    except (sqlite3.Error, OSError) as e:
+        print(f"Shared cache disabled, could not open {SHARED_CACHE_PATH}: {e}")
+        return None
+
+def get_shared_cache():
+    """The process's handle on the shared cache (None when disabled or unavailable)."""
+    global _cache, _cache_ready
+    with _cache_lock:
+        if not _cache_ready:
+            _cache = _create_backend()
+            _cache_ready = True
+    return _cache
+
+def cache_get(namespace: str, key: str) -> Optional[Any]:
+    """Cached JSON value, or None on a miss. Cache errors are logged and treated as misses."""
+    cache = get_shared_cache()
+    if cache is None:
+        return None
+    try:
+        raw = cache.get(namespace, key)
+        return json.loads(raw) if raw is not None else None
+    except Exception as e:
+        print(f"Shared cache read failed ({namespace}): {e}")
+        return None
+
+def cache_set(namespace: str, key: str, value: Any, ttl: Optional[float] = None) -> bool:
+    """Stores a JSON-serializable value for ttl seconds (None: until evicted). Returns False if it was not stored."""
+    cache = get_shared_cache()
+    if cache is None:
+        return False
+    try:
+        return cache.set(namespace, key, json.dumps(value, default=str), ttl)
+    except Exception as e:
+        print(f"Shared cache write failed ({namespace}): {e}")
+        return False
@@ -0,0 +1,197 @@
+import ast
+import builtins
+from dataclasses import dataclass, field
+from typing import List, Dict, Any, Optional
+
+# Functions above this cyclomatic complexity get a readability finding
+COMPLEXITY_WARNING_THRESHOLD = 10
+MAX_REPORTED_FINDINGS = 15
+
+_BUILTIN_NAMES = set(dir(builtins))
+_DECISION_NODES = (ast.If, ast.For, ast.AsyncFor, ast.While, ast.IfExp, ast.ExceptHandler, ast.With, ast.AsyncWith, ast.Assert, ast.comprehension)
+_BLOCK_NODES = (ast.If, ast.For, ast.AsyncFor, ast.While, ast.With, ast.AsyncWith, ast.Try, ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)
+_TERMINATORS = (ast.Return, ast.Raise, ast.Continue, ast.Break)
+
+@dataclass
+class StaticAnalysisResult:
+    syntax_error: Optional[str] = None                               # "line 3: invalid syntax" if the code does not parse
+    required: List[str] = field(default_factory=list)                # definitions from the code template
+    missing_definitions: List[str] = field(default_factory=list)
+    stub_definitions: List[str] = field(default_factory=list)        # required definitions whose body is only pass/.../docstring
+    metrics: Dict[str, Any] = field(default_factory=dict)
+    findings: List[str] = field(default_factory=list)                # non-fatal lint findings, "line N: ..."
+
+    @property
+    def fatal(self) -> bool:
+        """Problems that make an LLM evaluation pointless: the code cannot run or implements nothing required."""
+        if self.syntax_error or self.missing_definitions:
+            return True
+        return bool(self.required) and len(self.stub_definitions) == len(self.required)
+
+def _top_level_definitions(tree: ast.Module) -> Dict[str, ast.AST]:
+    """Top-level functions and classes, plus methods as "Class.method"."""
+    definitions: Dict[str, ast.AST] = {}
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            definitions[node.name] = node
+        elif isinstance(node, ast.ClassDef):
+            definitions[node.name] = node
+            for item in node.body:
+                if isinstance(item, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                    definitions[f"{node.name}.{item.name}"] = item
+    return definitions
+
+def required_definitions(template: str) -> List[str]:
+    """Names the code template asks the student to implement."""
+    try:
+        return list(_top_level_definitions(ast.parse(template or "")))
+    except SyntaxError:
+        return []
+
+def _is_stub(node: ast.AST) -> bool:
+    body = [
+        stmt for stmt in getattr(node, "body", [])
+        if not (isinstance(stmt, ast.Expr) and isinstance(stmt.value, ast.Constant) and isinstance(stmt.value.value, str))
+    ]
+    return all(
+        isinstance(stmt, ast.Pass) or (isinstance(stmt, ast.Expr) and isinstance(stmt.value, ast.Constant) and stmt.value.value is Ellipsis)
+        for stmt in body
+    )
+
+def cyclomatic_complexity(node: ast.AST) -> int:
+    """McCabe complexity: 1 + decision points (branches, loops, handlers, boolean operators)."""
+    complexity = 1
+    for child in ast.walk(node):
+        if isinstance(child, _DECISION_NODES):
+            complexity += 1 + (len(child.ifs) if isinstance(child, ast.comprehension) else 0)
+        elif isinstance(child, ast.BoolOp):
+            complexity += len(child.values) - 1
+        elif hasattr(ast, "match_case") and isinstance(child, ast.match_case):
+            complexity += 1
+    return complexity
+
+def _nesting_depth(node: ast.AST, depth: int = 0) -> int:
+    deepest = depth
+    for child in ast.iter_child_nodes(node):
+        child_depth = depth + 1 if isinstance(child, _BLOCK_NODES) else depth
+        deepest = max(deepest, _nesting_depth(child, child_depth))
+    return deepest
+
+def _lint(tree: ast.Module) -> List[str]:
+    findings: List[str] = []
+    used_names = {n.id for n in ast.walk(tree) if isinstance(n, ast.Name)}
+    # `import os.path` binds os; attribute chains are rooted in a Name, so used_names covers them
+    for node in ast.walk(tree):
+        if isinstance(node, (ast.Import, ast.ImportFrom)):
+            for alias in node.names:
+                if alias.name == "*":
+                    findings.append(f"line {node.lineno}: wildcard import from '{node.module}'")
+                    continue
+                bound = alias.asname or alias.name.split(".")[0]
+                if bound not in used_names:
+                    findings.append(f"line {node.lineno}: unused import '{bound}'")
+        elif isinstance(node, ast.ExceptHandler) and node.type is None:
+            findings.append(f"line {node.lineno}: bare 'except:' also catches KeyboardInterrupt and SystemExit")
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            for default in node.args.defaults + [d for d in node.args.kw_defaults if d is not None]:
+                if isinstance(default, (ast.List, ast.Dict, ast.Set)):
+                    findings.append(f"line {node.lineno}: mutable default argument in '{node.name}'")
+            if node.name in _BUILTIN_NAMES:
+                findings.append(f"line {node.lineno}: function '{node.name}' shadows a built-in")
+        elif isinstance(node, ast.Compare):
+            for op, comparator in zip(node.ops, node.comparators):
+                if isinstance(op, (ast.Eq, ast.NotEq)) and isinstance(comparator, ast.Constant) and comparator.value is None:
+                    findings.append(f"line {node.lineno}: comparison to None should use 'is' / 'is not'")
+        elif isinstance(node, ast.Name) and isinstance(node.ctx, ast.Store) and node.id in _BUILTIN_NAMES:
+            findings.append(f"line {node.lineno}: variable '{node.id}' shadows a built-in")
+        elif isinstance(node, ast.Global):
+            findings.append(f"line {node.lineno}: uses global variable(s) {', '.join(node.names)}")
+        # Unreachable statements after return/raise/continue/break in the same block
+        for body_name in ("body", "orelse", "finalbody"):
+            body = getattr(node, body_name, None)
+            if isinstance(body, list):
+                for i, stmt in enumerate(body[:-1]):
+                    if isinstance(stmt, _TERMINATORS):
+                        findings.append(f"line {body[i + 1].lineno}: unreachable code after '{type(stmt).__name__.lower()}'")
+                        break
+    # One finding per line and message
+    return sorted(set(findings), key=lambda f: int(f.split(":")[0][5:]))
+
+def analyze_code(code: str, template: str = "") -> StaticAnalysisResult:
+    """Fast local pre-pass over a submission: syntax, required definitions, complexity and lint."""
+    result = StaticAnalysisResult(required=required_definitions(template))
+    try:
+        tree = ast.parse(code or "")
+    except SyntaxError as e:
+        line = (e.text or "").strip()
+        result.syntax_error = f"line {e.lineno}: {e.msg}" + (f" -> {line}" if line else "")
+        return result
+    except ValueError as e:  # e.g. null bytes in the source
+        result.syntax_error = str(e)
+        return result
+
+    definitions = _top_level_definitions(tree)
+    result.missing_definitions = [name for name in result.required if name not in definitions]
+    result.stub_definitions = [name for name in result.required if name in definitions and _is_stub(definitions[name])]
+
+    functions = [n for n in ast.walk(tree) if isinstance(n, (ast.FunctionDef, ast.AsyncFunctionDef))]
+    complexities = {f.name: cyclomatic_complexity(f) for f in functions}
+    result.metrics = {
+        "lines": len([l for l in (code or "").splitlines() if l.strip() and not l.strip().startswith("#")]),
+        "functions": len(functions),
+        "classes": sum(1 for n in ast.walk(tree) if isinstance(n, ast.ClassDef)),
+        "max_complexity": max(complexities.values(), default=cyclomatic_complexity(tree)),
+        "most_complex": max(complexities, key=complexities.get) if complexities else "",
+        "max_nesting": _nesting_depth(tree),
+    }
+    result.findings = _lint(tree)
+    for name, complexity in complexities.items():
+        if complexity > COMPLEXITY_WARNING_THRESHOLD:
+            result.findings.append(f"function '{name}' has cyclomatic complexity {complexity} (consider splitting it up)")
+    for name in result.stub_definitions:
+        result.findings.append(f"'{name}' is not implemented yet (its body is empty)")
+    return result
+
+def format_static_report(result: StaticAnalysisResult) -> str:
+    """Short plain-text summary of the static checks, suitable for an LLM prompt."""
+    if result.syntax_error:
+        return f"Syntax error: {result.syntax_error}"
+    lines = []
+    if result.required:
+        lines.append(f"Required definitions present: {', '.join(result.required)}" if not result.missing_definitions
+                     else f"Missing required definitions: {', '.join(result.missing_definitions)}")
+    m = result.metrics
+    if m:
+        most_complex = f" ({m['most_complex']})" if m.get("most_complex") else ""
+        lines.append(f"Metrics: {m['lines']} code lines, {m['functions']} function(s), {m['classes']} class(es), "
+                     f"max cyclomatic complexity {m['max_complexity']}{most_complex}, max nesting depth {m['max_nesting']}")
+    if result.findings:
+        lines.append("Lint findings:")
+        lines += [f"  - {f}" for f in result.findings[:MAX_REPORTED_FINDINGS]]
+        if len(result.findings) > MAX_REPORTED_FINDINGS:
+            lines.append(f"  ... and {len(result.findings) - MAX_REPORTED_FINDINGS} more")
+    else:
+        lines.append("Lint findings: none")
+    return "\n".join(lines)
+
+def static_analysis_evaluation(result: StaticAnalysisResult) -> Dict[str, str]:
+    """Evaluation for fatal problems, returned without an LLM call."""
+    if result.syntax_error:
+        return {
+            "verdict": "No",
+            "analysis": f"The code cannot run because it has a syntax error ({result.syntax_error}). Python stops before executing any of it, so none of the requirements can be met.",
+            "improvements": "Fix the syntax error at the reported line (check for missing colons, unbalanced brackets or quotes, and inconsistent indentation), run the code locally, then submit again."
+        }
+    if result.missing_definitions:
+        missing = ", ".join(f"`{name}`" for name in result.missing_definitions)
+        return {
+            "verdict": "No",
+            "analysis": f"The code does not define {missing} from the code template, so the required functionality cannot be called or tested.",
+            "improvements": f"Keep the names and signatures from the code template and implement {missing}. Helper functions are fine, but the template's definitions must exist."
+        }
+    stubs = ", ".join(f"`{name}`" for name in result.stub_definitions)
+    return {
+        "verdict": "No",
+        "analysis": f"{stubs} still only {'contains' if len(result.stub_definitions) == 1 else 'contain'} placeholder code (`pass` or `...`), so nothing has been implemented yet.",
+        "improvements": "Replace the placeholder bodies with an implementation of the requirements and test it with the example from the expected output."
+    }
@@ -0,0 +1,163 @@
+import os
+import json
+import time
+import uuid
+import socket
+import sqlite3
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+from services.shared_cache_service import APP_DATA_DIR, ensure_private_file
+
+# Long operations (LLM generation and analysis) run on a worker pool instead of the script thread, so a rerun
+# or a browser refresh does not cancel them. Their state is kept in a SQLite table that every app process
+# on the host can read, so a refreshed page (possibly served by another process) finds its task again.
+TASK_DB_PATH = os.environ.get("TASK_DB_PATH", os.path.join(APP_DATA_DIR, "tasks.sqlite3"))
+TASK_MAX_WORKERS = int(os.environ.get("TASK_MAX_WORKERS", "4"))
+TASK_RESULT_TTL_HOURS = float(os.environ.get("TASK_RESULT_TTL_HOURS", "24"))
+# Each process refreshes the heartbeat of its unfinished tasks; a task not refreshed for TASK_STALE_SECONDS
+# belongs to a process that has stopped and is reported as failed (submitting it again reruns it)
+TASK_HEARTBEAT_SECONDS = 10
+TASK_STALE_SECONDS = 60
+
+ACTIVE_STATUSES = ("queued", "running")
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+_COLUMNS = "id, task_key, kind, owner, status, result, error, created_at, started_at, finished_at, acknowledged, heartbeat_at"
+
+@dataclass
+class Task:
+    id: str
+    key: str
+    kind: str
+    owner: str
+    status: str                  # queued / running / done / failed
+    result: Any = None           # JSON value returned by the task function
+    error: str = ""
+    created_at: float = 0.0
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    acknowledged: bool = False   # the page has consumed the result; an identical submission runs again
+
+    @property
+    def done(self) -> bool:
+        return self.status not in ACTIVE_STATUSES
+
+    @property
+    def queued_seconds(self) -> float:
+        return (self.started_at or time.time()) - self.created_at
+
+    @property
+    def run_seconds(self) -> float:
+        return ((self.finished_at or time.time()) - self.started_at) if self.started_at else 0.0
+
+_local = threading.local()  # sqlite3 connections must stay on the thread that opened them
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+def _connection() -> sqlite3.Connection:
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        ensure_private_file(TASK_DB_PATH)
+        conn = sqlite3.connect(TASK_DB_PATH, timeout=5.0, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("""CREATE TABLE IF NOT EXISTS tasks (
+            id TEXT PRIMARY KEY, task_key TEXT NOT NULL, kind TEXT NOT NULL, owner TEXT NOT NULL, status TEXT NOT NULL,
+            result TEXT, error TEXT NOT NULL DEFAULT '', created_at REAL NOT NULL, started_at REAL, finished_at REAL,
+            acknowledged INTEGER NOT NULL DEFAULT 0, worker TEXT NOT NULL, heartbeat_at REAL NOT NULL)""")
+        conn.execute("CREATE INDEX IF NOT EXISTS tasks_key ON tasks (task_key, created_at)")
+        conn.execute("CREATE INDEX IF NOT EXISTS tasks_owner ON tasks (kind, owner, created_at)")
+        _local.conn = conn
+    return conn
+
+def _to_task(row) -> Task:
+    (task_id, key, kind, owner, status, result, error, created_at, started_at, finished_at, acknowledged, heartbeat_at) = row
+    if status in ACTIVE_STATUSES and heartbeat_at < time.time() - TASK_STALE_SECONDS:
+        status, error = "failed", "The worker process running this task stopped."
+    return Task(id=task_id, key=key, kind=kind, owner=owner, status=status, result=json.loads(result) if result else None,
+                error=error or "", created_at=created_at, started_at=started_at, finished_at=finished_at,
+                acknowledged=bool(acknowledged))
+
+def _heartbeat():
+    while True:
+        time.sleep(TASK_HEARTBEAT_SECONDS)
+        try:
+            _connection().execute("UPDATE tasks SET heartbeat_at = ? WHERE worker = ? AND status IN ('queued', 'running')",
+                                  (time.time(), WORKER_ID))
+        except sqlite3.Error as e:
+            print(f"Task heartbeat failed: {e}")
+
+def _get_executor() -> ThreadPoolExecutor:
+    """Process-wide worker pool, started with its heartbeat thread on first use."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=TASK_MAX_WORKERS, thread_name_prefix="task")
+            threading.Thread(target=_heartbeat, name="task-heartbeat", daemon=True).start()
+        return _executor
+
+def task_key(kind: str, owner: str, key_data: Any) -> str:
+    """Idempotency key: the same kind, owner and inputs give the same key."""
+    payload = json.dumps([kind, owner, key_data], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def _run(task_id: str, fn: Callable[..., Any], args, kwargs):
+    try:
+        conn = _connection()
+        conn.execute("UPDATE tasks SET status = 'running', started_at = ? WHERE id = ?", (time.time(), task_id))
+        try:
+            result, status, error = json.dumps(fn(*args, **kwargs), default=str), "done", ""
+        except Exception as e:
+            print(f"Task {task_id} failed: {e}")
+            result, status, error = None, "failed", str(e) or type(e).__name__
+        conn.execute("UPDATE tasks SET status = ?, result = ?, error = ?, finished_at = ? WHERE id = ?",
+                     (status, result, error, time.time(), task_id))
+    except sqlite3.Error as e:
+        # Left unfinished in the table; it is reported as failed once its heartbeat goes stale
+        print(f"Could not record task {task_id}: {e}")
+
+def submit_task(kind: str, key_data: Any, fn: Callable[..., Any], *args, owner: str = "", **kwargs) -> Task:
+    """Runs fn(*args, **kwargs) on the worker pool and records it; fn must return a JSON-serializable value.
+       Idempotent: while a task with the same kind, owner and key_data is queued, running, or done but not yet
+       acknowledged, that task is returned and fn is not called again. Failed tasks are rerun."""
+    key = task_key(kind, owner, key_data)
+    conn = _connection()
+    now = time.time()
+    conn.execute("BEGIN IMMEDIATE")  # check-then-insert must not race with another process submitting the same key
+    try:
+        conn.execute("DELETE FROM tasks WHERE finished_at IS NOT NULL AND finished_at < ?", (now - TASK_RESULT_TTL_HOURS * 3600,))
+        row = conn.execute(f"SELECT {_COLUMNS} FROM tasks WHERE task_key = ? ORDER BY created_at DESC LIMIT 1", (key,)).fetchone()
+        existing = _to_task(row) if row else None
+        if existing and (not existing.done or (existing.status == "done" and not existing.acknowledged)):
+            conn.execute("COMMIT")
+            return existing
+        task_id = uuid.uuid4().hex
+        conn.execute("INSERT INTO tasks (id, task_key, kind, owner, status, created_at, worker, heartbeat_at) "
+                     "VALUES (?, ?, ?, ?, 'queued', ?, ?, ?)", (task_id, key, kind, owner, now, WORKER_ID, now))
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    _get_executor().submit(_run, task_id, fn, args, kwargs)
+    return Task(id=task_id, key=key, kind=kind, owner=owner, status="queued", created_at=now)
+
+def get_task(task_id: Optional[str]) -> Optional[Task]:
+    if not task_id:
+        return None
+    row = _connection().execute(f"SELECT {_COLUMNS} FROM tasks WHERE id = ?", (task_id,)).fetchone()
+    return _to_task(row) if row else None
+
+def find_task(kind: str, owner: str) -> Optional[Task]:
+    """The owner's latest task of a kind whose result has not been acknowledged (e.g. after a browser refresh)."""
+    row = _connection().execute(
+        f"SELECT {_COLUMNS} FROM tasks WHERE kind = ? AND owner = ? AND acknowledged = 0 ORDER BY created_at DESC LIMIT 1",
+        (kind, owner)
+    ).fetchone()
+    return _to_task(row) if row else None
+
+def acknowledge_task(task_id: str):
+    """Marks a task's result as consumed: find_task skips it, and once it has finished, submitting the same
+       inputs again starts a new run."""
+    _connection().execute("UPDATE tasks SET acknowledged = 1 WHERE id = ?", (task_id,))
@@ -0,0 +1,4 @@
+-- Input generator (make_input(n)) for algorithm and data structure assignments, and the
+-- performance profile of the reference solution measured once when the assignment is created.
+alter table coding_assignments add column if not exists input_generator text not null default '';
+alter table coding_assignments add column if not exists reference_profile jsonb;
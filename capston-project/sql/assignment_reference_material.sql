@@ -0,0 +1,3 @@
+-- Hints of increasing specificity, generated once with the assignment (the reference solution
+-- itself is stored in coding_assignments.reference_solution, see assignment_tests.sql).
+alter table coding_assignments add column if not exists graded_hints jsonb not null default '[]'::jsonb;
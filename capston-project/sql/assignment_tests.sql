@@ -0,0 +1,7 @@
+-- Executable tests generated with each coding assignment, validated against a generated reference solution.
+alter table coding_assignments add column if not exists reference_solution text not null default '';
+alter table coding_assignments add column if not exists tests text not null default '';
+alter table coding_assignments add column if not exists tests_validated boolean not null default false;
+
+-- Objective score (percentage of tests passed) for each submission.
+alter table assignment_submissions add column if not exists score real;
@@ -0,0 +1,20 @@
+-- Course-material library: each uploaded document is extracted, chunked and indexed once per teacher
+-- and referenced by id from any later quiz or assignment generation.
+create table if not exists course_materials (
+    id uuid primary key default gen_random_uuid(),
+    teacher_id uuid not null,
+    title text not null,
+    file_sha256 text not null,
+    page_count integer not null default 0,
+    pages_read integer not null default 0,
+    text text not null default '',
+    page_offsets jsonb not null default '[]'::jsonb,   -- [[page, offset in text], ...]
+    passages jsonb not null default '[]'::jsonb,       -- chunk boundaries: [[page, start, end], ...]
+    search_index jsonb not null default '{}'::jsonb,   -- BM25 postings and passage lengths
+    created_at timestamptz not null default now(),
+    unique (teacher_id, file_sha256)
+);
+create index if not exists course_materials_teacher_idx on course_materials (teacher_id, created_at desc);
+
+alter table quizzes add column if not exists material_id uuid references course_materials(id) on delete set null;
+alter table coding_assignments add column if not exists material_id uuid references course_materials(id) on delete set null;
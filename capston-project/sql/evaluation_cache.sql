@@ -0,0 +1,9 @@
+-- LLM code evaluations keyed by the AST fingerprint of a submission (comments, docstrings,
+-- formatting and identifier names removed) together with its assignment.
+create table if not exists evaluation_cache (
+    fingerprint text primary key,
+    assignment_id uuid not null references coding_assignments(id) on delete cascade,
+    evaluation jsonb not null,
+    created_at timestamptz not null default now()
+);
+create index if not exists evaluation_cache_assignment_idx on evaluation_cache (assignment_id);
@@ -0,0 +1,27 @@
+-- Question bank: every generated question is deduplicated here by a hash of its normalized text, type and
+-- difficulty, so teachers can assemble quizzes without an LLM call. Each teacher has their own bank;
+-- rows with shared = true are also offered to the teachers who opt in to shared questions.
+create table if not exists question_bank (
+    id bigint generated by default as identity primary key,
+    teacher_id uuid not null,
+    shared boolean not null default false,
+    text_hash text not null,
+    question text not null,
+    answers jsonb not null default '[]'::jsonb,
+    correct_answer integer not null default -1,
+    question_type text not null default 'mcq',
+    difficulty text not null default '',
+    topic_tokens text[] not null default '{}',
+    created_at timestamptz not null default now(),
+    unique (teacher_id, text_hash)
+);
+
+-- Upgrading a bank created before it was per teacher: the old rows have no owner and are no longer served
+alter table question_bank add column if not exists teacher_id uuid;
+alter table question_bank add column if not exists shared boolean not null default false;
+alter table question_bank drop constraint if exists question_bank_text_hash_key;
+create unique index if not exists question_bank_teacher_id_text_hash_key on question_bank (teacher_id, text_hash);
+
+create index if not exists question_bank_topic_tokens_idx on question_bank using gin (topic_tokens);
+create index if not exists question_bank_difficulty_type_idx on question_bank (difficulty, question_type);
+create index if not exists question_bank_shared_idx on question_bank (shared) where shared;
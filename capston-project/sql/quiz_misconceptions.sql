@@ -0,0 +1,11 @@
+-- Class-level misconception fragments: one explanation per (quiz, question, wrong answer) pair,
+-- reused to assemble per-student feedback without a per-student LLM call.
+create table if not exists quiz_misconceptions (
+    id bigint generated by default as identity primary key,
+    quiz_id uuid not null references quizzes(id) on delete cascade,
+    mistake_key text not null,
+    explanation text not null default '',
+    review text not null default '',
+    created_at timestamptz not null default now(),
+    unique (quiz_id, mistake_key)
+);
@@ -0,0 +1,12 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+@pytest.fixture
+def unsandboxed(monkeypatch):
+    """Runs submitted code without bubblewrap, which is not available on every development machine."""
+    import services.code_execution_service as code_execution_service
+    monkeypatch.setattr(code_execution_service, "EXEC_SANDBOX", "none")
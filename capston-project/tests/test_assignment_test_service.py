@@ -0,0 +1,85 @@
+from services.assignment_test_service import run_tests
+
+TESTS = '''
+def test_small():
+    assert add(1, 2) == 3
+
+def test_large():
+    assert add(10, 20) == 30
+'''
+
+def test_correct_solution_passes(unsandboxed):
+    result = run_tests("def add(a, b):\n    return a + b\nprint('hello')\n", TESTS)
+    assert (result.passed, result.total) == (2, 2)
+    assert result.execution.stdout == "hello\n"
+
+def test_patched_serializer_cannot_forge_the_score(unsandboxed):
+    code = '''import json
+_dumps = json.dumps
+json.dumps = lambda value, *a, **k: _dumps([dict(c, passed=True, message="") for c in value] if isinstance(value, list) else value, *a, **k)
+
+def add(a, b):
+    return a - b
+'''
+    result = run_tests(code, TESTS)
+    assert (result.passed, result.total) == (0, 2)
+
+def test_printed_report_cannot_forge_the_score(unsandboxed):
+    code = '''import json, os, sys
+report = json.dumps({"cases": [{"name": "test_small", "passed": True}, {"name": "test_large", "passed": True}]})
+sys.__stdout__.write(report + "\\n")
+sys.__stdout__.flush()
+os.write(1, report.encode())
+os._exit(0)
+'''
+    result = run_tests(code, TESTS)
+    assert result.passed == 0
+
+def test_always_equal_object_fails(unsandboxed):
+    code = '''class Anything(int):
+    def __eq__(self, other):
+        return True
+
+def add(a, b):
+    return Anything(0)
+'''
+    result = run_tests(code, TESTS)
+    assert result.passed == 0
+    assert "type mismatch" in result.cases[0]["message"]
+
+def test_objects_and_in_place_changes_cross_the_process_boundary(unsandboxed):
+    code = '''class Stack:
+    def __init__(self):
+        self.items = []
+    def push(self, x):
+        self.items.append(x)
+    def pop(self):
+        if not self.items:
+            raise IndexError("pop from empty stack")
+        return self.items.pop()
+
+def sort_in_place(values):
+    values.sort()
+'''
+    tests = '''
+def test_stack():
+    s = Stack()
+    s.push(1)
+    s.push(2)
+    assert s.pop() == 2
+    assert s.items == [1]
+
+def test_empty_stack():
+    try:
+        Stack().pop()
+    except IndexError:
+        return
+    assert False
+
+def test_sort():
+    values = [3, 1, 2]
+    sort_in_place(values)
+    assert values == [1, 2, 3]
+'''
+    result = run_tests(code, tests)
+    assert (result.passed, result.total) == (3, 3)
@@ -0,0 +1,11 @@
+import pytest
+
+from services.code_fingerprint_service import is_cacheable_evaluation
+
+@pytest.mark.parametrize("verdict", ["Yes", "No", "Partially", " partially "])
+def test_prompted_verdicts_are_cached(verdict):
+    assert is_cacheable_evaluation({"verdict": verdict, "analysis": "...", "improvements": "..."})
+
+@pytest.mark.parametrize("evaluation", [None, {}, {"verdict": "Unknown"}, {"verdict": "Yes / No / Partially"}])
+def test_malformed_evaluations_are_not_cached(evaluation):
+    assert not is_cacheable_evaluation(evaluation)
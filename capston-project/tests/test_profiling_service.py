@@ -0,0 +1,37 @@
+import math
+import random
+import time
+
+import pytest
+
+from services.profiling_service import fit_complexity, TIME_NOISE_FLOOR
+
+SIZES = [2 ** k for k in range(3, 17)]  # the sizes the profiling harness doubles through
+
+def _best_time(fn, n: int, repeats: int = 5) -> float:
+    random.seed(n)
+    data = [random.random() for _ in range(n)]
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn(data)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def test_sorted_is_n_log_n():
+    timings = [_best_time(sorted, n) for n in SIZES]
+    assert fit_complexity(SIZES, timings, noise_floor=TIME_NOISE_FLOOR) == "O(n log n)"
+
+@pytest.mark.parametrize("expected, model", [
+    ("O(1)", lambda n: 3e-4),
+    ("O(n)", lambda n: 2e-8 * n + 1e-6),
+    ("O(n log n)", lambda n: 2e-8 * n * math.log2(n) + 1e-6),
+    ("O(n^2)", lambda n: 1e-9 * n * n + 1e-6),
+])
+def test_model_timings_are_classified(expected, model):
+    assert fit_complexity(SIZES, [model(n) for n in SIZES], noise_floor=TIME_NOISE_FLOOR) == expected
+
+def test_memory_with_a_step_at_small_sizes_is_linear():
+    # sorted() allocates a merge buffer only beyond 64 elements
+    peaks = [n * 0.0125 if n <= 512 else n * 0.0118 for n in SIZES]
+    assert fit_complexity(SIZES, peaks) == "O(n)"
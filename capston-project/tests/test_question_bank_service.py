@@ -0,0 +1,14 @@
+from models.question import Question
+from services.question_bank_service import question_to_bank_row
+
+QUESTION = Question(1, "What does a B-tree keep balanced?", ["Height", "Width", "Keys", "Leaves"], 0, "mcq")
+
+def test_difficulty_is_part_of_the_bank_key():
+    beginner = question_to_bank_row(QUESTION, "databases", "Beginner", "teacher-1")
+    advanced = question_to_bank_row(QUESTION, "databases", "Advanced", "teacher-1")
+    assert beginner["text_hash"] != advanced["text_hash"]
+
+def test_rows_belong_to_their_teacher_and_are_private_by_default():
+    row = question_to_bank_row(QUESTION, "databases", "Beginner", "teacher-1")
+    assert (row["teacher_id"], row["shared"]) == ("teacher-1", False)
+    assert question_to_bank_row(QUESTION, "databases", "Beginner", "teacher-1", shared=True)["shared"] is True
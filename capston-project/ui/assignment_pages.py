@@ -1,24 +1,269 @@
 import streamlit as st
+import json
+import time
 from typing import Dict, Any # For type hinting
 
 # Assuming services, auth, db_utils are accessible from the root or via PYTHONPATH
-from services.llm_service import generate_content, GROQ_MODELS
+from services.llm_service import GROQ_MODELS
+from services.pregeneration_service import generate_with_pool
 from services.assignment_processing_service import (
     generate_assignment_creation_prompt,
     parse_assignment_details,
-    generate_code_evaluation_prompt, # Not used yet, but might be if evaluation is added to submission viewing
-    parse_code_evaluation # Not used yet
+    ASSIGNMENT_TOPICS
 )
+from services.assignment_test_service import format_test_report
+from services.code_evaluation_service import run_local_checks, evaluate_with_llm, stream_evaluation, LocalCheckResult
+from services.profiling_service import format_profile_report
+from services.assignment_generation_service import (
+    build_assignment_record, generate_assignments, category_items, parse_curriculum_lines, DIFFICULTIES
+)
+from services.bulk_evaluation_service import start_bulk_evaluation, get_bulk_evaluation_job
+from services.code_similarity_service import get_similarity_index
+from services.course_material_service import retrieve_material_passages
 from db_utils import (
     save_assignment_to_db,
+    save_assignments_to_db,
     get_assignment_details_by_id,
     save_assignment_submission,
-    get_assignment_submissions_for_teacher
+    update_assignment_submission_evaluation,
+    get_assignment_submissions_for_teacher,
+    get_course_materials_for_teacher
 )
 from auth import get_user_id
 
 ASSIGNMENT_GROQ_MODELS = [m for m in GROQ_MODELS if m != "llama-guard-3-8b"]
 
+def render_local_checks(checks: LocalCheckResult):
+    """Show the outcome of a local sandboxed run and of the assignment tests."""
+    result, test_result = checks.execution, checks.tests
+    analysis = checks.analysis
+    if analysis and not analysis.syntax_error and (analysis.findings or analysis.metrics):
+        with st.expander(f"Static Analysis ({len(analysis.findings)} finding(s))"):
+            m = analysis.metrics
+            if m:
+                st.caption(f"{m['lines']} code lines · max cyclomatic complexity {m['max_complexity']} · max nesting depth {m['max_nesting']}")
+            for finding in analysis.findings:
+                st.markdown(f"- {finding}")
+    st.markdown("#### Local Run")
+    if result.ok:
+        st.success(f"Ran successfully in {result.wall_time:.2f}s (CPU {result.cpu_time:.2f}s, peak memory {result.peak_memory_kb / 1024:.1f} MB)")
+    elif result.timed_out:
+        st.error(f"Stopped after {result.wall_time:.2f}s: time limit exceeded.")
+    else:
+        st.error(f"Run failed after {result.wall_time:.2f}s: {result.exception}")
+    if result.stdout.strip():
+        st.code(result.stdout, language="text")
+    if result.traceback:
+        with st.expander("Traceback"):
+            st.code(result.traceback, language="text")
+    if test_result is not None:
+        if test_result.total:
+            st.markdown(f"**Automated tests:** {test_result.passed}/{test_result.total} passed ({test_result.score:.0f}%)")
+            for case in test_result.cases:
+                if case.get("passed"):
+                    st.success(f"{case['name']} ({case.get('time_ms', 0):.1f} ms)")
+                else:
+                    st.error(f"{case['name']}: {case.get('message', '')}")
+        else:
+            st.warning(format_test_report(test_result))
+    if checks.profile is not None:
+        render_performance_profile(checks)
+
+def render_performance_profile(checks: LocalCheckResult):
+    """Measured running time on growing inputs, next to the reference solution."""
+    profile, reference = checks.profile, checks.reference_profile
+    st.markdown("#### Performance")
+    if not profile.points:
+        st.warning(format_profile_report(profile))
+        return
+    summary = f"Empirical time complexity: **{profile.time_class or 'undetermined'}**"
+    if reference and reference.time_class:
+        summary += f" (reference solution: {reference.time_class})"
+    st.markdown(summary)
+    chart = {p["n"]: {"Your solution (ms)": p["time"] * 1000} for p in profile.points}
+    for p in (reference.points if reference else []):
+        chart.setdefault(p["n"], {})["Reference (ms)"] = p["time"] * 1000
+    st.line_chart([dict(n=n, **values) for n, values in sorted(chart.items())], x="n")
+    with st.expander("Profile details"):
+        st.text(format_profile_report(profile, reference))
+
+def render_code_evaluation(evaluation: Dict[str, str]):
+    """Show a parsed code evaluation (verdict, analysis, improvements)."""
+    st.markdown(f"**Verdict:** {evaluation.get('verdict', 'Not available')}")
+    with st.expander("Detailed Analysis", expanded=True):
+        st.markdown("**Analysis:**")
+        st.markdown(evaluation.get('analysis', 'Not available'))
+        st.markdown("**Suggestions for Improvement:**")
+        st.markdown(evaluation.get('improvements', 'Not available'))
+        if evaluation.get('performance'):
+            st.markdown("**Measured Performance:**")
+            st.text(evaluation['performance'])
+
+EVALUATION_LABELS = {"verdict": "Verdict", "analysis": "Analysis", "improvements": "Suggestions for Improvement"}
+
+def render_streamed_evaluation(stream) -> Dict[str, str]:
+    """Fills the verdict/analysis/improvements sections in as the evaluation streams in;
+       returns the final evaluation ({} if it failed)."""
+    status = st.empty()
+    status.caption("Evaluating your code...")
+    placeholders = {key: st.empty() for key in EVALUATION_LABELS}
+    evaluation, last_render = {}, 0.0
+    for evaluation, done in stream:
+        # Re-rendering markdown on every token is wasted work; a few updates per second read as live
+        if not done and time.monotonic() - last_render < 0.1:
+            continue
+        last_render = time.monotonic()
+        for key, label in EVALUATION_LABELS.items():
+            if done and not evaluation:
+                placeholders[key].empty()  # the stream broke off: drop the partial text
+            elif evaluation.get(key):
+                placeholders[key].markdown(f"**{label}:** {evaluation[key]}" + ("" if done else " ▌"))
+    status.empty()
+    return evaluation
+
+def _load_evaluation(evaluation) -> Dict[str, str]:
+    """Stored evaluations are JSON strings of the parse_code_evaluation dict."""
+    if isinstance(evaluation, dict):
+        return evaluation
+    if not evaluation:
+        return {}
+    try:
+        return json.loads(evaluation)
+    except Exception:
+        return {}
+
+def render_bulk_evaluation_panel(assignment_details: Dict[str, Any], submissions: list):
+    """Teacher control to evaluate every submission of an assignment in parallel."""
+    st.subheader("Evaluate All Submissions")
+    col1, col2 = st.columns(2)
+    with col1:
+        evaluate_new = st.button("Evaluate All Unevaluated", use_container_width=True, type="primary", key="bulk_eval_new")
+    with col2:
+        evaluate_all = st.button("Re-evaluate All", use_container_width=True, key="bulk_eval_all")
+    if evaluate_new or evaluate_all:
+        if not start_bulk_evaluation(assignment_details, submissions, only_unevaluated=not evaluate_all):
+            st.info("Every submission already has an evaluation.")
+    job = get_bulk_evaluation_job(assignment_details['id'])
+    if job:
+        # Only poll while the job is running; a finished job is rendered once
+        st.fragment(run_every=None if job.done else 2)(render_bulk_evaluation_progress)(assignment_details['id'])
+
+def render_bulk_evaluation_progress(assignment_id: str):
+    job = get_bulk_evaluation_job(assignment_id)
+    if not job:
+        return
+    results = job.snapshot()
+    st.progress(len(results) / job.total if job.total else 1.0, text=f"{len(results)}/{job.total} submissions evaluated")
+    if results:
+        st.dataframe([
+            {
+                "Student ID": r.get("student_id"),
+                "Status": r.get("status"),
+                "Verdict": (r.get("evaluation") or {}).get("verdict", "-"),
+                "Tests score": f"{r['score']:.0f}%" if r.get("score") is not None else "-",
+                "Time (s)": round(r.get("elapsed", 0.0), 1),
+            } for r in results.values()
+        ], use_container_width=True, hide_index=True)
+    if job.done:
+        st.success(f"All submissions evaluated in {(job.finished_at or time.time()) - job.started_at:.1f}s.")
+        if st.session_state.get("_bulk_eval_polling") == assignment_id:
+            # Leave fragment polling mode with one full rerun
+            st.session_state.pop("_bulk_eval_polling", None)
+            st.rerun()
+    else:
+        st.session_state._bulk_eval_polling = assignment_id
+
+def render_similarity_panel(assignment_details: Dict[str, Any], submissions: list):
+    """Teacher view of submission pairs whose code is suspiciously similar."""
+    with st.expander("Code Similarity Check"):
+        min_score = st.slider("Minimum similarity", 0.5, 1.0, 0.8, 0.05, key="similarity_min_score")
+        index = get_similarity_index(assignment_details, submissions)
+        pairs = index.similar_pairs(min_score=min_score, limit=200)
+        if not pairs:
+            st.info(f"No submission pairs above {min_score:.0%} similarity among {len(index)} submissions.")
+            return
+        students = {str(s['id']): s.get('student_id') for s in submissions}
+        st.dataframe([
+            {
+                "Student A": students.get(p["a"], p["a"]),
+                "Student B": students.get(p["b"], p["b"]),
+                "Similarity": f"{p['score']:.0%}",
+                "Shared fingerprints": p["shared"],
+            } for p in pairs
+        ], use_container_width=True, hide_index=True)
+        st.caption("Similarity ignores comments, formatting, identifier names, literals and the code template.")
+
+def render_generation_notes(notes):
+    for level, message in notes:
+        (st.info if level == "info" else st.warning)(message)
+
+def render_bulk_generation(topics: Dict[str, Any]):
+    """Generate a whole category, or a custom list of topics, concurrently and save them in one insert."""
+    st.markdown("---")
+    st.subheader("Bulk Generation")
+    with st.form("bulk_assignment_form"):
+        mode = st.radio("Generate:", ["Whole category", "Custom list"], horizontal=True)
+        category = st.selectbox("Category:", list(topics.keys()), key="bulk_category")
+        custom_list = st.text_area(
+            "Custom list (one per line: topic, difficulty, minutes):",
+            placeholder="Linked Lists, Beginner, 20\nBinary Search, Intermediate, 30",
+            key="bulk_custom_list"
+        )
+        difficulty = st.select_slider("Default difficulty:", options=DIFFICULTIES, value="Intermediate", key="bulk_difficulty")
+        time_limit = st.slider("Default completion time (minutes):", 10, 120, 30, step=5, key="bulk_time_limit")
+        deepseek_model = "deepseek-r1-distill-llama-70b"
+        default_index = ASSIGNMENT_GROQ_MODELS.index(deepseek_model) if deepseek_model in ASSIGNMENT_GROQ_MODELS else 0
+        selected_model = st.selectbox("Choose LLM Model", ASSIGNMENT_GROQ_MODELS, index=default_index, key="bulk_model")
+        bulk_btn = st.form_submit_button("Generate All", use_container_width=True)
+
+    if not bulk_btn:
+        return
+    if mode == "Whole category":
+        items, errors = category_items(category, difficulty, time_limit), []
+    else:
+        items, errors = parse_curriculum_lines(custom_list, difficulty, time_limit)
+    for error in errors:
+        st.warning(error)
+    if not items:
+        st.warning("Nothing to generate.")
+        return
+
+    progress = st.progress(0.0, text=f"Generating {len(items)} assignment(s)...")
+    status_table = st.empty()
+    statuses = [{"Topic": t, "Difficulty": d, "Minutes": m, "Status": "generating", "Attempts": 0, "Time (s)": "", "Details": ""}
+                for t, d, m in items]
+    status_table.dataframe(statuses, use_container_width=True, hide_index=True)
+
+    def on_result(index, result, completed, total):
+        statuses[index].update({
+            "Status": result.status,
+            "Attempts": result.attempts,
+            "Time (s)": f"{result.elapsed:.1f}",
+            "Details": result.error or "; ".join(message for level, message in result.notes if level == "warning"),
+        })
+        progress.progress(completed / total, text=f"{completed}/{total} done")
+        status_table.dataframe(statuses, use_container_width=True, hide_index=True)
+
+    results = generate_assignments(items, model_name=selected_model, on_result=on_result)
+    generated = [r for r in results if r.status == "generated"]
+    if not generated:
+        st.error("No assignment could be generated.")
+        return
+    # Workers never touch the database; one insert from the script thread saves everything
+    assignment_ids = save_assignments_to_db([r.assignment_data for r in generated])
+    for result, assignment_id in zip(generated, assignment_ids):
+        result.assignment_id = assignment_id
+        result.status = "saved" if assignment_id else "generated"
+    for row, result in zip(statuses, results):
+        row["Status"] = result.status
+    status_table.dataframe(statuses, use_container_width=True, hide_index=True)
+    saved = sum(1 for r in results if r.status == "saved")
+    failed = sum(1 for r in results if r.status == "failed")
+    if saved:
+        st.success(f"Saved {saved} of {len(results)} assignment(s).")
+    if failed:
+        st.warning(f"{failed} assignment(s) failed; see the table for details.")
+
 def render_coding_page():
     """Render the coding assignment generator page."""
     if st.session_state.user_role != "teacher":
@@ -29,13 +274,7 @@ def render_coding_page():
             st.rerun()
         return
     st.title("Coding Assignment Generator")
-    topics = {
-        "Python": ["Python Basics", "Functions", "Classes & OOP", "File Handling", "Error Handling"],
-        "Data Structures": ["Lists", "Dictionaries", "Sets", "Tuples", "Stacks & Queues", "Trees", "Graphs"],
-        "Algorithms": ["Searching", "Sorting", "Dynamic Programming", "Recursion", "Greedy Algorithms"],
-        "Data Science": ["Pandas Basics", "Data Visualization", "Linear Regression", "Classification", "Clustering"],
-        "Advanced": ["Neural Networks", "NLP", "Computer Vision", "Web Scraping", "API Development"]
-    }
+    topics = ASSIGNMENT_TOPICS
 
     with st.form("assignment_form"):
         st.subheader("Create Your Coding Assignment")
@@ -43,6 +282,11 @@ def render_coding_page():
         topic = st.selectbox("Topic:", topics[category])
         difficulty = st.select_slider("Difficulty:", options=["Beginner", "Intermediate", "Advanced"])
         time_limit = st.slider("Estimated completion time (minutes):", 10, 120, 30, step=5)
+        materials = {m["id"]: m["title"] for m in get_course_materials_for_teacher()}
+        material_id = st.selectbox(
+            "Base on course material (optional):", [""] + list(materials),
+            format_func=lambda mid: materials[mid] if mid else "None"
+        )
         # LLM model selection dropdown
         deepseek_model = "deepseek-r1-distill-llama-70b"
         default_index = ASSIGNMENT_GROQ_MODELS.index(deepseek_model) if deepseek_model in ASSIGNMENT_GROQ_MODELS else 0
@@ -52,23 +296,21 @@ def render_coding_page():
             if not topic:
                 st.warning("Please select a topic.")
             else:
-                prompt = generate_assignment_creation_prompt(topic, difficulty, time_limit)
-                response = generate_content(prompt, show_spinner=True, model_name=selected_model)
+                # Passages of the chosen library document that match the topic ground the assignment
+                passages = retrieve_material_passages(material_id, topic, k=3) if material_id else []
+                prompt = generate_assignment_creation_prompt(
+                    topic, difficulty, time_limit,
+                    source_passages=[(f"p. {p.page}", p.text) for p in passages] or None
+                )
+                response = generate_with_pool("assignment", prompt, model_name=selected_model, show_spinner=True)
                 if response:
                     parsed_content = parse_assignment_details(response)
                     if "Error parsing" not in parsed_content.get("title", ""):
-                        assignment_data = {
-                            "title": parsed_content.get("title", f"Assignment on {topic}"),
-                            "description": parsed_content.get("background", ""),
-                            "requirements": parsed_content.get("requirements", ""),
-                            "hints": parsed_content.get("hints", ""),
-                            "code_template": parsed_content.get("code_template_content", ""),
-                            "expected_output": parsed_content.get("expected_output_content", ""),
-                            "evaluation_criteria": parsed_content.get("evaluation_criteria", ""),
-                            "topic": topic,
-                            "difficulty": difficulty,
-                            "time_limit": time_limit
-                        }
+                        with st.spinner("Preparing the reference solution, tests and performance profile..."):
+                            assignment_data, notes = build_assignment_record(parsed_content, topic, difficulty, time_limit, model_name=selected_model)
+                            if passages:
+                                assignment_data["material_id"] = material_id
+                        render_generation_notes(notes)
                         assignment_id = save_assignment_to_db(assignment_data)
                         if assignment_id:
                             st.success(f"Assignment '{assignment_data['title']}' saved and ready!")
@@ -80,6 +322,8 @@ def render_coding_page():
                 else:
                     st.error("Failed to generate assignment content. Please check LLM service or API key.")
 
+    render_bulk_generation(topics)
+
     if st.button("Back to Teacher Dashboard", key="coding_page_back_dash"):
         st.session_state.page = "teacher_dashboard"
         st.rerun()
@@ -119,7 +363,18 @@ def render_solve_assignment_page():
 
     with tab2:
         st.subheader("Hints")
-        st.info(assignment_details.get('hints','No hints provided for this assignment.'))
+        graded_hints = assignment_details.get('graded_hints') or []
+        if graded_hints:
+            # Hints go from a gentle nudge to a near-complete outline; reveal them one at a time
+            revealed_key = f"revealed_hints_{assignment_id}"
+            revealed = st.session_state.get(revealed_key, 1)
+            for level, hint in enumerate(graded_hints[:revealed], start=1):
+                st.info(f"**Hint {level}:** {hint}")
+            if revealed < len(graded_hints) and st.button("Show a more specific hint", key="reveal_next_hint"):
+                st.session_state[revealed_key] = revealed + 1
+                st.rerun()
+        else:
+            st.info(assignment_details.get('hints','No hints provided for this assignment.'))
 
     with tab3:
         st.subheader("Code Template")
@@ -131,6 +386,7 @@ def render_solve_assignment_page():
             st.session_state._current_solve_assignment_id = assignment_id
             st.session_state.assignment_submitted_successfully = False
             st.session_state.assignment_ai_evaluation = None
+            st.session_state.assignment_local_checks = None
 
         with st.form("solve_assignment_form"):
             user_code_solution = st.text_area(
@@ -147,22 +403,27 @@ def render_solve_assignment_page():
                 if not user_id:
                     st.error("User not identified. Please log in again.")
                 else:
-                    # Generate AI evaluation using LLM
-                    from services.assignment_processing_service import generate_code_evaluation_prompt, parse_code_evaluation
-                    from services.llm_service import generate_content
-                    prompt = generate_code_evaluation_prompt(
-                        user_code_solution, 
-                        assignment_details.get('requirements', ''), 
-                        assignment_details.get('expected_output', '')
+                    # Run the code locally first: the result is shown right away and grounds the LLM evaluation
+                    with st.spinner("Running your code..."):
+                        local_checks = run_local_checks(user_code_solution, assignment_details)
+                    render_local_checks(local_checks)
+                    # Save before evaluating, so a slow or failed evaluation never loses the submission
+                    submission_id = save_assignment_submission(
+                        assignment_id, user_id, user_code_solution, score=local_checks.score
                     )
-                    ai_evaluation_raw = generate_content(prompt, show_spinner=True)
-                    ai_evaluation = parse_code_evaluation(ai_evaluation_raw) if ai_evaluation_raw else {}
-                    import json
-                    evaluation_to_save = json.dumps(ai_evaluation) if ai_evaluation else None
-                    save_successful = save_assignment_submission(assignment_id, user_id, user_code_solution, evaluation_feedback=evaluation_to_save)
-                    if save_successful:
+                    if submission_id:
+                        st.markdown("---")
+                        st.subheader("AI Evaluation & Feedback")
+                        # Streamed in this run rather than on the task runner, which only returns finished
+                        # results: the submission is already saved, so a refresh only loses the live feedback
+                        ai_evaluation = render_streamed_evaluation(
+                            stream_evaluation(user_code_solution, assignment_details, local_checks)
+                        )
+                        if ai_evaluation:
+                            update_assignment_submission_evaluation(submission_id, json.dumps(ai_evaluation), local_checks.score)
                         st.session_state.assignment_submitted_successfully = True
                         st.session_state.assignment_ai_evaluation = ai_evaluation
+                        st.session_state.assignment_local_checks = local_checks
                         st.rerun() 
                     else:
                         st.error("There was an issue submitting your assignment. Please try again.")
@@ -170,6 +431,8 @@ def render_solve_assignment_page():
         if st.session_state.get("assignment_submitted_successfully"):
             st.success("Assignment submitted successfully!")
             # Show AI evaluation to student
+            if st.session_state.get("assignment_local_checks"):
+                render_local_checks(st.session_state.assignment_local_checks)
             ai_eval = st.session_state.get("assignment_ai_evaluation")
             if ai_eval:
                 st.markdown("---")
@@ -177,11 +440,17 @@ def render_solve_assignment_page():
                 st.markdown(f"**Verdict:** {ai_eval.get('verdict', 'N/A')}")
                 st.markdown(f"**Analysis:** {ai_eval.get('analysis', 'N/A')}")
                 st.markdown(f"**Suggestions for Improvement:** {ai_eval.get('improvements', 'N/A')}")
+                if ai_eval.get('performance'):
+                    st.markdown("**Measured Performance:**")
+                    st.text(ai_eval['performance'])
                 st.markdown("---")
+            else:
+                st.warning("The AI evaluation could not be generated right now. Your submission is saved and can be evaluated later by your teacher.")
             if st.button("Back to Student Dashboard", key="solve_assignment_back_to_dash_after_submit"):
                 st.session_state.page = "student_dashboard"
                 keys_to_pop = ['student_code_solution', 'assignment_submitted_successfully', 
-                               'view_assignment_id', '_current_solve_assignment_id', 'assignment_ai_evaluation']
+                               'view_assignment_id', '_current_solve_assignment_id', 'assignment_ai_evaluation',
+                               'assignment_local_checks']
                 for key in keys_to_pop:
                     if key in st.session_state:
                         st.session_state.pop(key, None)
@@ -226,6 +495,12 @@ def render_assignment_submissions_page():
     if not submissions:
         st.info("No student submissions yet for this assignment.")
     else:
+        render_bulk_evaluation_panel(assignment_details, submissions)
+        render_similarity_panel(assignment_details, submissions)
+        st.markdown("---")
+        bulk_job = get_bulk_evaluation_job(assignment_id)
+        bulk_results = bulk_job.snapshot() if bulk_job else {}
+
         student_submission_options = {
             sub['student_id']: f"Student ID: {sub['student_id']} (Submitted: {sub.get('created_at', '')[:16]})" 
             for sub in submissions
@@ -247,26 +522,24 @@ def render_assignment_submissions_page():
                 st.code(submitted_code, language="python")
                 
                 st.markdown("---")
-                # Placeholder for AI evaluation feature
                 st.subheader("AI Code Evaluation")
-                if st.button("Evaluate Code with AI", key=f"eval_{submission_details['id']}"):
+                # Results from a bulk run are newer than the submission row fetched at the top of the page
+                bulk_entry = bulk_results.get(str(submission_details['id']))
+                stored_evaluation = bulk_entry.get("evaluation") if bulk_entry else _load_evaluation(submission_details.get('evaluation'))
+                if stored_evaluation:
+                    render_code_evaluation(stored_evaluation)
+                if st.button("Re-evaluate Code with AI" if stored_evaluation else "Evaluate Code with AI", key=f"eval_{submission_details['id']}"):
+                    with st.spinner("Running code..."):
+                        local_checks = run_local_checks(submitted_code, assignment_details)
+                    render_local_checks(local_checks)
                     with st.spinner("Evaluating code..."):
-                        prompt = generate_code_evaluation_prompt(
-                            submitted_code, 
-                            assignment_details.get('requirements', ''), 
-                            assignment_details.get('expected_output', '')
-                        )
-                        evaluation_response = generate_content(prompt, show_spinner=False) # Spinner is already active
-                        if evaluation_response:
-                            parsed_eval = parse_code_evaluation(evaluation_response)
-                            st.markdown(f"**Verdict:** {parsed_eval.get('verdict', 'Not available')}")
-                            with st.expander("Detailed Analysis", expanded=True):
-                                st.markdown("**Analysis:**")
-                                st.markdown(parsed_eval.get('analysis', 'Not available'))
-                                st.markdown("**Suggestions for Improvement:**")
-                                st.markdown(parsed_eval.get('improvements', 'Not available'))
-                        else:
-                            st.error("Failed to get AI evaluation. The LLM service might be unavailable or the request timed out.")
+                        parsed_eval = evaluate_with_llm(submitted_code, assignment_details, local_checks, show_spinner=False, # Spinner is already active
+                                                        use_cache=not stored_evaluation) # An explicit re-evaluation asks for a fresh answer
+                    if parsed_eval:
+                        update_assignment_submission_evaluation(submission_details['id'], json.dumps(parsed_eval), local_checks.score)
+                        render_code_evaluation(parsed_eval)
+                    else:
+                        st.error("Failed to get AI evaluation. The LLM service might be unavailable or the request timed out.")
 
             else:
                 st.error("Selected submission details not found.")
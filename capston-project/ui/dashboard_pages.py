@@ -123,7 +123,7 @@ def render_student_dashboard():
                     for q in questions:
                         if answers.get(str(q.db_id), None) == q.correct_answer:
                             correct_count += 1
-                    st.session_state.current_quiz_questions_for_results = questions
+                    st.session_state.results_quiz_id = quiz['id']
                     st.session_state.user_answers_for_results = answers
                     st.session_state.score_for_results = (correct_count, len(questions), score)
                     st.session_state.ai_feedback_for_results = ai_feedback
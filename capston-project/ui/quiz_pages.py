@@ -1,6 +1,8 @@
 import streamlit as st
+import os
+import json
 import ast # For ast.literal_eval in quiz_submissions
-from typing import List, Dict, Any # For type hinting
+from typing import List, Dict, Any, Sequence, Optional # For type hinting
 
 # Assuming services, models, auth, db_utils are accessible
 from services.llm_service import generate_content, GROQ_MODELS
@@ -12,15 +14,27 @@ from services.quiz_processing_service import (
     generate_quiz_analysis_prompt,
     parse_quiz_analysis
 )
-from models.question import Question # For type hinting and instantiation if needed
+from services.pregeneration_service import generate_with_pool
+from services.pdf_extraction_service import PdfExtractionError
+from services.grounded_quiz_service import generate_grounded_questions
+from services.course_material_service import add_pdf_to_library, get_material_index
+from services.misconception_service import build_class_level_feedback
+from services.question_bank_service import select_bank_questions, merge_question_lists
+from services.task_runner_service import submit_task, get_task, find_task, acknowledge_task
+from models.question import Question, get_question_set # For type hinting and instantiation if needed
 from db_utils import (
     save_quiz_to_db, 
+    get_bank_questions,
     get_quiz_details_by_id, 
     save_quiz_submission, 
+    save_quiz_submission_feedback,
     get_student_quiz_submissions,
-    get_quiz_submissions_for_teacher
+    get_quiz_submissions_for_teacher,
+    get_course_materials_for_teacher,
+    delete_course_material,
+    save_quiz_manual_grades
 )
-from auth import get_user_id, get_supabase_client
+from auth import get_user_id
 
 QUIZ_GROQ_MODELS = [
     m for m in GROQ_MODELS if m not in [
@@ -32,6 +46,87 @@ QUIZ_GROQ_MODELS = [
     ]
 ]
 
+def render_material_library():
+    """Teacher's stored course materials; each was extracted and indexed once and can back any number of quizzes."""
+    materials = get_course_materials_for_teacher()
+    with st.expander(f"Course Material Library ({len(materials)})"):
+        if not materials:
+            st.caption("Upload a PDF when creating a quiz to add it here.")
+        for m in materials:
+            col1, col2 = st.columns([5, 1])
+            col1.write(f"**{m['title']}** · {m['page_count']} pages · added {str(m.get('created_at', ''))[:10]}")
+            if col2.button("Delete", key=f"delete_material_{m['id']}"):
+                if delete_course_material(m["id"]):
+                    st.rerun()
+
+def _session_user_id() -> Optional[str]:
+    """Signed-in user's id from the session, without a round trip to Supabase when it is known."""
+    return getattr(st.session_state.get("user"), "id", None) or get_user_id()
+
+def _generate_and_save_quiz(passage_index, bank_questions: List[Question], shortfall: Dict[str, int], topics: str,
+                            difficulty: str, num_options: int, model_name: str, title: str, description: str,
+                            material_id: Optional[str], teacher_id: str, share_questions: bool = False) -> Dict[str, Any]:
+    """Background task: tops up the bank questions with generated ones and saves the quiz under teacher_id
+       (captured when the task was submitted; the worker thread has no session of its own)."""
+    generated_questions, responses, generation_failed = [], [], False
+    if sum(shortfall.values()) > 0 and passage_index is not None:
+        # Each group of questions is prompted only with the passages retrieved for the topics
+        generated_questions, responses, generation_failed = generate_grounded_questions(
+            passage_index, topics, shortfall, difficulty, num_options, model_name=model_name
+        )
+    elif sum(shortfall.values()) > 0:
+        prompt = generate_quiz_creation_prompt(
+            topics,
+            shortfall["mcq"], shortfall["fill_blank"], shortfall["true_false"], shortfall["open_ended"],
+            difficulty, num_options
+        )
+        # Popular topic configurations are served from the background warm pool
+        response = generate_with_pool("quiz", prompt, model_name=model_name, show_spinner=False)
+        if response:
+            responses = [response]
+            generated_questions = parse_llm_questions(response) # This returns List[Question] from quiz_processing_service
+        else:
+            generation_failed = True
+    # Never save a half-filled quiz when the AI top-up failed
+    questions_data = merge_question_lists(bank_questions, generated_questions) if not generation_failed else []
+    quiz_id, save_error = save_quiz_to_db(title, description, questions_data, topics, difficulty, material_id=material_id,
+                                          teacher_id=teacher_id, share_questions=share_questions) if questions_data else (None, "")
+    # Messages are shown by render_quiz_generation_status: this thread has no Streamlit script context
+    return {"responses": responses, "generation_failed": generation_failed, "bank_count": len(bank_questions),
+            "question_count": len(questions_data), "quiz_id": quiz_id, "title": title, "save_error": save_error}
+
+def render_quiz_generation_status(task_id: str):
+    """Progress of a background quiz generation, then its outcome (polled while it runs)."""
+    task = get_task(task_id)
+    if not task:
+        return
+    if not task.done:
+        st.info(f"Generating the quiz in the background ({task.queued_seconds + task.run_seconds:.0f}s). "
+                "You can leave this page; the quiz is saved when it is ready.")
+        st.session_state._quiz_task_polling = task_id
+        return
+    result = task.result or {}
+    if task.status == "failed":
+        st.error(f"Quiz generation failed: {task.error}")
+    else:
+        if result.get("bank_count"):
+            st.info(f"Reused {result['bank_count']} question(s) from the question bank.")
+        if result.get("responses"):
+            st.code("\n\n".join(result["responses"]), language='markdown')
+        if result.get("generation_failed"):
+            st.error("Failed to generate quiz content. Please check LLM service or API key.")
+        elif not result.get("question_count"):
+            st.error("Could not parse any questions from the generated content.")
+        elif result.get("quiz_id"):
+            st.success(f"Quiz '{result.get('title', '')}' saved and ready! (generated in {task.run_seconds:.1f}s)")
+        else:
+            st.error(result.get("save_error") or "Failed to save the quiz to the database.")
+    acknowledge_task(task.id)
+    if st.session_state.get("_quiz_task_polling") == task_id:
+        # Leave fragment polling mode with one full rerun
+        st.session_state.pop("_quiz_task_polling", None)
+        st.rerun()
+
 def render_quiz_page(): # Teacher: Create Quiz
     """Render the quiz generation and question display page."""
     if st.session_state.user_role != "teacher":
@@ -44,8 +139,13 @@ def render_quiz_page(): # Teacher: Create Quiz
     st.title("Quiz Generator") 
     with st.form("quiz_form"):
         st.subheader("Create Your Quiz")
-        # PDF upload
-        uploaded_pdf = st.file_uploader("Upload a PDF to generate questions from (one-time use, not saved)", type=["pdf"])
+        # Course material: a document from the library, or a new upload that is added to it
+        materials = {m["id"]: m for m in get_course_materials_for_teacher()}
+        material_choice = st.selectbox(
+            "Course material:", [""] + list(materials),
+            format_func=lambda mid: f"{materials[mid]['title']} ({materials[mid]['page_count']} pages)" if mid else "None (generate from topics)"
+        )
+        uploaded_pdf = st.file_uploader("Or upload a PDF (it is added to your course-material library)", type=["pdf"])
         topics = st.text_input("Topics:", placeholder="e.g., Python, Machine Learning, History, Mathematics")
         col1, col2 = st.columns(2)
         with col1:
@@ -62,54 +162,158 @@ def render_quiz_page(): # Teacher: Create Quiz
         llama4_model = "meta-llama/llama-4-maverick-17b-128e-instruct"
         default_index = QUIZ_GROQ_MODELS.index(llama4_model) if llama4_model in QUIZ_GROQ_MODELS else 0
         selected_model = st.selectbox("Choose LLM Model", QUIZ_GROQ_MODELS, index=default_index)
+        use_question_bank = st.checkbox("Reuse matching questions from your question bank (AI only tops up what is missing)", value=True)
+        # Sharing is opt-in both ways: a teacher's bank is private unless they share it
+        use_shared_bank = st.checkbox("Also reuse questions other teachers have shared", value=False)
+        share_questions = st.checkbox("Share this quiz's questions with other teachers", value=False)
         
         generate_btn = st.form_submit_button("Generate Quiz", use_container_width=True, type="primary")
-        if generate_btn and (topics or uploaded_pdf) and total_questions > 0:
-            # If PDF is uploaded, extract its text
-            pdf_text = None
+        if generate_btn and (topics or uploaded_pdf or material_choice) and total_questions > 0:
+            material_id = material_choice or None
+            material_title = materials[material_choice]["title"] if material_choice else ""
             if uploaded_pdf is not None:
+                # Processed once: pages are extracted in parallel worker processes, then chunked and indexed
+                extraction_progress = st.progress(0.0, text="Extracting text from the PDF...")
                 try:
-                    import PyPDF2
-                    pdf_reader = PyPDF2.PdfReader(uploaded_pdf)
-                    pdf_text = "\n".join(page.extract_text() or "" for page in pdf_reader.pages)
+                    material_id, already_stored = add_pdf_to_library(
+                        uploaded_pdf.getvalue(), uploaded_pdf.name,
+                        on_progress=lambda done, total: extraction_progress.progress(done / total, text=f"Extracted page {done} of {total}")
+                    )
+                    material_title = os.path.splitext(uploaded_pdf.name)[0]
+                    if already_stored:
+                        st.info("This PDF is already in your course-material library; reusing the stored text and index.")
+                    elif not material_id:
+                        st.error("No text could be extracted from the PDF.")
+                except PdfExtractionError as e:
+                    st.error(str(e))
+                    material_id = None
                 except Exception as e:
                     st.error(f"Failed to extract text from PDF: {e}")
-                    pdf_text = None
-            # Use PDF text if available, else fallback to topics
-            if pdf_text and pdf_text.strip():
-                prompt = generate_quiz_creation_prompt(
-                    pdf_text, num_mcq, num_fill, num_true_false, num_open_ended, difficulty, num_options
-                )
+                    material_id = None
+                extraction_progress.empty()
+            try:
+                passage_index = get_material_index(material_id) if material_id else None
+            except LookupError as e:
+                st.error(str(e))
+                passage_index = None
+            has_pdf_text = bool(passage_index is not None and len(passage_index))
+
+            requested_counts = {"mcq": num_mcq, "fill_blank": num_fill, "true_false": num_true_false, "open_ended": num_open_ended}
+            bank_questions = []
+            shortfall = requested_counts
+            teacher_id = _session_user_id()
+            # Bank questions are indexed by topic, so they only apply to topic-based quizzes
+            if use_question_bank and topics and not has_pdf_text and teacher_id:
+                bank_rows = get_bank_questions(topics, difficulty, [t for t, n in requested_counts.items() if n > 0],
+                                               teacher_id, include_shared=use_shared_bank)
+                bank_questions, shortfall = select_bank_questions(bank_rows, requested_counts, topics, num_options)
+
+            quiz_title = f"Quiz on {topics if not has_pdf_text else material_title or 'Course Material'} ({difficulty})"
+            quiz_desc = f"Auto-generated quiz on {topics if not has_pdf_text else material_title or 'course material'} at {difficulty} level."
+            if not teacher_id:
+                st.error("User not identified. Please log in again.")
             else:
-                prompt = generate_quiz_creation_prompt(
-                    topics, num_mcq, num_fill, num_true_false, num_open_ended, difficulty, num_options
+                # Generation and saving run as a background task: reruns do not interrupt it, and submitting
+                # the same settings again while it runs returns the running task instead of a second LLM call
+                task = submit_task(
+                    "quiz_generation",
+                    {"topics": topics, "counts": requested_counts, "difficulty": difficulty, "num_options": num_options,
+                     "model": selected_model, "material_id": material_id if has_pdf_text else None, "use_bank": use_question_bank,
+                     "use_shared_bank": use_shared_bank, "share_questions": share_questions},
+                    _generate_and_save_quiz,
+                    passage_index if has_pdf_text else None, bank_questions, shortfall, topics, difficulty, num_options,
+                    selected_model, quiz_title, quiz_desc, material_id if has_pdf_text else None, teacher_id, share_questions,
+                    owner=teacher_id
                 )
-            response = generate_content(prompt, show_spinner=True, model_name=selected_model)
-            if response:
-                st.code(response, language='markdown')
-                questions_data = parse_llm_questions(response) # This returns List[Question] from quiz_processing_service
-                if questions_data:
-                    quiz_title = f"Quiz on {topics if not pdf_text else 'Uploaded PDF'} ({difficulty})"
-                    quiz_desc = f"Auto-generated quiz on {topics if not pdf_text else 'uploaded PDF'} at {difficulty} level."
-                    quiz_id = save_quiz_to_db(quiz_title, quiz_desc, questions_data, topics, difficulty)
-                    if quiz_id:
-                        st.success("Quiz saved and ready!")
-                    else:
-                        st.error("Failed to save the quiz to the database.")
-                else:
-                    st.error("Could not parse any questions from the generated content.")
-            else:
-                st.error("Failed to generate quiz content. Please check LLM service or API key.")
-    
+                st.session_state.quiz_generation_task_id = task.id
+
+    # The task is found again after a browser refresh, until its outcome has been shown once
+    owner = _session_user_id()
+    task = get_task(st.session_state.get("quiz_generation_task_id")) or (find_task("quiz_generation", owner) if owner else None)
+    if task:
+        st.session_state.quiz_generation_task_id = task.id
+        st.fragment(run_every=None if task.done else 2)(render_quiz_generation_status)(task.id)
+
+    render_material_library()
+
     if st.button("Back to Teacher Dashboard", key="quiz_gen_back_dash"):
         st.session_state.page = "teacher_dashboard"
         st.rerun()
 
+def _load_quiz_questions(quiz_id: str):
+    """The quiz's shared question tuple: taken from the process-wide set when loaded, else fetched."""
+    questions = get_question_set(quiz_id)
+    if questions is None:
+        quiz_details = get_quiz_details_by_id(quiz_id)
+        questions = quiz_details['questions'] if quiz_details else None
+    return questions
+
+def _analyze_quiz_results(quiz_id: str, student_id: str, questions: Sequence[Question], indexed_user_answers: Dict[int, Any],
+                          correct: float, total: int, score_pct: float) -> Dict[str, str]:
+    """Background task: class-level feedback when available, otherwise a per-student LLM analysis.
+       The analysis is stored with the student's (already saved) submission."""
+    analysis_sections = build_class_level_feedback(
+        quiz_id, questions, indexed_user_answers, correct, total, score_pct, already_submitted=True, show_spinner=False
+    ) if quiz_id else None
+    if analysis_sections is None:
+        quiz_summary_text = create_quiz_summary_for_llm(questions, indexed_user_answers)
+        evaluation_prompt = generate_quiz_analysis_prompt(quiz_summary_text, correct, total, score_pct)
+        ai_evaluation = generate_content(evaluation_prompt, show_spinner=False)
+        analysis_sections = parse_quiz_analysis(ai_evaluation) if ai_evaluation else {}
+    if not analysis_sections:
+        # Fails the task, so the next click runs it again instead of returning this empty result
+        raise RuntimeError("The AI analysis could not be generated right now. Please try again.")
+    if quiz_id and student_id:
+        save_quiz_submission_feedback(quiz_id, student_id, json.dumps(analysis_sections))
+    return analysis_sections
+
+def _indexed_answers(questions: Sequence[Question], answers_by_db_id: Dict[Any, Any]) -> Dict[int, Any]:
+    """Answers keyed by question position, the format create_quiz_summary_for_llm expects (-1: not answered)."""
+    return {idx: answers_by_db_id.get(q.db_id, -1) for idx, q in enumerate(questions)}
+
+def _submit_quiz_analysis(quiz_id: str, student_id: str, questions: Sequence[Question], answers_by_db_id: Dict[Any, Any],
+                          correct: float, total: int, score_pct: float):
+    """Starts (or finds) the background analysis of a submission and remembers it for the results page.
+       The key only depends on the answers and score, so the results page's button reuses the same task."""
+    indexed_user_answers = _indexed_answers(questions, answers_by_db_id)
+    task = submit_task(
+        "quiz_analysis", {"quiz_id": quiz_id, "answers": indexed_user_answers, "score": [correct, total]},
+        _analyze_quiz_results, quiz_id, student_id, questions, indexed_user_answers, correct, total, score_pct,
+        owner=student_id or ""
+    )
+    st.session_state.quiz_analysis_task = (quiz_id, task.id)
+
+def render_quiz_analysis_status(task_id: str):
+    task = get_task(task_id)
+    if not task:
+        return
+    if not task.done:
+        st.info(f"Analyzing your answers ({task.queued_seconds + task.run_seconds:.0f}s)...")
+        st.session_state._analysis_task_polling = task_id
+        return
+    analysis_sections = task.result or {}
+    if task.status == "failed":
+        st.error(f"Could not retrieve AI analysis: {task.error}")
+    elif analysis_sections:
+        st.subheader("Personalized Quiz Analysis")
+        if analysis_sections.get("understanding"): st.markdown("#### Overall Understanding"); st.write(analysis_sections["understanding"])
+        if analysis_sections.get("strengths"): st.markdown("#### Your Strengths"); st.success(analysis_sections["strengths"])
+        if analysis_sections.get("knowledge_gaps"): st.markdown("#### Areas to Improve"); st.warning(analysis_sections["knowledge_gaps"])
+        if analysis_sections.get("recommendations"): st.markdown("#### Recommended Next Steps"); st.info(analysis_sections["recommendations"])
+    else:
+        st.error("Could not retrieve AI analysis at this time.")
+    if st.session_state.get("_analysis_task_polling") == task_id:
+        # Leave fragment polling mode with one full rerun
+        st.session_state.pop("_analysis_task_polling", None)
+        st.rerun()
+
 def render_results_page(): # Student: Quiz Results & AI Analysis (after taking quiz, not directly from main.py routing)
     """Render the quiz results page with detailed analysis."""
     st.title("Quiz Results")
     
-    questions_for_results = st.session_state.get("current_quiz_questions_for_results")
+    # Sessions only keep the quiz id; the questions are the process-wide shared tuple for that quiz
+    results_quiz_id = st.session_state.get("results_quiz_id")
+    questions_for_results = _load_quiz_questions(results_quiz_id) if results_quiz_id else None
     user_answers_for_results = st.session_state.get("user_answers_for_results")
     score_for_results = st.session_state.get("score_for_results")
     ai_feedback = st.session_state.get("ai_feedback_for_results")
@@ -124,7 +328,7 @@ def render_results_page(): # Student: Quiz Results & AI Analysis (after taking q
     # Initialize manual_grades before using it
     manual_grades = {}
     user_id = get_user_id() if 'get_user_id' in globals() else None
-    quiz_id = st.session_state.get('view_quiz_id')
+    quiz_id = results_quiz_id or st.session_state.get('view_quiz_id')
     if user_id and quiz_id:
         submissions = get_student_quiz_submissions(user_id, quiz_id)
         if submissions and submissions[0]:
@@ -180,6 +384,8 @@ def render_results_page(): # Student: Quiz Results & AI Analysis (after taking q
         expander_label = f"Q{i+1}: {q_obj.question} - {correctness}"
         with st.expander(expander_label, expanded=False):
             st.markdown(f"**{q_obj.question}**")
+            if q_obj.source:
+                st.caption(f"Source: {q_obj.source}")
             if q_obj.question_type in ["open_ended", "fill_blank"]:
                 st.write("Your Answer:")
                 st.code(user_answers_for_results.get(q_obj.db_id, "No answer provided"))
@@ -201,34 +407,19 @@ def render_results_page(): # Student: Quiz Results & AI Analysis (after taking q
     
     st.subheader("AI Analysis")
     if st.button("Get Detailed Feedback", use_container_width=True, type="primary"):
-        # For AI analysis, we need the questions and the user's answers in the format expected by create_quiz_summary_for_llm
-        # create_quiz_summary_for_llm expects List[Question] and Dict[int, int] (question index to answer index)
-        # We need to map db_id based user_answers_for_results to index-based for the summary function
-        indexed_user_answers = {}
-        for idx, q_instance in enumerate(questions_for_results):
-            if q_instance.db_id in user_answers_for_results:
-                indexed_user_answers[idx] = user_answers_for_results[q_instance.db_id]
-            else:
-                 indexed_user_answers[idx] = -1 # Not answered
+        # Runs in the background; clicking again (or any rerun) reuses the same task instead of calling the LLM again
+        _submit_quiz_analysis(quiz_id, user_id or "", questions_for_results, user_answers_for_results, correct, total, score_pct)
 
-        quiz_summary_text = create_quiz_summary_for_llm(questions_for_results, indexed_user_answers)
-        evaluation_prompt = generate_quiz_analysis_prompt(quiz_summary_text, correct, total, score_pct)
-        ai_evaluation = generate_content(evaluation_prompt, show_spinner=True)
-        
-        if ai_evaluation:
-            analysis_sections = parse_quiz_analysis(ai_evaluation)
-            st.subheader("Personalized Quiz Analysis")
-            if analysis_sections.get("understanding"): st.markdown("#### Overall Understanding"); st.write(analysis_sections["understanding"])
-            if analysis_sections.get("strengths"): st.markdown("#### Your Strengths"); st.success(analysis_sections["strengths"])
-            if analysis_sections.get("knowledge_gaps"): st.markdown("#### Areas to Improve"); st.warning(analysis_sections["knowledge_gaps"])
-            if analysis_sections.get("recommendations"): st.markdown("#### Recommended Next Steps"); st.info(analysis_sections["recommendations"])
-        else:
-            st.error("Could not retrieve AI analysis at this time.")
+    analysis_task = st.session_state.get("quiz_analysis_task")
+    if analysis_task and analysis_task[0] == quiz_id:
+        task = get_task(analysis_task[1])
+        if task:
+            st.fragment(run_every=None if task.done else 2)(render_quiz_analysis_status)(task.id)
     
     st.markdown("--- ")
     if st.button("Back to Student Dashboard", key="results_back_dash"):
         # Clear results-specific session state
-        for key in ["current_quiz_questions_for_results", "user_answers_for_results", "score_for_results", "ai_feedback_for_results"]:
+        for key in ["results_quiz_id", "user_answers_for_results", "score_for_results", "ai_feedback_for_results", "quiz_analysis_task"]:
             if key in st.session_state: del st.session_state[key]
         st.session_state.page = "student_dashboard"
         st.rerun()
@@ -258,6 +449,23 @@ def render_results_page(): # Student: Quiz Results & AI Analysis (after taking q
             total += manual_total
             score_pct = (correct / total) * 100 if total > 0 else 0.0
 
+def _load_take_quiz_state(quiz_id: str, user_id: str) -> Optional[Dict[str, Any]]:
+    """Quiz header and the one-submission check, fetched once per quiz visit and kept in the session,
+       so reruns of the page do not go back to the database."""
+    cached = st.session_state.get("_take_quiz_state")
+    if cached and cached["quiz_id"] == quiz_id and cached["user_id"] == user_id:
+        return cached
+    quiz_details = get_quiz_details_by_id(quiz_id)
+    if not quiz_details or not quiz_details.get('questions'):
+        return None
+    state = {
+        "quiz_id": quiz_id, "user_id": user_id,
+        "title": quiz_details['title'], "description": quiz_details.get('description', ''),
+        "already_submitted": bool(get_student_quiz_submissions(user_id, quiz_id)),
+    }
+    st.session_state._take_quiz_state = state
+    return state
+
 def render_take_quiz_page(): # Student: Take Quiz
     """Student view: Take a quiz and submit answers."""
     quiz_id = st.session_state.get("view_quiz_id")
@@ -268,28 +476,26 @@ def render_take_quiz_page(): # Student: Take Quiz
             st.rerun()
         return
 
-    # Fetch full quiz details including questions (which are Question objects from db_utils)
-    quiz_details = get_quiz_details_by_id(quiz_id)
-    if not quiz_details or not quiz_details.get('questions'):
+    user_id = _session_user_id()
+    if not user_id:
+        st.error("User ID not found. Please log in.")
+        st.session_state.page = "login"
+        st.rerun()
+        return
+
+    quiz_state = _load_take_quiz_state(quiz_id, user_id)
+    if not quiz_state:
         st.error("Quiz details or questions not found.")
         if st.button("Back to Dashboard"):
             st.session_state.page = "student_dashboard"
             st.rerun()
         return
     
-    st.title(quiz_details['title'])
-    st.write(quiz_details.get('description',''))
+    st.title(quiz_state['title'])
+    st.write(quiz_state['description'])
     st.markdown("--- ")
-    
-    user_id = get_user_id()
-    if not user_id:
-        st.error("User ID not found. Please log in.")
-        st.session_state.page = "login"
-        st.rerun()
-        return
 
-    existing_submissions = get_student_quiz_submissions(user_id, quiz_id)
-    if existing_submissions:
+    if quiz_state["already_submitted"]:
         st.info("You have already submitted this quiz. Only one submission is allowed.")
         if st.button("Back to Dashboard"):
             st.session_state.page = "student_dashboard"
@@ -300,7 +506,23 @@ def render_take_quiz_page(): # Student: Take Quiz
         st.session_state.current_quiz_answers = {} # Stores {question_db_id: selected_option_index}
         st.session_state._current_quiz_id_for_answers = quiz_id
 
-    quiz_questions: List[Question] = quiz_details['questions']
+    render_take_quiz_form(quiz_id, user_id)
+
+    # This part is for displaying the success message if quiz_submitted_successfully was set by a previous rerun
+    # However, navigation to results page is now direct, so this might not be hit unless that fails.
+    if st.session_state.get("quiz_submitted_successfully") and st.session_state.page != "results":
+        st.success("Quiz submitted successfully! Preparing your results...") 
+        # Logic to go to dashboard if results navigation failed for some reason
+        if st.button("Back to Dashboard", key="take_quiz_back_after_submit_fail_nav"):
+            st.session_state.page = "student_dashboard"
+            st.session_state.pop('quiz_submitted_successfully', None)
+            st.rerun()
+
+@st.fragment
+def render_take_quiz_form(quiz_id: str, user_id: str):
+    """The questions form. Answering does not rerun anything (widgets in a form only report on submit), and
+       submitting reruns only this fragment, not the quiz loading above it."""
+    quiz_questions: Sequence[Question] = _load_quiz_questions(quiz_id) or ()
 
     with st.form("take_quiz_form"):
         for q_obj in quiz_questions: # q_obj is a Question dataclass instance
@@ -340,6 +562,11 @@ def render_take_quiz_page(): # Student: Take Quiz
         submit_button = st.form_submit_button("Submit Quiz", use_container_width=True, type="primary")
         
         if submit_button:
+            # The submission check above is cached for the visit; re-check before saving (e.g. another tab)
+            if get_student_quiz_submissions(user_id, quiz_id):
+                st.session_state.pop('_take_quiz_state', None)
+                st.error("You have already submitted this quiz. Only one submission is allowed.")
+                return
             # Calculate score before saving
             correct_count = 0
             for q_obj in quiz_questions:
@@ -347,51 +574,52 @@ def render_take_quiz_page(): # Student: Take Quiz
                     correct_count += 1
             score_percentage = (correct_count / len(quiz_questions)) * 100 if quiz_questions else 0.0
             
-            # Generate AI feedback using LLM
-            from services.quiz_processing_service import create_quiz_summary_for_llm, generate_quiz_analysis_prompt, parse_quiz_analysis
-            from services.llm_service import generate_content
-            quiz_summary = create_quiz_summary_for_llm(quiz_questions, st.session_state.current_quiz_answers)
-            ai_prompt = generate_quiz_analysis_prompt(quiz_summary, correct_count, len(quiz_questions), score_percentage)
-            ai_feedback_raw = generate_content(ai_prompt, show_spinner=True)
-            ai_feedback = parse_quiz_analysis(ai_feedback_raw) if ai_feedback_raw else {}
-            
-            # Save feedback as a string (raw or parsed)
-            import json
-            feedback_to_save = json.dumps(ai_feedback) if ai_feedback else None
-            
-            # answers_to_save is st.session_state.current_quiz_answers (already {q_db_id: ans_idx})
-            save_successful = save_quiz_submission(quiz_id, user_id, st.session_state.current_quiz_answers, score_percentage, feedback=feedback_to_save)
+            # The submission is saved before any LLM call, so a rerun or a dropped connection cannot lose it;
+            # the analysis then runs as a background task that the results page polls
+            save_successful = save_quiz_submission(quiz_id, user_id, st.session_state.current_quiz_answers, score_percentage)
             
             if save_successful:
                 st.session_state.quiz_submitted_successfully = True
                 # Store info needed for the results page
-                st.session_state.current_quiz_questions_for_results = quiz_questions
+                st.session_state.results_quiz_id = quiz_id
                 st.session_state.user_answers_for_results = st.session_state.current_quiz_answers.copy()
                 st.session_state.score_for_results = (correct_count, len(quiz_questions), score_percentage)
-                st.session_state.ai_feedback_for_results = ai_feedback
+                _submit_quiz_analysis(quiz_id, user_id, quiz_questions, st.session_state.current_quiz_answers,
+                                      correct_count, len(quiz_questions), score_percentage)
                 
                 # Clear quiz-taking specific state before going to results
                 del st.session_state['current_quiz_answers']
                 del st.session_state['_current_quiz_id_for_answers']
+                st.session_state.pop('_take_quiz_state', None)
                 st.session_state.page = "results" # Navigate to results page
-                st.rerun()
+                st.rerun() # Full rerun: the page changes
             else:
                 st.error("There was an issue submitting your quiz. Please try again.")
 
-    # This part is for displaying the success message if quiz_submitted_successfully was set by a previous rerun
-    # However, navigation to results page is now direct, so this might not be hit unless that fails.
-    if st.session_state.get("quiz_submitted_successfully") and st.session_state.page != "results":
-        st.success("Quiz submitted successfully! Preparing your results...") 
-        # Logic to go to dashboard if results navigation failed for some reason
-        if st.button("Back to Dashboard", key="take_quiz_back_after_submit_fail_nav"):
-            st.session_state.page = "student_dashboard"
-            st.session_state.pop('quiz_submitted_successfully', None)
-            st.rerun()
+def _load_teacher_submissions(quiz_id: str, teacher_id: str, refresh: bool = False) -> List[Dict[str, Any]]:
+    """Submissions for the quiz, fetched once per visit (or on refresh) and kept in the session."""
+    cached = st.session_state.get("_quiz_submissions_state")
+    if not refresh and cached and cached["quiz_id"] == quiz_id and cached["teacher_id"] == teacher_id:
+        return cached["submissions"]
+    submissions = get_quiz_submissions_for_teacher(teacher_id, quiz_id)
+    st.session_state._quiz_submissions_state = {"quiz_id": quiz_id, "teacher_id": teacher_id, "submissions": submissions}
+    return submissions
+
+def _parse_submission_answers(student_answers_str) -> Dict[str, Any]:
+    if isinstance(student_answers_str, dict):
+        return student_answers_str
+    try:
+        # Try ast.literal_eval, fallback to showing raw string if fails
+        parsed = ast.literal_eval(student_answers_str)
+        return parsed if isinstance(parsed, dict) else {}
+    except Exception:
+        st.warning(f"Could not parse answers for this submission: {student_answers_str}")
+        return {}
 
 def render_quiz_submissions_page(): # Teacher: View Submissions for a Quiz
     """Teacher view: See all student submissions for a quiz."""
     quiz_id = st.session_state.get("view_quiz_id")
-    teacher_id = get_user_id()
+    teacher_id = _session_user_id()
 
     # Add this line to define is_teacher
     is_teacher = st.session_state.get("user_role") == "teacher"
@@ -418,137 +646,112 @@ def render_quiz_submissions_page(): # Teacher: View Submissions for a Quiz
         return
 
     st.title(f"Submissions for: {quiz_details['title']}")
+    refresh = st.button("Refresh submissions", key="quiz_sub_refresh")
     st.markdown("--- ")
     
-    submissions = get_quiz_submissions_for_teacher(teacher_id, quiz_id)
+    submissions = _load_teacher_submissions(quiz_id, teacher_id, refresh=refresh)
     if not submissions:
         st.info("No student submissions yet for this quiz.")
     else:
-        student_emails_map = {} # Fetch student emails if needed, or just use IDs
-        # Example: student_emails_map = {sub['student_id']: get_user_email_by_id(sub['student_id']) for sub in submissions}
-        # For now, use student_id directly.
+        render_submission_review(quiz_id, is_teacher)
 
-        student_options = {sub['student_id']: f"Student ID: {sub['student_id']} (Score: {sub.get('score', 'N/A'):.1f}%) Submitted: {sub.get('created_at', '')[:16]}" for sub in submissions}
-        
-        selected_student_id = st.selectbox(
-            "Select a student to view their submission:", 
-            options=[""] + list(student_options.keys()), 
-            format_func=lambda x: student_options.get(x, "Select...")
-        )
+    if st.button("Back to Teacher Dashboard", key="quiz_sub_back_to_dash"):
+        st.session_state.page = "teacher_dashboard"
+        st.session_state.pop('view_quiz_id', None)
+        st.session_state.pop('_quiz_submissions_state', None)
+        st.rerun()
 
-        if selected_student_id:
-            submission_details = next((s for s in submissions if s['student_id'] == selected_student_id), None)
-            if not submission_details:
-                st.error("Selected submission not found.")
-                return
+@st.fragment
+def render_submission_review(quiz_id: str, is_teacher: bool):
+    """Student picker and the selected submission. Choosing a student or saving grades reruns only this
+       fragment, from the submissions and questions already loaded; grade inputs sit in a form, so changing
+       them reruns nothing until they are saved."""
+    submissions = st.session_state._quiz_submissions_state["submissions"]
+    student_emails_map = {} # Fetch student emails if needed, or just use IDs
+    # Example: student_emails_map = {sub['student_id']: get_user_email_by_id(sub['student_id']) for sub in submissions}
+    # For now, use student_id directly.
 
-            student_answers_str = submission_details.get('answers', '{}')
-            student_answers_dict = {}
-            try:
-                if isinstance(student_answers_str, dict):
-                    student_answers_dict = student_answers_str
-                else:
-                    # Try ast.literal_eval, fallback to showing raw string if fails
-                    student_answers_dict = ast.literal_eval(student_answers_str)
-                    if not isinstance(student_answers_dict, dict):
-                        student_answers_dict = {}
-            except Exception as e:
-                st.warning(f"Could not parse answers for this submission: {student_answers_str}")
-                student_answers_dict = {}
-                
-            st.markdown("--- ")
-            st.subheader(f"Submission Details for Student ID: {selected_student_id}")
-            st.write(f"**Score:** {submission_details.get('score', 'N/A'):.1f}% | **Submitted at:** {submission_details.get('created_at', '')[:19]}")
-            st.markdown("--- ")
-            
-            st.subheader("Answers Given:")
-            quiz_questions: List[Question] = quiz_details['questions']
-            manual_grades = submission_details.get('manual_grades', {})
-            if manual_grades is None:
-                manual_grades = {}
-            manual_grades_changed = False
-            for i, q_obj in enumerate(quiz_questions):
-                st.markdown(f"**Q{i+1}: {q_obj.question}**")
-                student_ans = student_answers_dict.get(str(q_obj.db_id), None)
-                if q_obj.question_type == "mcq":
-                    # MCQ logic unchanged
-                    correct_idx = q_obj.correct_answer if hasattr(q_obj, 'correct_answer') else None
-                    student_ans_idx = None
-                    try:
-                        student_ans_idx = int(student_ans) if student_ans is not None else None
-                    except Exception:
-                        pass
-                    for j, opt_text in enumerate(q_obj.answers):
-                        display_text = f"{chr(65+j)}) {opt_text}"
-                        if j == correct_idx and j == student_ans_idx:
-                            st.success(f"{display_text} (Correct & Student's Answer)")
-                        elif j == student_ans_idx:
-                            st.error(f"{display_text} (Student's Answer - Incorrect)")
-                        elif j == correct_idx:
-                            st.info(f"{display_text} (Correct Answer)")
-                        else:
-                            st.write(display_text)
-                elif q_obj.question_type == "true_false":
-                    # Show as True/False, not MCQ
-                    tf_options = ["True", "False"]
-                    correct_idx = q_obj.correct_answer if hasattr(q_obj, 'correct_answer') else None
-                    student_ans_idx = None
-                    try:
-                        student_ans_idx = int(student_ans) if student_ans is not None else None
-                    except Exception:
-                        pass
-                    for j, opt_text in enumerate(tf_options):
-                        display_text = f"{opt_text}"
-                        if j == correct_idx and j == student_ans_idx:
-                            st.success(f"{display_text} (Correct & Student's Answer)")
-                        elif j == student_ans_idx:
-                            st.error(f"{display_text} (Student's Answer - Incorrect)")
-                        elif j == correct_idx:
-                            st.info(f"{display_text} (Correct Answer)")
-                        else:
-                            st.write(display_text)
-                elif q_obj.question_type == "fill_blank":
+    student_options = {sub['student_id']: f"Student ID: {sub['student_id']} (Score: {sub.get('score', 'N/A'):.1f}%) Submitted: {sub.get('created_at', '')[:16]}" for sub in submissions}
+    
+    selected_student_id = st.selectbox(
+        "Select a student to view their submission:", 
+        options=[""] + list(student_options.keys()), 
+        format_func=lambda x: student_options.get(x, "Select...")
+    )
+    if not selected_student_id:
+        return
+
+    submission_details = next((s for s in submissions if s['student_id'] == selected_student_id), None)
+    if not submission_details:
+        st.error("Selected submission not found.")
+        return
+
+    student_answers_dict = _parse_submission_answers(submission_details.get('answers', '{}'))
+        
+    st.markdown("--- ")
+    st.subheader(f"Submission Details for Student ID: {selected_student_id}")
+    st.write(f"**Score:** {submission_details.get('score', 'N/A'):.1f}% | **Submitted at:** {submission_details.get('created_at', '')[:19]}")
+    st.markdown("--- ")
+    
+    st.subheader("Answers Given:")
+    quiz_questions: Sequence[Question] = _load_quiz_questions(quiz_id) or ()
+    manual_grades = dict(submission_details.get('manual_grades') or {})
+    new_grades = {}
+    grading = is_teacher and any(q.question_type in ("fill_blank", "open_ended") for q in quiz_questions)
+    with (st.form(f"manual_grades_form_{selected_student_id}", border=False) if grading else st.container()):
+        for i, q_obj in enumerate(quiz_questions):
+            st.markdown(f"**Q{i+1}: {q_obj.question}**")
+            if q_obj.source:
+                st.caption(f"Source: {q_obj.source}")
+            student_ans = student_answers_dict.get(str(q_obj.db_id), None)
+            if q_obj.question_type in ("mcq", "true_false"):
+                # True/False is shown as True/False, not as MCQ options
+                options = q_obj.answers if q_obj.question_type == "mcq" else ["True", "False"]
+                correct_idx = q_obj.correct_answer if hasattr(q_obj, 'correct_answer') else None
+                student_ans_idx = None
+                try:
+                    student_ans_idx = int(student_ans) if student_ans is not None else None
+                except Exception:
+                    pass
+                for j, opt_text in enumerate(options):
+                    display_text = f"{chr(65+j)}) {opt_text}" if q_obj.question_type == "mcq" else f"{opt_text}"
+                    if j == correct_idx and j == student_ans_idx:
+                        st.success(f"{display_text} (Correct & Student's Answer)")
+                    elif j == student_ans_idx:
+                        st.error(f"{display_text} (Student's Answer - Incorrect)")
+                    elif j == correct_idx:
+                        st.info(f"{display_text} (Correct Answer)")
+                    else:
+                        st.write(display_text)
+            elif q_obj.question_type in ("fill_blank", "open_ended"):
+                if q_obj.question_type == "fill_blank":
                     st.write(f"Student Answer: {student_ans if student_ans is not None else 'No answer submitted.'}")
                     if q_obj.answers:
                         st.info(f"Correct Answer: {q_obj.answers[0]}")
-                    # Manual grade for both fill-in-the-blank and open-ended
-                    if is_teacher:
-                        current_grade = manual_grades.get(str(q_obj.db_id), "Under evaluation")
-                        new_grade = st.number_input(f"Manual Grade for Q{i+1} (0-1)", min_value=0.0, max_value=1.0, value=float(current_grade) if isinstance(current_grade, (int, float)) else 0.0, step=0.1, key=f"manual_grade_{selected_student_id}_{q_obj.db_id}")
-                        if new_grade != current_grade:
-                            manual_grades[str(q_obj.db_id)] = new_grade
-                            manual_grades_changed = True
-                        st.write(f"Current Manual Grade: {manual_grades.get(str(q_obj.db_id), 'Not graded')}")
-                    else:
-                        if str(q_obj.db_id) in manual_grades:
-                            st.success(f"Manual Grade: {manual_grades[str(q_obj.db_id)]}")
-                        else:
-                            st.info("Not graded yet.")
-                elif q_obj.question_type == "open_ended":
+                else:
                     st.markdown("**Student's Answer:**")
                     st.code(student_ans if student_ans is not None else 'No answer submitted.', language=None)
-                    # Manual grade for both fill-in-the-blank and open-ended
-                    if is_teacher:
-                        current_grade = manual_grades.get(str(q_obj.db_id), "Under evaluation")
-                        new_grade = st.number_input(f"Manual Grade for Q{i+1} (0-1)", min_value=0.0, max_value=1.0, value=float(current_grade) if isinstance(current_grade, (int, float)) else 0.0, step=0.1, key=f"manual_grade_{selected_student_id}_{q_obj.db_id}")
-                        if new_grade != current_grade:
-                            manual_grades[str(q_obj.db_id)] = new_grade
-                            manual_grades_changed = True
-                        st.write(f"Current Manual Grade: {manual_grades.get(str(q_obj.db_id), 'Not graded')}")
+                # Manual grade for both fill-in-the-blank and open-ended
+                if is_teacher:
+                    current_grade = manual_grades.get(str(q_obj.db_id), "Under evaluation")
+                    new_grades[str(q_obj.db_id)] = st.number_input(f"Manual Grade for Q{i+1} (0-1)", min_value=0.0, max_value=1.0, value=float(current_grade) if isinstance(current_grade, (int, float)) else 0.0, step=0.1, key=f"manual_grade_{selected_student_id}_{q_obj.db_id}")
+                    st.write(f"Current Manual Grade: {manual_grades.get(str(q_obj.db_id), 'Not graded')}")
+                else:
+                    if str(q_obj.db_id) in manual_grades:
+                        st.success(f"Manual Grade: {manual_grades[str(q_obj.db_id)]}")
                     else:
-                        if str(q_obj.db_id) in manual_grades:
-                            st.success(f"Manual Grade: {manual_grades[str(q_obj.db_id)]}")
-                        else:
-                            st.info("Not graded yet.")
-                st.markdown("---")
-            if manual_grades_changed and st.button("Save Manual Grades", key=f"save_manual_grades_{selected_student_id}"):
-                client = get_supabase_client()
-                if client:
-                    client.table("quiz_results").update({"manual_grades": manual_grades}).eq("quiz_id", quiz_id).eq("student_id", selected_student_id).execute()
-                    st.session_state.manual_grades = manual_grades  # <-- Store in session state
-                    st.success("Manual grades saved!")
+                        st.info("Not graded yet.")
+            st.markdown("---")
+        save_grades = grading and st.form_submit_button("Save Manual Grades", type="primary")
 
-    if st.button("Back to Teacher Dashboard", key="quiz_sub_back_to_dash"):
-        st.session_state.page = "teacher_dashboard"
-        st.session_state.pop('view_quiz_id', None)
-        st.rerun() 
\ No newline at end of file
+    if save_grades:
+        if any(manual_grades.get(key) != grade for key, grade in new_grades.items()):
+            manual_grades.update(new_grades)
+            if save_quiz_manual_grades(quiz_id, selected_student_id, manual_grades):
+                submission_details['manual_grades'] = manual_grades  # keep the loaded submissions current
+                st.session_state.manual_grades = manual_grades  # <-- Store in session state
+                st.success("Manual grades saved!")
+            else:
+                st.error("Failed to save the manual grades.")
+        else:
+            st.info("No grade changed.")
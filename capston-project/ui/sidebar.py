@@ -1,5 +1,28 @@
 import streamlit as st
 from auth import signout_user
+from services.page_profiler_service import PAGE_PROFILING, PAGE_PROFILE_LOG, get_page_profiles, slowest_calls
+
+def render_profile_panel():
+    """Debug panel: timings and backend calls of this session's previous renders."""
+    if not st.sidebar.checkbox("Show render profile", key="show_render_profile"):
+        return
+    profiles = get_page_profiles()
+    if not profiles:
+        st.sidebar.caption("No renders recorded yet.")
+        return
+    last = profiles[-1]
+    st.sidebar.markdown(f"**Last render:** `{last['page']}` in {last['wall_ms']:.0f} ms")
+    st.sidebar.dataframe(
+        [{"Kind": kind, "Calls": t["count"], "ms": t["ms"], "KB": round(t["bytes"] / 1024, 1)} for kind, t in sorted(last["totals"].items())],
+        use_container_width=True, hide_index=True
+    )
+    slowest = slowest_calls(last)
+    if slowest:
+        st.sidebar.caption("Slowest calls (nested calls are also part of their caller's time):")
+        for call in slowest:
+            st.sidebar.caption(f"{call['kind']}.{call['name']}: {call['ms']:.0f} ms, {call['bytes'] / 1024:.1f} KB")
+    st.sidebar.line_chart([{"render": i, "ms": p["wall_ms"]} for i, p in enumerate(profiles)], x="render", y="ms", height=120)
+    st.sidebar.caption(f"Full log: {PAGE_PROFILE_LOG}")
 
 def create_sidebar():
     # Logo and university name
@@ -23,5 +46,8 @@ def create_sidebar():
         if st.sidebar.button("Sign Up", use_container_width=True):
             st.session_state.page = "signup"
             st.rerun()
+    if PAGE_PROFILING:
+        st.sidebar.markdown('---')
+        render_profile_panel()
     st.sidebar.markdown('---')
     st.sidebar.markdown('<div style="font-size:12px; color:#888; text-align:center;">Powered by Streamlit</div>', unsafe_allow_html=True) 
\ No newline at end of file